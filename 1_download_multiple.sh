@@ -5,6 +5,9 @@ URL_FILE="list.txt"
 MANIFEST_FILE="manifest.txt"
 FAILED_FILE="$SCRIPT_DIR/failed_downloads.txt"
 DUPES_FILE="dupes.txt"
+COOKIE_FILE="$SCRIPT_DIR/cookies.firefox-private.txt"
+ERR_FILE="$(mktemp)"
+trap 'rm -f "$ERR_FILE"' EXIT
 
 > "$FAILED_FILE"
 > "$DUPES_FILE"
@@ -15,6 +18,66 @@ if [[ ! -f "$URL_FILE" ]]; then
 fi
 
 declare -A SEEN_IDS=()
+declare -A PERMANENT_IDS=()
+COOKIE_QUEUE=()  # "<url>\t<video_id>" of age-gated/bot-checked videos, retried with cookies
+
+# Structured events for metrics.py (never fails the download loop)
+emit_metric() {
+    python3 "$SCRIPT_DIR/metrics.py" emit "$@" || true
+}
+
+# download_video <url> <video_id> [extra yt-dlp options]
+# yt-dlp's stderr is kept in $ERR_FILE for classification
+download_video() {
+    local url="$1" video_id="$2"
+    shift 2
+
+    #if yt-dlp --cookies-from-browser firefox --embed-metadata --embed-thumbnail "$url"; then
+    #--cookies-from-browser firefox \
+    #--remote-components ejs:github \
+    #--js-runtimes deno:~/.deno/bin/deno \
+    yt-dlp \
+        "$@" \
+        -t mp4 \
+        --write-thumbnail \
+        --convert-thumbnails jpg \
+        --embed-thumbnail \
+        --embed-metadata \
+        --write-subs \
+        --write-auto-subs \
+        --sub-langs en.* \
+        --sub-format vtt \
+        -P "$video_id" \
+        "$url" 2> "$ERR_FILE"
+    local status=$?
+    cat "$ERR_FILE" >&2
+    return $status
+}
+
+download_ok() {
+    local url="$1" video_id="$2" started="$3"
+    SEEN_IDS["$video_id"]=1
+    emit_metric download ok --video-id "$video_id" --started "$started" --bytes-of "$video_id"
+}
+
+# Private/removed videos are recorded and never retried; the rest go to $FAILED_FILE
+download_failed() {
+    local url="$1" video_id="$2" started="$3" failure="$4"
+    if python3 "$SCRIPT_DIR/ytdlp_errors.py" is-permanent "$failure"; then
+        echo "Permanently unavailable ($failure), will not be retried: $url"
+        python3 "$SCRIPT_DIR/ytdlp_errors.py" record "$video_id" "$failure" "$url"
+        rmdir -- "$video_id" 2>/dev/null
+    else
+        echo "Failed ($failure): $url"
+        echo "$url" >> "$FAILED_FILE"
+    fi
+    emit_metric download failed --video-id "$video_id" --started "$started" --reason "$failure"
+}
+
+# --- Load permanently unavailable video IDs ---
+while IFS= read -r id; do
+    [[ -n "$id" ]] && PERMANENT_IDS["$id"]=1
+done < <(python3 "$SCRIPT_DIR/ytdlp_errors.py" ids)
 
 if [[  -f "$MANIFEST_FILE" ]]; then
     echo "$MANIFEST_FILE found. Extracting video IDs.."
@@ -33,19 +96,31 @@ fi
 while IFS= read -r url; do
     [[ -z "$url" || "$url" =~ ^# ]] && continue
 
-    # Extract video ID from URL using yt-dlp (robust)
-    #video_id=$(yt-dlp --cookies-from-browser firefox --get-id "$url" 2>/dev/null)
-    video_id=$(yt-dlp --remote-components ejs:github --get-id "$url" 2>/dev/null)
+    # Plain watch URLs (as queued by ingest.py) carry the ID, no request needed
+    if [[ "$url" =~ ^https://www\.youtube\.com/watch\?v=([A-Za-z0-9_-]{11})$ ]]; then
+        video_id="${BASH_REMATCH[1]}"
+    else
+        # Extract video ID from URL using yt-dlp (robust)
+        #video_id=$(yt-dlp --cookies-from-browser firefox --get-id "$url" 2>/dev/null)
+        video_id=$(yt-dlp --remote-components ejs:github --get-id "$url" 2>/dev/null)
+    fi
 
     if [[ -z "$video_id" ]]; then
         echo "Could not extract ID: $url"
         echo "$url" >> "$FAILED_FILE"
+        emit_metric resolve failed --reason no-id
         continue
     fi
 
     if [[ -n "${SEEN_IDS[$video_id]}" ]]; then
         echo "Duplicate found, skipping: $url"
         echo "$url" >> "$DUPES_FILE"
+        emit_metric resolve duplicate --video-id "$video_id"
+        continue
+    fi
+
+    if [[ -n "${PERMANENT_IDS[$video_id]}" ]]; then
+        echo "Permanently unavailable, skipping: $url"
         continue
     fi
 
@@ -55,32 +130,43 @@ while IFS= read -r url; do
     fi
 
     echo "Downloading: $url to $video_id"
+    started=$(date +%s)
 
-    #if yt-dlp --cookies-from-browser firefox --embed-metadata --embed-thumbnail "$url"; then
-    #--cookies-from-browser firefox \
-    #--remote-components ejs:github \
-    #--js-runtimes deno:~/.deno/bin/deno \
-    if yt-dlp \
-        -t mp4 \
-        --write-thumbnail \
-        --convert-thumbnails jpg \
-        --embed-thumbnail \
-        --embed-metadata \
-        --write-subs \
-        --write-auto-subs \
-        --sub-langs en.* \
-        --sub-format vtt \
-        -P "$video_id" \
-        "$url";
-    then
-        SEEN_IDS["$video_id"]=1
+    if download_video "$url" "$video_id"; then
+        download_ok "$url" "$video_id" "$started"
+        continue
+    fi
+
+    failure="$(python3 "$SCRIPT_DIR/ytdlp_errors.py" classify "$ERR_FILE")"
+    if [[ -f "$COOKIE_FILE" ]] && python3 "$SCRIPT_DIR/ytdlp_errors.py" needs-cookies "$failure"; then
+        echo "Needs cookies ($failure), queued for a download with cookies: $url"
+        COOKIE_QUEUE+=("$url"$'\t'"$video_id")
+        emit_metric download cookie-retry --video-id "$video_id" --started "$started"
     else
-        echo "Failed: $url"
-        echo "$url" >> "$FAILED_FILE"
+        download_failed "$url" "$video_id" "$started" "$failure"
     fi
 
 done < "$URL_FILE"
 
+# --- Second tier: age-gated and bot-checked videos, with the cookie file ---
+if (( ${#COOKIE_QUEUE[@]} )); then
+    echo "Retrying ${#COOKIE_QUEUE[@]} video(s) with cookies.."
+fi
+
+for entry in "${COOKIE_QUEUE[@]}"; do
+    url="${entry%%$'\t'*}"
+    video_id="${entry#*$'\t'}"
+
+    echo "Downloading with cookies: $url to $video_id"
+    started=$(date +%s)
+
+    if download_video "$url" "$video_id" --cookies "$COOKIE_FILE"; then
+        download_ok "$url" "$video_id" "$started"
+    else
+        download_failed "$url" "$video_id" "$started" "$(python3 "$SCRIPT_DIR/ytdlp_errors.py" classify "$ERR_FILE")"
+    fi
+done
+
 echo "All downloads finished."
 [[ -s "$FAILED_FILE" ]] && echo "Some downloads failed. See $FAILED_FILE."
 [[ -s "$DUPES_FILE" ]] && echo "Duplicates logged to $DUPES_FILE."
@@ -16,6 +16,17 @@ if [[ ! -f "$URL_FILE" ]]; then
 fi
 
 declare -A SEEN_IDS=()
+declare -A PERMANENT_IDS=()
+
+# Structured events for metrics.py (never fails the download loop)
+emit_metric() {
+    python3 "$SCRIPT_DIR/metrics.py" emit "$@" || true
+}
+
+# --- Load permanently unavailable video IDs (private/removed) ---
+while IFS= read -r id; do
+    [[ -n "$id" ]] && PERMANENT_IDS["$id"]=1
+done < <(python3 "$SCRIPT_DIR/ytdlp_errors.py" ids)
 
 if [[  -f "$MANIFEST_FILE" ]]; then
     echo "$MANIFEST_FILE found. Extracting video IDs.."
@@ -34,19 +45,31 @@ fi
 while IFS= read -r url; do
     [[ -z "$url" || "$url" =~ ^# ]] && continue
 
-    # Extract video ID from URL using yt-dlp (robust)
-    #video_id=$(yt-dlp --cookies-from-browser firefox --get-id "$url" 2>/dev/null)
-    video_id=$(yt-dlp --cookies "$COOKIE_FILE" --get-id "$url" 2>/dev/null)
+    # Plain watch URLs (as queued by ingest.py) carry the ID, no request needed
+    if [[ "$url" =~ ^https://www\.youtube\.com/watch\?v=([A-Za-z0-9_-]{11})$ ]]; then
+        video_id="${BASH_REMATCH[1]}"
+    else
+        # Extract video ID from URL using yt-dlp (robust)
+        #video_id=$(yt-dlp --cookies-from-browser firefox --get-id "$url" 2>/dev/null)
+        video_id=$(yt-dlp --cookies "$COOKIE_FILE" --get-id "$url" 2>/dev/null)
+    fi
 
     if [[ -z "$video_id" ]]; then
         echo "Could not extract ID: $url"
         echo "$url" >> "$FAILED_FILE"
+        emit_metric resolve failed --reason no-id
         continue
     fi
 
     if [[ -n "${SEEN_IDS[$video_id]}" ]]; then
         echo "Duplicate found, skipping: $url"
         echo "$url" >> "$DUPES_FILE"
+        emit_metric resolve duplicate --video-id "$video_id"
+        continue
+    fi
+
+    if [[ -n "${PERMANENT_IDS[$video_id]}" ]]; then
+        echo "Permanently unavailable, skipping: $url"
         continue
     fi
 
@@ -56,6 +79,7 @@ while IFS= read -r url; do
     fi
 
     echo "Downloading: $url to $video_id"
+    started=$(date +%s)
 
     #if yt-dlp --cookies-from-browser firefox --embed-metadata --embed-thumbnail "$url"; then
     #--cookies-from-browser firefox \
@@ -76,9 +100,11 @@ while IFS= read -r url; do
         "$url";
     then
         SEEN_IDS["$video_id"]=1
+        emit_metric download ok --video-id "$video_id" --started "$started" --bytes-of "$video_id"
     else
         echo "Failed: $url"
         echo "$url" >> "$FAILED_FILE"
+        emit_metric download failed --video-id "$video_id" --started "$started" --reason download-error
     fi
 
 done < "$URL_FILE"
@@ -10,6 +10,10 @@ SKIP_DIRS=(
     "old_manifests"
     "repair_tools"
     "_internal"
+    "thumb_cache"
+    "sprite_cache"
+    "load_testing"
+    "__pycache__"
 )
 
 should_skip() {
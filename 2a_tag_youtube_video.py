@@ -7,6 +7,11 @@ import sys
 from pathlib import Path
 from datetime import datetime
 
+import metrics
+import ytdlp_errors
+from media_headers import embedded_tags
+from sidecar_io import update_json
+
 VIDEO_ID_REGEX = re.compile(r"\[([A-Za-z0-9_-]{11})\]")
 
 # -----------------------------
@@ -41,7 +46,10 @@ def fetch_metadata_cookies(video_id: str) -> dict:
 
     return json.loads(result.stdout)
 
-def fetch_metadata(video_id: str) -> dict:
+def fetch_metadata(video_id: str, cookies: bool = False) -> dict:
+    if cookies: # Known age-restricted (downloaded with cookies)
+        return fetch_metadata_cookies(video_id)
+
     #, "--cookies-from-browser", "firefox",
     result = subprocess.run(
         ["yt-dlp", "-j", "--", video_id],
@@ -49,7 +57,7 @@ def fetch_metadata(video_id: str) -> dict:
         text=True
     )
 
-    if "cookies" in result.stderr.lower(): # Age-restriction
+    if ytdlp_errors.needs_cookies(ytdlp_errors.classify(result.stderr)):
         return fetch_metadata_cookies(video_id)
 
     if result.returncode != 0:
@@ -57,10 +65,38 @@ def fetch_metadata(video_id: str) -> dict:
 
     return json.loads(result.stdout)
 
-def write_json_sidecar(video_path: Path, metadata: dict):
+def fetch_embedded_metadata(video_path: Path, video_id: str) -> dict | None:
+    """
+    Offline fallback: rebuild yt-dlp style metadata from the tags that
+    --embed-metadata wrote into the container (only its headers are read).
+    Returns None when the file carries no usable title.
+    """
+    tags = embedded_tags(video_path)
+    if not tags.get("title"):
+        return None
+
+    upload_date = re.sub(r"\D", "", tags.get("date", ""))[:8]
+    url = next((v for v in (tags.get("purl"), tags.get("comment")) if v and v.startswith("http")), None)
+    # MP4 `desc` may be cut short, `ldes` (synopsis) holds the full text
+    description = max(tags.get("description") or "", tags.get("synopsis") or "", key=len)
+    duration = tags.get("duration")
+
+    return {
+        "id": video_id,
+        "title": tags["title"],
+        "uploader": tags.get("artist"),
+        "upload_date": upload_date if len(upload_date) == 8 else None,
+        "duration": round(duration) if duration else None,
+        "description": description or None,
+        "webpage_url": url or f"https://www.youtube.com/watch?v={video_id}",
+    }
+
+def write_json_sidecar(video_path: Path, metadata: dict, extracted_by: str = "yt-dlp"):
     """
     Write a curated, archival-grade JSON sidecar.
     Intentionally excludes yt-dlp extractor noise.
+    Merged into an existing sidecar (atomic, under the folder lock), so
+    fields added by other tools are kept.
     """
 
     upload_date = metadata.get("upload_date")  # YYYYMMDD
@@ -75,7 +111,7 @@ def write_json_sidecar(video_path: Path, metadata: dict):
         "channel_url": metadata.get("channel_url"),
         "upload_date": upload_date,
         "view_count": metadata.get("view_count"),
-        "view_count_date": date_str,
+        "view_count_date": date_str if metadata.get("view_count") is not None else None,
         "year": year,
         "duration_seconds": metadata.get("duration"),
         "description": metadata.get("description"),
@@ -84,7 +120,7 @@ def write_json_sidecar(video_path: Path, metadata: dict):
         "language": metadata.get("language"),
         "webpage_url": metadata.get("webpage_url"),
         "original_filename": video_path.name,
-        "extracted_by": "yt-dlp",
+        "extracted_by": extracted_by,
         "extractor_version": metadata.get("extractor_version"),
     }
 
@@ -95,8 +131,7 @@ def write_json_sidecar(video_path: Path, metadata: dict):
     video_id = metadata.get("id")
     json_path = video_path.with_name(f"{safe_title} [{video_id}].json")
 
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(archival, f, ensure_ascii=False, indent=2)
+    update_json(json_path, archival, create=True, ensure_ascii=False)
 
     print(f"Curated JSON sidecar written: {json_path.name}")
 
@@ -138,6 +173,30 @@ def embed_metadata_webm(video_path: Path, metadata: dict):
 # Main
 # -----------------------------
 
+def tag_video(video_path: Path, cookies: bool = False) -> str:
+    """
+    Fetch metadata and write the sidecar for one video; returns extracted_by.
+    `cookies`: the video is known to be age-restricted, skip the cookieless try.
+    """
+    video_id = extract_video_id(video_path.name)
+    print(f"Video ID: {video_id}")
+
+    extracted_by = "yt-dlp"
+    try:
+        metadata = fetch_metadata(video_id, cookies)
+    except (RuntimeError, json.JSONDecodeError) as e:
+        # Deleted, geo-blocked or rate limited: fall back to the embedded tags
+        metadata = fetch_embedded_metadata(video_path, video_id)
+        if metadata is None:
+            raise
+        extracted_by = "embedded"
+        reason = (str(e).strip().splitlines() or [""])[-1]
+        print(f"[WARN] yt-dlp metadata unavailable, using embedded tags instead: {reason}")
+
+    #embed_metadata_webm(video_path, metadata)
+    write_json_sidecar(video_path, metadata, extracted_by)
+    return extracted_by
+
 def main():
     if len(sys.argv) != 2:
         print("Usage: tag_youtube_video.py <video_file>")
@@ -147,13 +206,9 @@ def main():
     if not video_path.exists():
         raise FileNotFoundError(video_path)
 
-    video_id = extract_video_id(video_path.name)
-    print(f"Video ID: {video_id}")
-
-    metadata = fetch_metadata(video_id)
-
-    #embed_metadata_webm(video_path, metadata)
-    write_json_sidecar(video_path, metadata)
+    match = VIDEO_ID_REGEX.search(video_path.name)
+    with metrics.timed("tag", video_id=match.group(1) if match else None) as event:
+        event["source"] = tag_video(video_path)
 
     print("Archival tagging complete.")
 
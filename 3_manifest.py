@@ -1,7 +1,10 @@
 import os
+import time
 from pathlib import Path
 from datetime import datetime
 
+import metrics
+
 # Recursively find all files in a folder that match certain extensions.
 def find_files(root_dir):
     """
@@ -27,6 +30,7 @@ if __name__ == "__main__":
     output_file = Path("manifest.txt")
 
     print(f"Searching {search_dir} for all files..\n")
+    started = time.monotonic()
 
     # Collect matches
     matches = list(find_files(search_dir))
@@ -40,4 +44,5 @@ if __name__ == "__main__":
             f.write(str(relative_path) + "\n")
             #print(str(relative_path))
 
+    metrics.emit("manifest-full", "ok", seconds=time.monotonic() - started, files=len(matches))
     print(f"✅ Found {len(matches)} matching files. Saved to {output_file}")
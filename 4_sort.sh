@@ -11,7 +11,12 @@ set -euo pipefail
 BASE_DIR="$(cd "$(dirname "$0")" && pwd)"        # 1_New_Downloads
 PARENT_DIR="$(dirname "$BASE_DIR")"              # yt-dlp root
 
-SKIP_FOLDERS=("old_manifests" "repair_tools")
+SKIP_FOLDERS=("old_manifests" "repair_tools" "thumb_cache" "sprite_cache" "load_testing" "__pycache__")
+
+# Every successful move is appended here as "<category>\t<video_id>" so Step 5
+# can patch catalog.json instead of rescanning the whole archive.
+# Kept across interrupted runs, removed by Step 5 once applied.
+MOVES_FILE="$BASE_DIR/sorted_moves.txt"
 
 cd "$BASE_DIR"
 
@@ -86,6 +91,7 @@ for VIDEO_PATH in "$BASE_DIR"/*; do
 
             TARGET="${CATEGORIES[$((choice-1))]}"
             mv "$VIDEO_PATH" "$PARENT_DIR/$TARGET/"
+            printf '%s\t%s\n' "$TARGET" "$VIDEO_NAME" >> "$MOVES_FILE"
             echo "Moved to $TARGET/"
             break
         else
@@ -117,7 +123,7 @@ if (( REMAINING == 1 )); then
 fi
 
 # ------------------------------------------------------------
-# Success -> Execute Step 5 from parent
+# Success -> Patch catalog with the moved folders (Step 5)
 # ------------------------------------------------------------
-echo "Sorting complete. Running catalog generator..."
-exec python3 "5_generate_catalog.py"
+echo "Sorting complete. Updating catalog..."
+exec python3 "5_generate_catalog.py" --patch "$MOVES_FILE"
@@ -4,30 +4,67 @@ YouTube video catalog generator (Pipeline Step 5)
 
 Outputs (if and only if no failures):
 - catalog.json (canonical)
+- catalog.delta.<generation>.json (changes since the previous generation)
 - catalog.html (derived)
+
+With archive_roots.json, a full scan covers every archive root (one scan
+thread per disk) and merges them into one catalog; records of the other
+roots carry their root's name. --patch and --watch cover the home archive.
+
+Sidecars are written atomically by the other tools (sidecar_io.py), so the
+scan can run while the tagger or backfill_viewcount.py update them. Each
+catalog write holds the catalog folder's lock from load to write.
 """
 
-import json
+import argparse
+import ctypes
+import ctypes.util
+import os
 import re
+import select
+import struct
 import sys
 import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from datetime import datetime
 from glob import escape
 
+import archive_roots
+import metrics
+from catalog_io import (
+    CATALOG_JSON_NAME,
+    build_indexes,
+    catalog_stamp,
+    empty_catalog,
+    insert_video,
+    load_catalog,
+    record_folder,
+    remove_video,
+    write_catalog,
+)
+from media_headers import embedded_cover, image_size
+from media_probe import cached_fields
+from sidecar_io import locked, read_json
+from sprite_cache import sprite_fields
+from thumbnail_cache import small_fields
+
 # ---------------------------
 # Configuration
 # ---------------------------
 
 VIDEO_EXTENSIONS = {".mp4", ".mkv", ".webm"}
 IMG_EXTENSIONS = {".jpg", ".jpeg"}
+THUMBNAIL_DOWNLOAD_EXTENSIONS = {".mp4", ".mkv"}
 VIDEO_ID_REGEX = re.compile(r"\[([A-Za-z0-9_-]{11})\]")
 
 EXCLUDE_FOLDERS = {"1_New_Downloads"}
-CATALOG_JSON_NAME = "catalog.json"
 CATALOG_MD_NAME = "catalog.md"
 FAIL_LOG_NAME = "index_fails.txt"
 
+WATCH_DEBOUNCE_SECONDS = 2.0   # quiet period before catalog.json is rewritten
+WATCH_POLL_SECONDS = 5.0       # directory mtime check interval without inotify
+
 # ---------------------------
 # Helpers
 # ---------------------------
@@ -47,14 +84,6 @@ def normalize_path(path: Path) -> str:
     return path.as_posix()
 
 
-def load_json(path: Path) -> dict | None:
-    try:
-        with path.open("r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return None
-
-
 def pick_thumbnail(candidates: list[Path]) -> Path | None:
     """
     Deterministically choose a thumbnail.
@@ -75,13 +104,53 @@ def pick_thumbnail(candidates: list[Path]) -> Path | None:
     return None
 
 
+def extract_embedded_thumbnail(video_path: Path) -> Path | None:
+    """
+    Write the cover art stored by yt-dlp --embed-thumbnail (MP4 `covr` atom or
+    Matroska attachment) next to the video as <name>.jpg. Only the container
+    headers and the image bytes are read.
+    """
+    cover = embedded_cover(video_path)
+    if not cover:
+        return None
+
+    fmt, data = cover
+    target = video_path.with_suffix(".jpg")
+    tmp = target.with_name(f".{target.name}.tmp")
+
+    if fmt == "jpeg":
+        tmp.write_bytes(data)
+    else:
+        # PNG/WebP cover art: convert, the catalog only uses .jpg sidecars
+        try:
+            subprocess.run(
+                [
+                    "ffmpeg", "-nostdin", "-loglevel", "error", "-y",
+                    "-f", "image2pipe", "-i", "-",
+                    "-f", "image2", "-c:v", "mjpeg",
+                    str(tmp),
+                ],
+                input=data,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                check=True,
+            )
+        except (OSError, subprocess.CalledProcessError) as e:
+            tmp.unlink(missing_ok=True)
+            print(f"[WARN] embedded {fmt} cover of {video_path.name} could not be converted: {e}")
+            return None
+
+    os.replace(tmp, target)
+    return target
+
+
 def resolve_thumbnail(video_dir: Path, video_path: Path, video_id: str) -> str:
     """
     Thumbnail resolution order:
     1. * [<id>].jpg
     2. * [<id>].thumb.jpg
-    3. Download missing thumbnail (mp4 only)
-    4. Download missing thumbnail (mkv only)
+    3. Extract embedded cover art (offline)
+    4. Download missing thumbnail (mp4/mkv only)
     5. Fallback placeholder
     """
     escaped_id = escape(f"[{video_id}]")
@@ -95,36 +164,15 @@ def resolve_thumbnail(video_dir: Path, video_path: Path, video_id: str) -> str:
     jpg2 = next(video_dir.glob(f"* {escaped_id}.thumb.jpg"), None)
     if jpg2:
         return normalize_path(jpg2)
-   
-    # 3. MP4
-    if video_path.suffix.lower() == ".mp4":
-        try:
-            subprocess.run(
-                [
-                    "yt-dlp",
-                    "--skip-download",
-                    "--convert-thumbnails", "jpg",
-                    "--write-thumbnail",
-                    "-P", str(video_dir),
-                    "--", video_id,
-                ],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                check=True,
-            )
 
-            for p in video_dir.iterdir():
-                if escaped_id in p.name and p.suffix.lower == ".jpg":
-                    thumb = p
+    # 3. Embedded cover art
+    embedded = extract_embedded_thumbnail(video_path)
+    if embedded:
+        print(f"[info] Thumbnail extracted from {video_path.name}")
+        return normalize_path(embedded)
 
-            if thumb:
-                return normalize_path(thumb)
-        except Exception as e:
-            print(f"[WARN] ffmpeg thumbnail backfill failed for {video_id}: {e}")
-            pass
-
-    # 4. MKV
-    if video_path.suffix.lower() == ".mkv":
+    # 4. MP4 / MKV without embedded art
+    if video_path.suffix.lower() in THUMBNAIL_DOWNLOAD_EXTENSIONS:
         try:
             subprocess.run(
                 [
@@ -140,16 +188,12 @@ def resolve_thumbnail(video_dir: Path, video_path: Path, video_id: str) -> str:
                 check=True,
             )
 
-            for p in video_dir.iterdir():
-                if escaped_id in p.name and p.suffix.lower == ".jpg":
-                    thumb = p
-
+            thumb = next(video_dir.glob(f"* {escaped_id}.jpg"), None)
             if thumb:
                 return normalize_path(thumb)
 
         except Exception as e:
             print(f"[WARN] yt-dlp thumbnail backfill failed for {video_id}: {e}")
-            pass
 
     return ""  # fallback
 
@@ -157,84 +201,197 @@ def resolve_thumbnail(video_dir: Path, video_path: Path, video_id: str) -> str:
 # Core logic
 # ---------------------------
 
-def main() -> int:
-    script_dir = Path(__file__).resolve().parent
-    repo_root = script_dir.parent
+def scan_video_dir(
+    genre: str, video_dir: Path, repo_root: Path, failures: list[str], root_name: str | None = None
+) -> dict | None:
+    """
+    Build the catalog record for a single <genre>/<video_id> folder.
+    `root_name` is set for roots other than the home archive.
+    Problems are appended to `failures` and None is returned.
+    """
+    video_files = [p for p in video_dir.iterdir() if is_video_file(p)]
+    json_files = [p for p in video_dir.iterdir() if p.suffix == ".json"]
 
-    failures: list[str] = []
+    if not video_files:
+        error = str(video_dir)
+        error = error + " - No video file detected"
+        failures.append(error)
+        return None
+
+    if not json_files:
+        error = str(video_dir.relative_to(repo_root)) + " - No JSON sidecar detected"
+        failures.append(error)
+        return None
+
+    video_path = sorted(video_files)[0]
+    sidecar_path = sorted(json_files)[0]
+
+    try:
+        video_id = extract_video_id(video_path.name)
+    except ValueError:
+        error = str(video_path.name + " - No video id extracted from file path")
+        failures.append(error)
+        return None
+
+    sidecar_data = read_json(sidecar_path)
+    if not sidecar_data:
+        error = str(video_path.name + " - No data loaded from JSON")
+        failures.append(error)
+        return None
+
+    title = sidecar_data.get("title")
+    uploader = sidecar_data.get("uploader") or sidecar_data.get("channel")
+    upload_date = sidecar_data.get("upload_date")
+    duration = sidecar_data.get("duration_seconds")
+    view_count = sidecar_data.get("view_count")
+    description = sidecar_data.get("description")
+    tags = sidecar_data.get("tags")
+    categories = sidecar_data.get("categories")
+
+    if not title:
+        error = str(video_path.name + " - Title missing from JSON")
+        failures.append(error)
+        return None
+
+    if not uploader:
+        error = str(video_path.name + " - Uploader missing from JSON")
+        failures.append(error)
+        return None
+
+    thumbnail = resolve_thumbnail(video_dir, video_path, video_id)
+
+    record = {
+        "id": video_id,
+        "title": title,
+        "uploader": uploader,
+        "upload_date": upload_date,
+        "duration": duration,
+        "view_count": view_count,
+        "description": description,
+        "tags": tags,
+        "categories": categories,
+        "genre": genre,
+        "path": normalize_path(video_path.relative_to(repo_root)),
+        "thumbnail": thumbnail,
+    }
+    if root_name:
+        record["root"] = root_name
+
+    # Header-only read, lets the GUI lay out grids without decoding images
+    size = image_size(thumbnail)
+    if size:
+        record["thumbnail_width"], record["thumbnail_height"] = size
+
+    # Derivatives from thumbnail_cache.py, if generated for this exact source
+    record.update((k, v) for k, v in small_fields(thumbnail).items() if v is not None)
+
+    # Technical fields from media_probe.py, if probed for this exact file
+    record.update((k, v) for k, v in cached_fields(video_id, archive_roots.file_key(record), duration).items() if v is not None)
+
+    # Seek-preview sprites from sprite_cache.py, if generated for this exact file
+    record.update(sprite_fields(video_id, archive_roots.file_key(record)))
+
+    return record
+
+
+def record_label(record: dict) -> str:
+    """<genre>/<folder>, prefixed with "<root>:" for roots other than the home archive."""
+    genre, folder = record_folder(record)
+    return f"{record['root']}:{genre}/{folder}" if record.get("root") else f"{genre}/{folder}"
+
+
+def duplicate_of(videos: dict[str, dict], record: dict) -> str | None:
+    """
+    Folder of another, still existing copy of the record's video, if any.
+    (A record whose old folder is gone was moved, not duplicated.)
+    """
+    previous = videos.get(record["id"])
+    if not previous:
+        return None
+    if (previous.get("root"), record_folder(previous)) == (record.get("root"), record_folder(record)):
+        return None
+
+    try:
+        if not archive_roots.resolve(previous).parent.is_dir():
+            return None
+    except KeyError:
+        return None  # its root is no longer configured
+    return record_label(previous)
+
+
+def duplicate_failure(record: dict, other: str) -> str:
+    return f"{record_label(record)} (also in {other}) - Duplicate video id"
+
+
+def scan_archive(
+    repo_root: Path, failures: list[str], categories: frozenset[str] | None = None, root_name: str | None = None
+) -> dict[str, dict]:
     videos: dict[str, dict] = {}
 
     for genre_dir in sorted(p for p in repo_root.iterdir() if p.is_dir() and p.name not in EXCLUDE_FOLDERS):
         genre = genre_dir.name
+        if categories is not None and genre not in categories:
+            continue
 
         for video_dir in sorted(p for p in genre_dir.iterdir() if p.is_dir()):
-            video_files = [p for p in video_dir.iterdir() if is_video_file(p)]
-            json_files = [p for p in video_dir.iterdir() if p.suffix == ".json"]
-
-            if not video_files:
-                error = str(video_dir)
-                error = error + " - No video file detected"
-                failures.append(error)
+            record = scan_video_dir(genre, video_dir, repo_root, failures, root_name)
+            if not record:
                 continue
 
-            if not json_files:
-                error = str(video_dir.relative_to(repo_root), " - No JSON sidecar detected")
-                failures.append(error)
+            # The first copy (in category order) is kept, see repair_tools/duplicates
+            other = duplicate_of(videos, record)
+            if other:
+                failures.append(duplicate_failure(record, other))
                 continue
 
-            video_path = sorted(video_files)[0]
-            sidecar_path = sorted(json_files)[0]
+            videos[record["id"]] = record
 
-            try:
-                video_id = extract_video_id(video_path.name)
-            except ValueError:
-                error = str(video_path.name + " - No video id extracted from file path")
-                failures.append(error)
-                continue
+    return videos
 
-            sidecar_data = load_json(sidecar_path)
-            if not sidecar_data:
-                error = str(video_path.name + " - No data loaded from JSON")
-                failures.append(error)
-                continue
 
-            title = sidecar_data.get("title")
-            uploader = sidecar_data.get("uploader") or sidecar_data.get("channel")
-            upload_date = sidecar_data.get("upload_date")
-            duration = sidecar_data.get("duration_seconds")
-            view_count = sidecar_data.get("view_count")
-            description = sidecar_data.get("description")
-            tags = sidecar_data.get("tags")
-            categories = sidecar_data.get("categories")
-
-            if not title:
-                error = str(video_path.name + " - Title missing from JSON")
-                failures.append(error)
+def scan_roots(roots: list[archive_roots.ArchiveRoot], failures: list[str]) -> dict[str, dict]:
+    """
+    Scan every root and merge them (config order wins on duplicate IDs).
+    Roots on the same device are scanned one after another, different
+    devices in parallel, so no disk has two scans seeking against each other.
+    """
+    results: dict[str, tuple[dict[str, dict], list[str]]] = {}
+
+    def scan_device(group: list[archive_roots.ArchiveRoot]):
+        for root in group:
+            root_failures: list[str] = []
+            videos = scan_archive(root.path, root_failures, root.categories, None if root.is_home else root.name)
+            results[root.name] = (videos, root_failures)
+
+    groups = archive_roots.by_device(roots)
+    with ThreadPoolExecutor(max_workers=len(groups)) as pool:
+        list(pool.map(scan_device, groups))
+
+    merged: dict[str, dict] = {}
+    for root in roots:
+        videos, root_failures = results[root.name]
+        failures.extend(root_failures)
+        for vid, record in videos.items():
+            other = duplicate_of(merged, record)
+            if other:
+                failures.append(duplicate_failure(record, other))
                 continue
+            merged[vid] = record
+
+        if len(roots) > 1:
+            print(f"[info] {root.name}: {len(videos)} video(s) in {root.path}")
+
+    return merged
 
-            if not uploader:
-                error = str(video_path.name + " - Uploader missing from JSON")
-                failures.append(error)
-                continue
 
-            thumbnail = resolve_thumbnail(video_dir, video_path, video_id)
-
-            videos[video_id] = {
-                "id": video_id,
-                "title": title,
-                "uploader": uploader,
-                "upload_date": upload_date,
-                "duration": duration,
-                "view_count": view_count,
-                "description": description,
-                "tags": tags,
-                "categories": categories,
-                "genre": genre,
-                "path": normalize_path(video_path.relative_to(repo_root)),
-                "thumbnail": thumbnail,
-            }
-
-    fail_log = script_dir / FAIL_LOG_NAME
+def confirm_failures(failures: list[str], fail_log: Path) -> bool:
+    """
+    Ask what to do about failures.
+    Returns False if the user chose to write the fail log and stop.
+    """
+    for item in failures:
+        metrics.emit("index", "failed", reason=item.rsplit(" - ", 1)[-1])
+
     if failures:
         fail_count = len(failures)
         response = input(
@@ -249,33 +406,153 @@ def main() -> int:
                 for item in sorted(failures):
                     f.write(item + "\n")
                 print(f"Failures written to {fail_log}\nExiting...")
-            return 1
+            return False
         elif str(response) != "1":
             print("Invalid input, defaulting to option 1.")
 
     if fail_log.exists():
         fail_log.unlink()
 
-    by_genre = {}
-    by_uploader = {}
+    return True
 
-    for vid, record in videos.items():
-        by_genre.setdefault(record["genre"], []).append(vid)
-        by_uploader.setdefault(record["uploader"], []).append(vid)
 
-    for index in (by_genre, by_uploader):
-        for key in index:
-            index[key].sort()
+# ---------------------------
+# Incremental patching (Step 4 -> Step 5)
+# ---------------------------
 
-    catalog_json = {
-        "generated_at": datetime.utcnow().isoformat() + "Z",
-        "videos": dict(sorted(videos.items())),
-        "by_genre": dict(sorted(by_genre.items())),
-        "by_uploader": dict(sorted(by_uploader.items())),
-    }
+def load_moves(moves_path: Path) -> list[tuple[str, str]]:
+    """
+    Read the move log written by 4_sort.sh.
+    One "<category>\t<video_id folder>" pair per line, duplicates collapsed.
+    """
+    moves = []
+    with moves_path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line or "\t" not in line:
+                continue
+            genre, folder = line.split("\t", 1)
+            if (genre, folder) not in moves:
+                moves.append((genre, folder))
+    return moves
+
+
+def record_in_folder(videos: dict[str, dict], genre: str, folder: str) -> str | None:
+    """
+    Id of the home-archive record stored in <genre>/<folder>, if any.
+    Folders are named after their video id, so that is tried first; only a
+    miss falls back to going over every record.
+    """
+    def in_folder(record: dict | None) -> bool:
+        return bool(record) and not record.get("root") and record_folder(record) == (genre, folder)
+
+    if in_folder(videos.get(folder)):
+        return folder
+    return next((vid for vid, record in videos.items() if in_folder(record)), None)
+
+
+def patch_catalog(script_dir: Path, repo_root: Path, moves_path: Path) -> int:
+    """
+    Insert only the folders listed in the move log into the existing catalog.json.
+    Nothing else in the archive is scanned.
+    """
+    stamp = catalog_stamp(script_dir)
+    catalog = load_catalog(script_dir)
+    if not catalog:
+        print("[WARN] No usable catalog.json to patch, running a full scan instead.")
+        return generate_full(script_dir, repo_root)
+
+    # (genre, folder, record); None when the folder is gone
+    scanned: list[tuple[str, str, dict | None]] = []
+    failures: list[str] = []
+
+    for genre, folder in load_moves(moves_path):
+        video_dir = repo_root / genre / folder
+
+        if not video_dir.is_dir():
+            scanned.append((genre, folder, None))
+            continue
+
+        record = scan_video_dir(genre, video_dir, repo_root, failures)
+        if not record:
+            continue
+
+        other = duplicate_of(catalog["videos"], record)
+        if other:
+            failures.append(duplicate_failure(record, other))
+            continue
 
-    with (script_dir / CATALOG_JSON_NAME).open("w", encoding="utf-8") as f:
-        json.dump(catalog_json, f, indent=2)
+        scanned.append((genre, folder, record))
+
+    if not confirm_failures(failures, script_dir / FAIL_LOG_NAME):
+        return 1
+
+    # Applied under the lock, to a fresh load if the catalog was rewritten
+    # since (e.g. by update_records()), so no concurrent change is lost
+    with locked(script_dir / CATALOG_JSON_NAME):
+        if catalog_stamp(script_dir) != stamp:
+            catalog = load_catalog(script_dir)
+        if catalog:
+            changes: dict[str, dict | None] = {}
+
+            for genre, folder, record in scanned:
+                if record is None:
+                    # Moved again (or deleted) since it was sorted; drop any stale record.
+                    stale = record_in_folder(catalog["videos"], genre, folder)
+                    if stale:
+                        remove_video(catalog, stale, changes)
+                else:
+                    insert_video(catalog, record, changes)
+
+            write_catalog(script_dir, catalog, changes)
+
+    if not catalog:
+        print("[WARN] catalog.json disappeared while patching, running a full scan instead.")
+        return generate_full(script_dir, repo_root)
+
+    moves_path.unlink()
+    patched = sum(1 for _, _, record in scanned if record)
+
+    print(f"[OK] Catalog patched with {patched} video(s) (generation {catalog['generation']}).")
+    return 0
+
+
+def generate_full(script_dir: Path, repo_root: Path) -> int:
+    try:
+        roots = archive_roots.load_roots()
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        return 1
+
+    # A root that is not mounted would silently drop all of its videos
+    missing = [root for root in roots if not root.path.is_dir()]
+    for root in missing:
+        print(f"[ERROR] archive root {root.name} not found: {root.path}")
+    if missing:
+        return 1
+
+    failures: list[str] = []
+    videos = scan_roots(roots, failures)
+
+    if not confirm_failures(failures, script_dir / FAIL_LOG_NAME):
+        return 1
+
+    by_genre, by_uploader = build_indexes(videos)
+
+    with locked(script_dir / CATALOG_JSON_NAME):
+        previous = load_catalog(script_dir) or empty_catalog()
+        changes = {vid: previous["videos"].get(vid) for vid in previous["videos"].keys() | videos.keys()}
+
+        catalog = {
+            "generation": previous["generation"],
+            "summary": previous.get("summary"),  # only compared against for the delta
+            "videos": videos,
+            "by_genre": by_genre,
+            "by_uploader": by_uploader,
+        }
+        if len(roots) > 1:
+            catalog["roots"] = {root.name: str(root.path) for root in roots if not root.is_home}
+        write_catalog(script_dir, catalog, changes, rebuild_summary=True)
 
     # ---------------------------
     # Write catalog.md (deprecated)
@@ -313,9 +590,383 @@ def main() -> int:
 #                    f"  [Watch](../{v['path']})\n\n"
 #                )
 
-    print("[OK] Catalog generated successfully.")
+    print(f"[OK] Catalog generated successfully (generation {catalog['generation']}).")
     return 0
 
+# ---------------------------
+# Watch mode
+# ---------------------------
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+)
+INOTIFY_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+class InotifyWatcher:
+    """
+    Directory watcher on top of the raw inotify syscalls (Linux, via ctypes).
+    poll() returns the changed paths, or None if the kernel queue overflowed.
+    """
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            raise OSError("libc not found")
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self.libc, "inotify_init1"):
+            raise OSError("inotify not available")
+
+        self.fd = self.libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self.paths: dict[int, Path] = {}
+        self.wds: dict[Path, int] = {}
+
+    def add(self, path: Path):
+        if path in self.wds:
+            return
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            print(f"[WARN] Cannot watch {path}: {os.strerror(ctypes.get_errno())}")
+            return
+        self.paths[wd] = path
+        self.wds[path] = wd
+
+    def remove(self, path: Path):
+        wd = self.wds.pop(path, None)
+        if wd is not None:
+            self.paths.pop(wd, None)
+            self.libc.inotify_rm_watch(self.fd, wd)
+
+    def poll(self, timeout: float | None) -> list[Path] | None:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+
+        data = os.read(self.fd, 64 * 1024)
+        changed = []
+        offset = 0
+
+        while offset < len(data):
+            wd, mask, _cookie, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                return None
+
+            path = self.paths.get(wd)
+            if path is None:
+                continue
+
+            if mask & IN_IGNORED:
+                # Watched directory is gone; the kernel already dropped the watch.
+                self.paths.pop(wd, None)
+                self.wds.pop(path, None)
+                continue
+
+            changed.append(path / name if name else path)
+
+        return changed
+
+
+class PollingWatcher:
+    """
+    Fallback watcher: compares directory mtimes every WATCH_POLL_SECONDS and
+    lists only the directories whose mtime moved.
+    """
+
+    def __init__(self):
+        self.dirs: dict[Path, tuple[int, set[str]]] = {}
+
+    def _snapshot(self, path: Path) -> tuple[int, set[str]]:
+        return path.stat().st_mtime_ns, set(os.listdir(path))
+
+    def add(self, path: Path):
+        if path in self.dirs:
+            return
+        try:
+            self.dirs[path] = self._snapshot(path)
+        except OSError as e:
+            print(f"[WARN] Cannot watch {path}: {e}")
+
+    def remove(self, path: Path):
+        self.dirs.pop(path, None)
+
+    def poll(self, timeout: float | None) -> list[Path] | None:
+        time.sleep(WATCH_POLL_SECONDS if timeout is None else min(timeout, WATCH_POLL_SECONDS))
+        changed = []
+
+        for path, (mtime, names) in list(self.dirs.items()):
+            try:
+                if path.stat().st_mtime_ns == mtime:
+                    continue
+                self.dirs[path] = snapshot = self._snapshot(path)
+            except OSError:
+                del self.dirs[path]
+                changed.append(path)
+                continue
+
+            added_or_removed = names ^ snapshot[1]
+            if added_or_removed:
+                changed.extend(path / name for name in added_or_removed)
+            else:
+                # Same names, new mtime: a file was replaced by a rename
+                changed.append(path)
+
+        return changed
+
+
+def make_watcher(force_polling: bool):
+    if not force_polling:
+        try:
+            return InotifyWatcher()
+        except (OSError, AttributeError) as e:
+            print(f"[WARN] inotify unavailable ({e}), falling back to polling.")
+    return PollingWatcher()
+
+
+class CatalogWatch:
+    """
+    In-memory catalog kept in sync with the category folders.
+    Only folders reported as changed are re-scanned.
+    """
+
+    def __init__(self, script_dir: Path, repo_root: Path, watcher):
+        self.script_dir = script_dir
+        self.repo_root = repo_root
+        self.watcher = watcher
+        self.catalog = empty_catalog()
+        self.changes: dict[str, dict | None] = {}
+        self.folders: dict[tuple[str, str], str] = {}
+        self.incomplete: set[tuple[str, str]] = set()
+        self.dirty_folders: set[tuple[str, str]] = set()
+        self.dirty_genres: set[str] = set()
+
+    def load(self):
+        catalog = load_catalog(self.script_dir)
+        if catalog:
+            self.catalog = catalog
+            # Other archive roots are left to full scans
+            self.folders = {record_folder(r): vid for vid, r in catalog["videos"].items() if not r.get("root")}
+
+        self.watcher.add(self.repo_root)
+
+        # Reconcile against the folder listings only; nothing is re-read
+        # unless it was added or removed while nobody was watching.
+        known_genres = {genre for genre, _ in self.folders}
+        for genre_dir in self.genre_dirs():
+            self.watcher.add(genre_dir)
+            known_genres.discard(genre_dir.name)
+            on_disk = {p.name for p in genre_dir.iterdir() if p.is_dir()}
+            in_catalog = {folder for genre, folder in self.folders if genre == genre_dir.name}
+            for folder in on_disk ^ in_catalog:
+                self.dirty_folders.add((genre_dir.name, folder))
+
+        self.dirty_genres.update(known_genres)
+
+    def genre_dirs(self) -> list[Path]:
+        return sorted(
+            p for p in self.repo_root.iterdir()
+            if p.is_dir() and p.name not in EXCLUDE_FOLDERS
+        )
+
+    def mark(self, path: Path):
+        try:
+            parts = path.relative_to(self.repo_root).parts
+        except ValueError:
+            return
+
+        if not parts or parts[0] in EXCLUDE_FOLDERS:
+            return
+
+        if len(parts) == 1:
+            self.dirty_genres.add(parts[0])
+        else:
+            self.dirty_folders.add((parts[0], parts[1]))
+
+    def pending(self) -> bool:
+        return bool(self.dirty_folders or self.dirty_genres)
+
+    def rescan_all(self):
+        self.dirty_genres.update(genre for genre, _ in self.folders)
+        self.dirty_genres.update(p.name for p in self.genre_dirs())
+
+    def apply(self) -> int:
+        """Re-scan dirty folders into the catalog. Returns the number of changed folders."""
+        for genre in self.dirty_genres:
+            genre_dir = self.repo_root / genre
+            self.dirty_folders.update(key for key in self.folders if key[0] == genre)
+            if genre_dir.is_dir():
+                self.watcher.add(genre_dir)
+                self.dirty_folders.update((genre, p.name) for p in genre_dir.iterdir() if p.is_dir())
+            else:
+                self.watcher.remove(genre_dir)
+        self.dirty_genres.clear()
+
+        failures: list[str] = []
+        changed = 0
+
+        for genre, folder in sorted(self.dirty_folders):
+            video_dir = self.repo_root / genre / folder
+            old_vid = self.folders.pop((genre, folder), None)
+            record = None
+
+            if video_dir.is_dir():
+                record = scan_video_dir(genre, video_dir, self.repo_root, failures)
+
+            other = duplicate_of(self.catalog["videos"], record) if record else None
+            if other:
+                failures.append(duplicate_failure(record, other))
+                record = None
+
+            if old_vid and (not record or record["id"] != old_vid):
+                remove_video(self.catalog, old_vid, self.changes)
+                changed += 1
+
+            if record:
+                previous = self.catalog["videos"].get(record["id"])
+                if previous and record_folder(previous) != (genre, folder):
+                    self.folders.pop(record_folder(previous), None)
+                if previous != record:
+                    insert_video(self.catalog, record, self.changes)
+                    changed += 1
+                self.folders[(genre, folder)] = record["id"]
+                self.incomplete.discard((genre, folder))
+                self.watcher.remove(video_dir)
+            elif video_dir.is_dir():
+                # Still being filled (e.g. copied in file by file); watch its contents.
+                self.incomplete.add((genre, folder))
+                self.watcher.add(video_dir)
+            else:
+                self.incomplete.discard((genre, folder))
+                self.watcher.remove(video_dir)
+
+        self.dirty_folders.clear()
+
+        for failure in failures:
+            print(f"[WARN] {failure}")
+
+        return changed
+
+    def rebase(self, on_disk: dict) -> dict[str, dict | None]:
+        """
+        Re-apply the pending changes on top of the catalog as it is on disk
+        now, so records updated by other tools (and the generation) since
+        our last write are kept. Returns the changes relative to `on_disk`.
+        """
+        changes: dict[str, dict | None] = {}
+        for vid in self.changes:
+            record = self.catalog["videos"].get(vid)
+            if record is None:
+                if vid in on_disk["videos"]:
+                    remove_video(on_disk, vid, changes)
+            elif on_disk["videos"].get(vid) != record:
+                insert_video(on_disk, record, changes)
+        self.catalog = on_disk
+        self.folders = {record_folder(r): vid for vid, r in on_disk["videos"].items() if not r.get("root")}
+        return changes
+
+    def flush(self):
+        changed = self.apply()
+        if changed:
+            with locked(self.script_dir / CATALOG_JSON_NAME):
+                on_disk = load_catalog(self.script_dir)
+                changes = self.rebase(on_disk) if on_disk else self.changes
+                write_catalog(self.script_dir, self.catalog, changes)
+            self.changes = {}
+            print(
+                f"[OK] Catalog updated ({changed} change(s), {len(self.catalog['videos'])} videos, "
+                f"generation {self.catalog['generation']})."
+            )
+
+
+def watch_catalog(script_dir: Path, repo_root: Path, force_polling: bool = False) -> int:
+    watcher = make_watcher(force_polling)
+    state = CatalogWatch(script_dir, repo_root, watcher)
+    state.load()
+
+    mode = "inotify" if isinstance(watcher, InotifyWatcher) else "polling"
+    print(f"[OK] Watching {repo_root} ({mode}). Ctrl+C to stop.")
+
+    state.flush()
+    last_event = 0.0
+
+    try:
+        while True:
+            timeout = WATCH_DEBOUNCE_SECONDS if state.pending() else None
+            changed = watcher.poll(timeout)
+
+            if changed is None:
+                print("[WARN] Event queue overflowed, re-scanning all categories.")
+                state.rescan_all()
+                last_event = time.monotonic()
+            elif changed:
+                for path in changed:
+                    state.mark(path)
+                last_event = time.monotonic()
+
+            if state.pending() and time.monotonic() - last_event >= WATCH_DEBOUNCE_SECONDS:
+                state.flush()
+    except KeyboardInterrupt:
+        state.flush()
+        print("\nStopped watching.")
+
+    return 0
+
+
+def main() -> int:
+    script_dir = Path(__file__).resolve().parent
+    repo_root = script_dir.parent
+
+    parser = argparse.ArgumentParser(description="Generate catalog.json for the archive.")
+    parser.add_argument(
+        "--patch", metavar="MOVES_FILE", type=Path,
+        help="only add the folders listed in this move log (written by 4_sort.sh) to the existing catalog",
+    )
+    parser.add_argument(
+        "--watch", action="store_true",
+        help="keep running and update catalog.json whenever video folders change",
+    )
+    parser.add_argument(
+        "--poll", action="store_true",
+        help="with --watch, poll directory mtimes instead of using inotify",
+    )
+    args = parser.parse_args()
+
+    if args.watch:
+        return watch_catalog(script_dir, repo_root, force_polling=args.poll)
+
+    if args.patch:
+        if not args.patch.exists():
+            print(f"[OK] No move log at {args.patch}, catalog left unchanged.")
+            return 0
+        with metrics.timed("catalog", mode="patch") as event:
+            status = patch_catalog(script_dir, repo_root, args.patch)
+            event["outcome"] = "ok" if status == 0 else "aborted"
+        return status
+
+    with metrics.timed("catalog", mode="full") as event:
+        status = generate_full(script_dir, repo_root)
+        event["outcome"] = "ok" if status == 0 else "aborted"
+    return status
+
 
 if __name__ == "__main__":
     sys.exit(main())
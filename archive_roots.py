@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Archive roots: the archive may be spread over several disks.
+
+archive_roots.json (next to this file) lists them, each a yt-dlp/-style
+folder with its own category folders:
+
+    {
+      "roots": [
+        {"name": "main",  "path": ".."},
+        {"name": "disk2", "path": "/mnt/disk2/yt-dlp"},
+        {"name": "disk3", "path": "/mnt/disk3/yt-dlp", "categories": ["Music"]}
+      ]
+    }
+
+Relative paths are relative to this folder; "categories" optionally limits
+which category folders of a root are scanned. The archive this folder
+belongs to is always a root (named "main" if the config doesn't list it).
+Without a config file it is the only one.
+
+Catalog records keep `path` relative to their root. Records of other roots
+carry a `"root": <name>` field; records of the home archive have none, so
+single-disk catalogs are unchanged. `resolve(record)` gives the file.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import NamedTuple
+
+# ---------------------------
+# Configuration
+# ---------------------------
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+REPO_ROOT = SCRIPT_DIR.parent
+CONFIG_PATH = SCRIPT_DIR / "archive_roots.json"
+HOME_ROOT_NAME = "main"
+
+
+class ArchiveRoot(NamedTuple):
+    name: str
+    path: Path
+    categories: frozenset[str] | None  # None: every category folder
+
+    @property
+    def is_home(self) -> bool:
+        return self.path == REPO_ROOT
+
+    def device(self) -> int:
+        return os.stat(self.path).st_dev
+
+# ---------------------------
+# Loading
+# ---------------------------
+
+_roots: list[ArchiveRoot] | None = None
+
+
+def load_roots() -> list[ArchiveRoot]:
+    """Roots in config order, home archive first if it is not listed. Raises ValueError on a bad config."""
+    global _roots
+    if _roots is not None:
+        return _roots
+
+    try:
+        with CONFIG_PATH.open("r", encoding="utf-8") as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        config = {"roots": []}
+    except json.JSONDecodeError as e:
+        raise ValueError(f"{CONFIG_PATH.name}: {e}")
+
+    roots = []
+    for entry in config.get("roots", []):
+        if not isinstance(entry, dict) or not entry.get("name") or not entry.get("path"):
+            raise ValueError(f"{CONFIG_PATH.name}: every root needs a name and a path")
+        categories = entry.get("categories")
+        roots.append(ArchiveRoot(
+            name=entry["name"],
+            path=(SCRIPT_DIR / entry["path"]).resolve(),
+            categories=frozenset(categories) if categories else None,
+        ))
+
+    names = [root.name for root in roots]
+    if len(set(names)) != len(names):
+        raise ValueError(f"{CONFIG_PATH.name}: root names must be unique")
+    if len({root.path for root in roots}) != len(roots):
+        raise ValueError(f"{CONFIG_PATH.name}: a folder is listed as two roots")
+
+    if not any(root.is_home for root in roots):
+        if HOME_ROOT_NAME in names:
+            raise ValueError(f'{CONFIG_PATH.name}: "{HOME_ROOT_NAME}" must be this archive ({REPO_ROOT})')
+        roots.insert(0, ArchiveRoot(HOME_ROOT_NAME, REPO_ROOT, None))
+
+    _roots = roots
+    return roots
+
+
+def by_device(roots: list[ArchiveRoot]) -> list[list[ArchiveRoot]]:
+    """Roots grouped by the device they live on, in config order."""
+    groups: dict[int, list[ArchiveRoot]] = {}
+    for root in roots:
+        groups.setdefault(root.device(), []).append(root)
+    return list(groups.values())
+
+# ---------------------------
+# Folders
+# ---------------------------
+
+def category_dirs(skip: set[str] = frozenset()) -> list[Path]:
+    """
+    Category folders of every root, in config order, limited to each root's
+    "categories". Roots that are not mounted are skipped with a warning.
+    """
+    dirs = []
+    for root in load_roots():
+        if not root.path.is_dir():
+            print(f"[WARN] archive root {root.name} not found, skipped: {root.path}")
+            continue
+        dirs.extend(
+            p for p in sorted(root.path.iterdir())
+            if p.is_dir() and p.name not in skip and (root.categories is None or p.name in root.categories)
+        )
+    return dirs
+
+
+def label(path: Path) -> str:
+    """`path` relative to its root, prefixed with "<root>:" outside the home archive."""
+    for root in sorted(load_roots(), key=lambda r: len(r.path.parts), reverse=True):
+        if path.is_relative_to(root.path):
+            rel = path.relative_to(root.path).as_posix()
+            return rel if root.is_home else f"{root.name}:{rel}"
+    return path.as_posix()
+
+
+def split_label(label: str) -> tuple[str | None, str]:
+    """Inverse of label(): (root name, None for the home archive; path relative to that root)."""
+    name, sep, rel = label.partition(":")
+    if sep and "/" not in name:
+        return name, rel
+    return None, label
+
+
+def path_of(label: str) -> Path:
+    name, rel = split_label(label)
+    return root_path(name) / rel
+
+
+# ---------------------------
+# Records
+# ---------------------------
+
+def root_path(name: str | None) -> Path:
+    if name is None:
+        return REPO_ROOT
+    for root in load_roots():
+        if root.name == name:
+            return root.path
+    raise KeyError(f"unknown archive root {name!r} (not in {CONFIG_PATH.name})")
+
+
+def resolve(record: dict) -> Path:
+    """Absolute path of a catalog record's video file."""
+    return root_path(record.get("root")) / record["path"]
+
+
+def file_key(record: dict) -> str:
+    """
+    The record's path for the caches keyed on REPO_ROOT-relative paths:
+    unchanged for the home archive, absolute for other roots (REPO_ROOT / it
+    is the file either way).
+    """
+    if record.get("root") is None:
+        return record["path"]
+    return resolve(record).as_posix()
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Column-oriented statistics over catalog.json records.
+
+The numeric fields of every record are loaded once into flat arrays
+(NumPy when installed, the stdlib `array` module otherwise) and all
+totals, percentiles, histograms and group-bys are reductions over those
+columns instead of per-record Python loops.
+
+summarize() produces the `summary` block that catalog_io embeds in every
+catalog.json, so quick stats need neither an archive scan nor this module.
+update_summary() keeps that block current for a few changed records
+without going over the whole catalog again.
+"""
+
+import heapq
+from array import array
+from bisect import bisect_right
+
+try:
+    import numpy as np
+except ImportError:  # optional; everything below also works without it
+    np = None
+
+# ---------------------------
+# Configuration
+# ---------------------------
+
+PERCENTILES = (10, 25, 50, 75, 90, 99)
+
+# Histogram bins are [edge[i], edge[i+1]); the last bin is open-ended.
+DURATION_EDGES = (0, 60, 300, 600, 1200, 1800, 3600, 7200)
+VIEWS_EDGES = (0, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+
+MISSING = -1  # stored for absent duration/view_count/year
+
+# ---------------------------
+# Columns
+# ---------------------------
+
+def _int_or_missing(value) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return MISSING
+
+
+def _year(upload_date) -> int:
+    if isinstance(upload_date, str) and upload_date[:4].isdigit():
+        return int(upload_date[:4])
+    return MISSING
+
+
+def _encode(values: list[str]) -> tuple[list[int], list[str]]:
+    """Dictionary-encode strings: codes into a sorted list of distinct names."""
+    names = sorted(set(values))
+    lookup = {name: i for i, name in enumerate(names)}
+    return [lookup[v] for v in values], names
+
+
+def _column(values: list[int]):
+    if np is not None:
+        return np.asarray(values, dtype=np.int64)
+    return array("q", values)
+
+
+def load_columns(videos: dict[str, dict]) -> dict:
+    """
+    One pass over the records; everything after this works on columns.
+    Keys: ids, titles, duration, views, year, genre/genre_names,
+    uploader/uploader_names.
+    """
+    records = list(videos.values())
+    genre_codes, genre_names = _encode([str(r.get("genre", "UNKNOWN")) for r in records])
+    uploader_codes, uploader_names = _encode([str(r.get("uploader", "UNKNOWN")) for r in records])
+
+    return {
+        "ids": [r.get("id") for r in records],
+        "titles": [r.get("title", "UNKNOWN") for r in records],
+        "duration": _column([_int_or_missing(r.get("duration")) for r in records]),
+        "views": _column([_int_or_missing(r.get("view_count")) for r in records]),
+        "year": _column([_year(r.get("upload_date")) for r in records]),
+        "genre": _column(genre_codes),
+        "genre_names": genre_names,
+        "uploader": _column(uploader_codes),
+        "uploader_names": uploader_names,
+    }
+
+# ---------------------------
+# Reductions
+# ---------------------------
+
+def present(values):
+    """Values that are not MISSING."""
+    if np is not None:
+        return values[values != MISSING]
+    return array("q", (v for v in values if v != MISSING))
+
+
+def total(values) -> int:
+    return int(present(values).sum()) if np is not None else sum(present(values))
+
+
+def percentiles(values, qs=PERCENTILES) -> dict[str, float]:
+    """Linear-interpolated percentiles of the present values, {"p50": ...}."""
+    data = present(values)
+    if len(data) == 0:
+        return {}
+
+    if np is not None:
+        points = np.percentile(data, qs)
+    else:
+        data = sorted(data)
+        points = []
+        for q in qs:
+            pos = (len(data) - 1) * q / 100
+            lo = int(pos)
+            hi = min(lo + 1, len(data) - 1)
+            points.append(data[lo] + (data[hi] - data[lo]) * (pos - lo))
+
+    return {f"p{q}": round(float(p), 1) for q, p in zip(qs, points)}
+
+
+def histogram(values, edges) -> list[int]:
+    """Counts per bin; values below edges[0] are ignored, the last bin is open."""
+    data = present(values)
+
+    if np is not None:
+        bins = np.searchsorted(np.asarray(edges), data, side="right") - 1
+        return np.bincount(bins[bins >= 0], minlength=len(edges)).tolist()
+
+    counts = [0] * len(edges)
+    for v in data:
+        b = bisect_right(edges, v) - 1
+        if b >= 0:
+            counts[b] += 1
+    return counts
+
+
+def group_by(codes, names: list[str], duration, views) -> dict[str, dict]:
+    """Per-group count / total duration / total views (missing values count as 0)."""
+    n = len(names)
+
+    if np is not None:
+        count = np.bincount(codes, minlength=n)
+        dur = np.bincount(codes, weights=np.where(duration == MISSING, 0, duration), minlength=n)
+        view = np.bincount(codes, weights=np.where(views == MISSING, 0, views), minlength=n)
+    else:
+        count, dur, view = [0] * n, [0] * n, [0] * n
+        for c, d, v in zip(codes, duration, views):
+            count[c] += 1
+            dur[c] += d if d != MISSING else 0
+            view[c] += v if v != MISSING else 0
+
+    return {
+        names[i]: {"count": int(count[i]), "duration": int(dur[i]), "views": int(view[i])}
+        for i in range(n)
+    }
+
+
+def group_by_year(cols: dict) -> dict[str, dict]:
+    years = cols["year"]
+    if np is not None:
+        distinct, codes = np.unique(years, return_inverse=True)
+        names = [str(y) if y != MISSING else "unknown" for y in distinct.tolist()]
+    else:
+        distinct = sorted(set(years))
+        lookup = {y: i for i, y in enumerate(distinct)}
+        codes = [lookup[y] for y in years]
+        names = [str(y) if y != MISSING else "unknown" for y in distinct]
+    return group_by(codes, names, cols["duration"], cols["views"])
+
+
+def top_n(values, n: int, largest: bool = True) -> list[int]:
+    """
+    Row indices of the n largest (or smallest) present values, best first.
+    Ties go to the lower row index in both backends (heapq is stable too).
+    """
+    if np is not None:
+        idx = np.flatnonzero(values != MISSING)
+        kept = values[idx]
+        order = np.argsort(-kept if largest else kept, kind="stable")
+        return idx[order[:n]].tolist()
+
+    rows = [i for i, v in enumerate(values) if v != MISSING]
+    pick = heapq.nlargest if largest else heapq.nsmallest
+    return pick(n, rows, key=lambda i: values[i])
+
+# ---------------------------
+# Catalog summary
+# ---------------------------
+
+def summarize(videos: dict[str, dict]) -> dict:
+    cols = load_columns(videos)
+
+    return {
+        "videos": len(cols["ids"]),
+        "total_duration": total(cols["duration"]),
+        "total_views": total(cols["views"]),
+        "duration_percentiles": percentiles(cols["duration"]),
+        "views_percentiles": percentiles(cols["views"]),
+        "duration_histogram": {"edges": list(DURATION_EDGES), "counts": histogram(cols["duration"], DURATION_EDGES)},
+        "views_histogram": {"edges": list(VIEWS_EDGES), "counts": histogram(cols["views"], VIEWS_EDGES)},
+        "by_genre": group_by(cols["genre"], cols["genre_names"], cols["duration"], cols["views"]),
+        "by_year": group_by_year(cols),
+    }
+
+
+def _histogram_bin(value: int, edges) -> int | None:
+    if value == MISSING:
+        return None
+    b = bisect_right(edges, value) - 1
+    return b if b >= 0 else None
+
+
+def _add_record(summary: dict, record: dict, sign: int):
+    """Add (sign=1) or subtract (sign=-1) one record's share of the totals, histograms and groups."""
+    duration = _int_or_missing(record.get("duration"))
+    views = _int_or_missing(record.get("view_count"))
+    year = _year(record.get("upload_date"))
+
+    summary["videos"] += sign
+    summary["total_duration"] += sign * duration if duration != MISSING else 0
+    summary["total_views"] += sign * views if views != MISSING else 0
+
+    for key, value, edges in (("duration_histogram", duration, DURATION_EDGES), ("views_histogram", views, VIEWS_EDGES)):
+        b = _histogram_bin(value, edges)
+        if b is not None:
+            summary[key]["counts"][b] += sign
+
+    for key, name in (
+        ("by_genre", str(record.get("genre", "UNKNOWN"))),
+        ("by_year", str(year) if year != MISSING else "unknown"),
+    ):
+        group = summary[key].setdefault(name, {"count": 0, "duration": 0, "views": 0})
+        group["count"] += sign
+        group["duration"] += sign * duration if duration != MISSING else 0
+        group["views"] += sign * views if views != MISSING else 0
+
+
+def _usable(summary: dict | None) -> bool:
+    return bool(summary) and all(
+        key in summary for key in (
+            "videos", "total_duration", "total_views", "duration_percentiles", "views_percentiles",
+            "duration_histogram", "views_histogram", "by_genre", "by_year",
+        )
+    ) and summary["duration_histogram"].get("edges") == list(DURATION_EDGES) \
+        and summary["views_histogram"].get("edges") == list(VIEWS_EDGES)
+
+
+def update_summary(summary: dict | None, changes: dict[str, dict | None], videos: dict[str, dict]) -> dict:
+    """
+    The summary of `videos`, derived from `summary` (the summary before
+    `changes`: id -> record before the change, None if it was added).
+    Totals, histograms and groups are adjusted per changed record;
+    percentiles are recomputed only for a column that changed. Falls back
+    to summarize() without a usable previous summary or when most records
+    changed.
+    """
+    if not _usable(summary) or len(changes) * 4 > len(videos):
+        return summarize(videos)
+
+    summary = {
+        **summary,
+        "duration_histogram": {"edges": list(DURATION_EDGES), "counts": list(summary["duration_histogram"]["counts"])},
+        "views_histogram": {"edges": list(VIEWS_EDGES), "counts": list(summary["views_histogram"]["counts"])},
+        "by_genre": {name: dict(group) for name, group in summary["by_genre"].items()},
+        "by_year": {name: dict(group) for name, group in summary["by_year"].items()},
+    }
+    duration_changed = views_changed = False
+
+    for vid, old in changes.items():
+        new = videos.get(vid)
+        if old == new:
+            continue
+        if old is not None:
+            _add_record(summary, old, -1)
+        if new is not None:
+            _add_record(summary, new, 1)
+
+        old, new = old or {}, new or {}
+        duration_changed |= _int_or_missing(old.get("duration")) != _int_or_missing(new.get("duration"))
+        views_changed |= _int_or_missing(old.get("view_count")) != _int_or_missing(new.get("view_count"))
+
+    for key in ("by_genre", "by_year"):
+        groups = {name: group for name, group in summary[key].items() if group["count"] > 0}
+        # Same order as summarize(): genres by name, years by value with "unknown" (MISSING) first
+        if key == "by_year":
+            order = sorted(groups, key=lambda name: int(name) if name != "unknown" else MISSING)
+        else:
+            order = sorted(groups)
+        summary[key] = {name: groups[name] for name in order}
+
+    if duration_changed:
+        summary["duration_percentiles"] = percentiles(_column([_int_or_missing(r.get("duration")) for r in videos.values()]))
+    if views_changed:
+        summary["views_percentiles"] = percentiles(_column([_int_or_missing(r.get("view_count")) for r in videos.values()]))
+
+    return summary
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Shared catalog.json reading/writing for the pipeline and repair tools.
+
+Every write embeds a precomputed `summary` block (see archive_stats.py),
+updated from the changed records only, so a small write stays small.
+
+Every write that changes any record bumps the catalog's `generation` and
+emits catalog.delta.<generation>.json next to it, so consumers that are a
+few generations behind can apply small patches instead of reloading the
+whole catalog.
+
+Writes are atomic and fsynced (sidecar_io.py); update_records holds the
+catalog folder's lock from load to write, so tools patching the catalog at
+the same time never drop each other's changes.
+
+Delta layout:
+    {
+      "generation": <n>,
+      "base_generation": <n - 1>,
+      "generated_at": "...Z",
+      "added":   {<id>: <record>},
+      "changed": {<id>: <record>},
+      "removed": [<id>, ...],
+      "summary": {...},  # only the summary fields that changed, each replaces the consumer's
+      "index_changes": {
+        "by_genre":    {<genre>:    {"added": [<id>], "removed": [<id>]}},
+        "by_uploader": {<uploader>: {"added": [<id>], "removed": [<id>]}}
+      }
+    }
+"""
+
+import json
+from bisect import bisect_left
+from datetime import datetime
+from pathlib import Path
+
+from archive_stats import summarize, update_summary
+from sidecar_io import locked, write_json_atomic  # noqa: F401 (re-exported for the caches)
+
+# ---------------------------
+# Configuration
+# ---------------------------
+
+CATALOG_JSON_NAME = "catalog.json"
+DELTA_NAME_FORMAT = "catalog.delta.{}.json"
+DELTA_KEEP = 50  # number of most recent delta files kept on disk
+
+INDEX_FIELDS = {"by_genre": "genre", "by_uploader": "uploader"}
+
+# ---------------------------
+# Loading
+# ---------------------------
+
+def load_catalog(catalog_dir: Path) -> dict | None:
+    """Load catalog.json, or None if it is missing or unreadable."""
+    try:
+        with (catalog_dir / CATALOG_JSON_NAME).open("r", encoding="utf-8") as f:
+            catalog = json.load(f)
+    except Exception:
+        return None
+
+    if not isinstance(catalog, dict) or not isinstance(catalog.get("videos"), dict):
+        return None
+
+    catalog.setdefault("generation", 0)
+    catalog.setdefault("by_genre", {})
+    catalog.setdefault("by_uploader", {})
+    return catalog
+
+
+def catalog_stamp(catalog_dir: Path) -> tuple | None:
+    """
+    Identity of the current catalog.json, to tell whether a loaded copy is
+    still current. Every write replaces the file, so the inode changes too.
+    """
+    try:
+        st = (catalog_dir / CATALOG_JSON_NAME).stat()
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def empty_catalog() -> dict:
+    return {"generation": 0, "videos": {}, "by_genre": {}, "by_uploader": {}}
+
+# ---------------------------
+# Index maintenance
+# ---------------------------
+
+def record_folder(record: dict) -> tuple[str, str]:
+    """<genre>, <video_id folder> of a catalog record, taken from its path."""
+    parts = record["path"].split("/")
+    return parts[0], parts[1]
+
+
+def build_indexes(videos: dict[str, dict]) -> tuple[dict, dict]:
+    by_genre = {}
+    by_uploader = {}
+
+    for vid, record in videos.items():
+        by_genre.setdefault(record["genre"], []).append(vid)
+        by_uploader.setdefault(record["uploader"], []).append(vid)
+
+    for index in (by_genre, by_uploader):
+        for key in index:
+            index[key].sort()
+
+    return by_genre, by_uploader
+
+
+def index_remove(index: dict, key: str, vid: str):
+    ids = index.get(key)
+    if not ids:
+        return
+    pos = bisect_left(ids, vid)
+    if pos < len(ids) and ids[pos] == vid:
+        del ids[pos]
+    if not ids:
+        del index[key]
+
+
+def index_insert(index: dict, key: str, vid: str):
+    ids = index.setdefault(key, [])
+    pos = bisect_left(ids, vid)
+    if pos == len(ids) or ids[pos] != vid:
+        ids.insert(pos, vid)
+
+
+def remove_video(catalog: dict, vid: str, changes: dict | None = None):
+    """
+    Drop a record and its index entries.
+    `changes` collects the pre-change record of every touched id for the delta.
+    """
+    record = catalog["videos"].pop(vid, None)
+    if record:
+        if changes is not None:
+            changes.setdefault(vid, record)
+        index_remove(catalog["by_genre"], record["genre"], vid)
+        index_remove(catalog["by_uploader"], record["uploader"], vid)
+
+
+def insert_video(catalog: dict, record: dict, changes: dict | None = None):
+    vid = record["id"]
+    if changes is not None:
+        changes.setdefault(vid, catalog["videos"].get(vid))
+    remove_video(catalog, vid)
+    catalog["videos"][vid] = record
+    index_insert(catalog["by_genre"], record["genre"], vid)
+    index_insert(catalog["by_uploader"], record["uploader"], vid)
+
+# ---------------------------
+# Deltas
+# ---------------------------
+
+def compute_delta(changes: dict[str, dict | None], videos: dict[str, dict]) -> dict:
+    """
+    Compare the pre-change records in `changes` against the current `videos`.
+    Only the ids present in `changes` are looked at.
+    """
+    added = {}
+    changed = {}
+    removed = []
+    index_changes = {name: {} for name in INDEX_FIELDS}
+
+    for vid in sorted(changes):
+        old = changes[vid]
+        new = videos.get(vid)
+
+        if old == new:
+            continue
+        if old is None:
+            added[vid] = new
+        elif new is None:
+            removed.append(vid)
+        else:
+            changed[vid] = new
+
+        for name, field in INDEX_FIELDS.items():
+            old_key = old[field] if old else None
+            new_key = new[field] if new else None
+            if old_key == new_key:
+                continue
+            if old_key is not None:
+                index_changes[name].setdefault(old_key, {"added": [], "removed": []})["removed"].append(vid)
+            if new_key is not None:
+                index_changes[name].setdefault(new_key, {"added": [], "removed": []})["added"].append(vid)
+
+    return {
+        "added": added,
+        "changed": changed,
+        "removed": removed,
+        "index_changes": {name: dict(sorted(keys.items())) for name, keys in index_changes.items()},
+    }
+
+
+def delta_is_empty(delta: dict) -> bool:
+    return not (delta["added"] or delta["changed"] or delta["removed"])
+
+
+def prune_deltas(catalog_dir: Path, generation: int):
+    for path in catalog_dir.glob(DELTA_NAME_FORMAT.format("*")):
+        try:
+            n = int(path.name.split(".")[2])
+        except (IndexError, ValueError):
+            continue
+        if n <= generation - DELTA_KEEP:
+            path.unlink(missing_ok=True)
+
+# ---------------------------
+# Writing
+# ---------------------------
+
+def sorted_by_key(mapping: dict) -> dict:
+    """`mapping` ordered by key; returned as is when it already is (a loaded catalog mostly is)."""
+    keys = list(mapping)
+    if all(a < b for a, b in zip(keys, keys[1:])):
+        return mapping
+    return {key: mapping[key] for key in sorted(keys)}
+
+
+def write_catalog(
+    catalog_dir: Path, catalog: dict, changes: dict[str, dict | None], rebuild_summary: bool = False
+) -> dict:
+    """
+    Write catalog.json. If any record differs from `changes`, the generation
+    is bumped and the matching delta file is written first, so a consumer that
+    sees generation N can always find catalog.delta.N.json.
+    catalog["summary"] (as loaded) is updated from `changes` unless
+    `rebuild_summary`. Returns the delta (empty lists/dicts when nothing changed).
+    """
+    now = datetime.utcnow().isoformat() + "Z"
+    generation = catalog.get("generation", 0)
+    previous_summary = catalog.get("summary") or {}
+    if rebuild_summary:
+        summary = summarize(catalog["videos"])
+    else:
+        summary = update_summary(previous_summary, changes, catalog["videos"])
+    delta = compute_delta(changes, catalog["videos"])
+
+    if not delta_is_empty(delta):
+        generation += 1
+        delta = {
+            "generation": generation,
+            "base_generation": generation - 1,
+            "generated_at": now,
+            **delta,
+            "summary": {k: v for k, v in summary.items() if previous_summary.get(k) != v},
+        }
+        write_json_atomic(catalog_dir / DELTA_NAME_FORMAT.format(generation), delta, indent=None)
+        prune_deltas(catalog_dir, generation)
+
+    catalog["generation"] = generation
+    catalog["summary"] = summary
+    catalog_json = {
+        "generated_at": now,
+        "generation": generation,
+        "summary": summary,
+        "videos": sorted_by_key(catalog["videos"]),
+        "by_genre": sorted_by_key(catalog["by_genre"]),
+        "by_uploader": sorted_by_key(catalog["by_uploader"]),
+    }
+    if catalog.get("roots"):
+        catalog_json["roots"] = catalog["roots"]  # archive root name -> folder (archive_roots.py)
+
+    # Compact, like the other large JSON files: indenting disables the C encoder
+    write_json_atomic(catalog_dir / CATALOG_JSON_NAME, catalog_json, indent=None)
+    return delta
+
+
+def update_records(catalog_dir: Path, updates: dict[str, dict]) -> int:
+    """
+    Merge extra fields into existing records of catalog.json and write it
+    back (with a delta) if anything changed. Unknown ids are ignored; a
+    field set to None is removed. Returns the number of records changed.
+    """
+    with locked(catalog_dir / CATALOG_JSON_NAME):
+        catalog = load_catalog(catalog_dir)
+        if not catalog:
+            return 0
+
+        changes = {}
+        for vid, fields in updates.items():
+            record = catalog["videos"].get(vid)
+            if record is None:
+                continue
+            new = {**record, **fields}
+            new = {k: v for k, v in new.items() if not (k in fields and v is None)}
+            if new != record:
+                changes[vid] = record
+                catalog["videos"][vid] = new
+
+        if changes:
+            write_catalog(catalog_dir, catalog, changes)
+        return len(changes)
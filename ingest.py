@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Bulk ingest of channels and playlists (Step 0 for whole sources).
+
+Each source is listed with a single `yt-dlp --flat-playlist` call (no
+per-video requests), the listed IDs are diffed in memory against every ID
+the archive already has, and only the missing ones are appended to
+list.txt as plain watch URLs for Step 1 / pipeline.py. Those download steps
+read the ID straight from such URLs, so a channel where 1,990 of 2,000
+videos are archived costs one listing request plus 10 downloads.
+
+Known IDs come from catalog.json, the <category>/<video_id> folders,
+manifest.txt, 1_New_Downloads and list.txt itself, so rerunning the same
+sync never queues a video twice. Videos in permanent_failures.txt are
+never queued.
+
+Sources are given on the command line or, one per line, in sources.txt.
+
+Usage:
+    python3 ingest.py https://www.youtube.com/@channel/videos
+    python3 ingest.py "https://www.youtube.com/playlist?list=PL..." --dry-run
+    python3 ingest.py                       # every source in sources.txt
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import archive_roots
+import metrics
+import ytdlp_errors
+from catalog_io import load_catalog
+
+# ---------------------------
+# Configuration
+# ---------------------------
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+REPO_ROOT = SCRIPT_DIR.parent
+
+URL_FILE = SCRIPT_DIR / "list.txt"
+SOURCES_FILE = SCRIPT_DIR / "sources.txt"
+MANIFEST_FILE = SCRIPT_DIR / "manifest.txt"
+
+EXCLUDE_FOLDERS = {"1_New_Downloads", "1 New Downloads"}
+LISTING_WORKERS = 4
+LISTING_TIMEOUT_SECONDS = 600
+
+VIDEO_ID_REGEX = re.compile(r"\[([A-Za-z0-9_-]{11})\]")
+BARE_ID_REGEX = re.compile(r"^[A-Za-z0-9_-]{11}$")
+WATCH_URL_REGEX = re.compile(r"[?&]v=([A-Za-z0-9_-]{11})")
+WATCH_URL_FORMAT = "https://www.youtube.com/watch?v={}"
+
+# ---------------------------
+# Known IDs
+# ---------------------------
+
+def read_lines(path: Path) -> list[str]:
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    except FileNotFoundError:
+        return []
+
+
+def known_ids() -> set[str]:
+    ids = set()
+
+    catalog = load_catalog(SCRIPT_DIR)
+    if catalog:
+        ids.update(catalog["videos"])
+
+    # Folder names are video IDs; this also covers videos the catalog misses.
+    # Every archive root counts, or videos stored on another disk are fetched again.
+    for category_dir in archive_roots.category_dirs(EXCLUDE_FOLDERS):
+        ids.update(p.name for p in category_dir.iterdir() if BARE_ID_REGEX.match(p.name))
+    ids.update(p.name for p in SCRIPT_DIR.iterdir() if p.is_dir() and BARE_ID_REGEX.match(p.name))
+
+    for line in read_lines(MANIFEST_FILE):
+        match = VIDEO_ID_REGEX.search(line)
+        if match:
+            ids.add(match.group(1))
+
+    for url in read_lines(URL_FILE):
+        match = WATCH_URL_REGEX.search(url)
+        if match:
+            ids.add(match.group(1))
+
+    # Private/removed videos are never queued again
+    ids.update(ytdlp_errors.load_permanent())
+
+    return ids
+
+# ---------------------------
+# Listing
+# ---------------------------
+
+def list_source(source: str) -> tuple[list[str] | None, str, float]:
+    """(video IDs in listing order or None, error, seconds) from one flat listing."""
+    started = time.monotonic()
+    try:
+        result = subprocess.run(
+            ["yt-dlp", "--flat-playlist", "--print", "id", "--", source],
+            capture_output=True,
+            text=True,
+            timeout=LISTING_TIMEOUT_SECONDS,
+        )
+    except subprocess.TimeoutExpired:
+        return None, "listing timed out", time.monotonic() - started
+
+    seconds = time.monotonic() - started
+    ids = [line.strip() for line in result.stdout.splitlines() if BARE_ID_REGEX.match(line.strip())]
+    if result.returncode != 0 and not ids:
+        lines = result.stderr.strip().splitlines()
+        return None, lines[-1] if lines else f"exit code {result.returncode}", seconds
+    return ids, "", seconds
+
+
+def queue_urls(video_ids: list[str]):
+    text = URL_FILE.read_text(encoding="utf-8") if URL_FILE.exists() else ""
+    with URL_FILE.open("a", encoding="utf-8") as f:
+        if text and not text.endswith("\n"):
+            f.write("\n")
+        f.writelines(WATCH_URL_FORMAT.format(vid) + "\n" for vid in video_ids)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Queue the unarchived videos of channels/playlists.")
+    parser.add_argument("sources", nargs="*", help=f"channel or playlist URLs (default: {SOURCES_FILE.name})")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be queued")
+    args = parser.parse_args()
+
+    sources = args.sources or read_lines(SOURCES_FILE)
+    if not sources:
+        print(f"[ERROR] No sources given and {SOURCES_FILE.name} is empty or missing.")
+        return 1
+
+    try:
+        with ThreadPoolExecutor(max_workers=LISTING_WORKERS) as pool:
+            listings = list(pool.map(list_source, sources))
+    except FileNotFoundError:
+        print("[ERROR] yt-dlp not found.")
+        return 1
+
+    try:
+        known = known_ids()
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        return 1
+    print(f"[info] {len(known)} video ID(s) already in the archive or queued.")
+
+    queued: list[str] = []
+    failed = 0
+    for source, (ids, error, seconds) in zip(sources, listings):
+        if ids is None:
+            failed += 1
+            print(f"[WARN] could not list {source}: {error}")
+            metrics.emit("ingest", "failed", seconds=seconds, reason="listing-error", source=source)
+            continue
+
+        new = []
+        for vid in ids:
+            if vid not in known:
+                known.add(vid)  # the same video in two sources is queued once
+                new.append(vid)
+        queued.extend(new)
+
+        print(f"[OK] {source}: {len(ids)} listed, {len(ids) - len(new)} already archived, {len(new)} new")
+        metrics.emit("ingest", "ok", seconds=seconds, source=source, listed=len(ids), new=len(new))
+
+    if args.dry_run:
+        for vid in queued:
+            print(f"[dry-run] {WATCH_URL_FORMAT.format(vid)}")
+        print(f"[dry-run] {len(queued)} video(s) would be added to {URL_FILE.name}")
+    elif queued:
+        queue_urls(queued)
+        print(f"[OK] {len(queued)} video(s) added to {URL_FILE.name}. "
+              "Run ./1_download_multiple.sh or python3 pipeline.py to download them.")
+    else:
+        print("[OK] Nothing new to download.")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,593 @@
+#!/usr/bin/env python3
+"""
+Offline stand-ins for yt-dlp, ffmpeg and ffprobe, for load testing.
+
+Put load_testing/bin first on PATH and every script of the pipeline runs
+against them instead of the network:
+
+    export PATH="$PWD/load_testing/bin:$PATH"
+    FAKE_LATENCY=lognormal:0.5,0.8 FAKE_429_RATE=0.05 ./1_download_multiple.sh
+
+Answers come from a fixture directory (FAKE_FIXTURES, default
+load_testing/fixtures, see make_fixtures.py):
+
+    <fixtures>/<video_id>/info.json   # served by -j (missing keys are filled in)
+    <fixtures>/<video_id>/thumb.jpg   # --write-thumbnail
+    <fixtures>/<video_id>/en.vtt      # --write-subs / --write-auto-subs
+    <fixtures>/<video_id>/video.mp4   # downloads
+    <fixtures>/playlists.json         # {"<channel/playlist URL>": [<video_id>, ...]}
+
+Anything missing is synthesized from the video id, so every 11-character id
+works without fixtures. Synthesized videos are small MP4s with real `moov`
+metadata (duration, title, artist, date, cover), so media_headers.py,
+Step 5 and the repair tools see plausible files.
+
+Behaviour is set through environment variables:
+
+    FAKE_SEED               base seed (default 0)
+    FAKE_LATENCY            per call: fixed:S | uniform:A,B | exp:MEAN | lognormal:MU,SIGMA
+    FAKE_DOWNLOAD_LATENCY   for downloads (default: FAKE_LATENCY)
+    FAKE_FFMPEG_LATENCY     for ffmpeg/ffprobe (default: fixed:0)
+    FAKE_ERROR_RATE         transient "Unable to download webpage" errors
+    FAKE_429_RATE           "HTTP Error 429: Too Many Requests"
+    FAKE_RATE_LIMIT         requests/second (all processes) above which every call gets 429
+    FAKE_AGE_GATE_RATE      share of ids that need cookies ("Sign in to confirm your age")
+    FAKE_UNAVAILABLE_RATE   share of ids that are gone for good ("Video unavailable")
+    FAKE_FFMPEG_ERROR_RATE  ffmpeg failures
+    FAKE_MEDIA_BYTES        size of synthesized videos (default 65536)
+    FAKE_PLAYLIST_SIZE      entries of a synthesized --flat-playlist listing (default 50)
+    FAKE_STATE              attempt counters and calls.jsonl (default load_testing/state)
+
+Per-id properties (age gate, unavailable) depend only on the seed and the
+id. Transient failures depend on the seed, the id and the attempt number, so
+a retry can succeed, and a run makes the same choices whatever the thread
+scheduling. Every call is appended to <state>/calls.jsonl (tool, kind, id,
+attempt, outcome, latency) for analysis.
+"""
+
+import fcntl
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import shutil
+import struct
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+TOOLS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(TOOLS_DIR))
+
+from media_headers import container_format, embedded_tags, image_format  # noqa: E402
+
+# ---------------------------
+# Configuration
+# ---------------------------
+
+BASE_DIR = Path(__file__).resolve().parent
+FIXTURES_DIR = Path(os.environ.get("FAKE_FIXTURES", BASE_DIR / "fixtures"))
+STATE_DIR = Path(os.environ.get("FAKE_STATE", BASE_DIR / "state"))
+
+SEED = os.environ.get("FAKE_SEED", "0")
+VERSION = "2099.01.01-fake"
+
+VIDEO_ID_REGEX = re.compile(r"^[A-Za-z0-9_-]{11}$")
+URL_ID_REGEXES = (
+    re.compile(r"[?&]v=([A-Za-z0-9_-]{11})"),
+    re.compile(r"youtu\.be/([A-Za-z0-9_-]{11})"),
+    re.compile(r"/(?:shorts|embed|live)/([A-Za-z0-9_-]{11})"),
+)
+
+# yt-dlp / ffmpeg options that take a value (the value is not a URL/input)
+YTDLP_VALUE_OPTIONS = {
+    "-t", "-P", "--paths", "-o", "--output", "--cookies", "--cookies-from-browser",
+    "--convert-thumbnails", "--sub-langs", "--sub-format", "--remote-components",
+    "--js-runtimes", "--print", "-f", "--format", "--merge-output-format",
+}
+
+AGE_GATE_MESSAGE = (
+    "ERROR: [youtube] {id}: Sign in to confirm your age. This video may be inappropriate "
+    "for some users. Use --cookies-from-browser or --cookies for the authentication. "
+    "See  https://github.com/yt-dlp/yt-dlp/wiki/FAQ#how-do-i-pass-cookies-to-yt-dlp  "
+    "for how to manually pass cookies"
+)
+UNAVAILABLE_MESSAGE = "ERROR: [youtube] {id}: Video unavailable. This video has been removed by the uploader"
+TOO_MANY_REQUESTS_MESSAGE = "ERROR: [youtube] {id}: Unable to download webpage: HTTP Error 429: Too Many Requests"
+TRANSIENT_MESSAGE = (
+    "ERROR: [youtube] {id}: Unable to download webpage: "
+    "<urlopen error [Errno 104] Connection reset by peer> (caused by URLError)"
+)
+
+# ---------------------------
+# Randomness and latency
+# ---------------------------
+
+def rng_for(*parts) -> random.Random:
+    """A generator that depends only on the seed and `parts`."""
+    digest = hashlib.sha256(":".join(map(str, (SEED, *parts))).encode()).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def env_rate(name: str) -> float:
+    try:
+        return min(1.0, max(0.0, float(os.environ.get(name, "0"))))
+    except ValueError:
+        return 0.0
+
+
+def sample_latency(spec: str, rng: random.Random) -> float:
+    """fixed:S | uniform:A,B | exp:MEAN | lognormal:MU,SIGMA (seconds)"""
+    kind, _, params = spec.partition(":")
+    try:
+        values = [float(v) for v in params.split(",") if v]
+        if kind == "fixed":
+            return values[0]
+        if kind == "uniform":
+            return rng.uniform(values[0], values[1])
+        if kind == "exp":
+            return rng.expovariate(1.0 / values[0]) if values[0] > 0 else 0.0
+        if kind == "lognormal":
+            return rng.lognormvariate(values[0], values[1])
+    except (IndexError, ValueError):
+        pass
+    raise SystemExit(f"[fake] bad latency spec {spec!r}")
+
+# ---------------------------
+# Shared state (attempt counters, rate limit, call log)
+# ---------------------------
+
+@contextmanager
+def locked_state():
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    with (STATE_DIR / "state.lock").open("a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        path = STATE_DIR / "state.json"
+        try:
+            state = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            state = {"attempts": {}, "recent": []}
+        yield state
+        tmp = path.with_name(".state.json.tmp")
+        tmp.write_text(json.dumps(state), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+def begin_call(key: str) -> tuple[int, bool]:
+    """Returns (attempt number of `key`, whether the global rate limit is exceeded)."""
+    limit = float(os.environ.get("FAKE_RATE_LIMIT", "0") or 0)
+    now = time.time()
+
+    with locked_state() as state:
+        attempt = state["attempts"].get(key, 0) + 1
+        state["attempts"][key] = attempt
+
+        state["recent"] = [t for t in state["recent"] if now - t < 1.0]
+        limited = limit > 0 and len(state["recent"]) >= limit
+        state["recent"].append(now)
+
+    return attempt, limited
+
+
+def log_call(tool: str, kind: str, video_id: str | None, attempt: int, outcome: str, latency: float):
+    event = {
+        "at": round(time.time(), 3), "tool": tool, "kind": kind, "id": video_id,
+        "attempt": attempt, "outcome": outcome, "latency": round(latency, 3), "pid": os.getpid(),
+    }
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    fd = os.open(STATE_DIR / "calls.jsonl", os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, (json.dumps(event) + "\n").encode())
+    finally:
+        os.close(fd)
+
+# ---------------------------
+# Synthesized media
+# ---------------------------
+
+def synth_jpeg(width: int, height: int, fill: bytes = b"\x00") -> bytes:
+    """Smallest JPEG-shaped file media_headers accepts (SOI, APP0, SOF0, SOS, EOI)."""
+    app0 = b"\xff\xe0\x00\x10JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00"
+    sof0 = b"\xff\xc0\x00\x11\x08" + struct.pack(">HH", height, width) + b"\x03\x01\x22\x00\x02\x11\x01\x03\x11\x01"
+    sos = b"\xff\xda\x00\x02"
+    return b"\xff\xd8" + app0 + sof0 + sos + fill * 64 + b"\xff\xd9"
+
+
+def _atom(kind: str, payload: bytes) -> bytes:
+    return struct.pack(">I", 8 + len(payload)) + kind.encode("latin-1") + payload
+
+
+def _ilst_item(kind: str, code: int, payload: bytes) -> bytes:
+    return _atom(kind, _atom("data", struct.pack(">II", code, 0) + payload))
+
+
+def synth_mp4(info: dict, cover: bytes | None, size: int) -> bytes:
+    """ftyp + moov (mvhd duration, ilst tags, cover) + mdat padding: a faststart MP4."""
+    mvhd = b"\0" * 12 + struct.pack(">II", 1000, int(info["duration"] * 1000)) + b"\0" * 80
+
+    items = b""
+    for kind, key in (("\xa9nam", "title"), ("\xa9ART", "uploader"), ("\xa9day", "upload_date"), ("desc", "description")):
+        if info.get(key):
+            items += _ilst_item(kind, 1, str(info[key]).encode("utf-8"))
+    if cover:
+        items += _ilst_item("covr", 13, cover)
+
+    hdlr = _atom("hdlr", b"\0" * 8 + b"mdirappl" + b"\0" * 9)
+    meta = _atom("meta", b"\0\0\0\0" + hdlr + _atom("ilst", items))
+    moov = _atom("moov", _atom("mvhd", mvhd) + _atom("udta", meta))
+    ftyp = _atom("ftyp", b"isom\0\0\2\0isomiso2mp41")
+
+    head = ftyp + moov
+    return head + _atom("mdat", b"\0" * max(0, size - len(head) - 8))
+
+
+def synth_vtt(info: dict) -> str:
+    lines = ["WEBVTT", "Kind: captions", "Language: en", ""]
+    for i in range(min(20, int(info["duration"]) // 5)):
+        lines += [f"00:{i * 5 // 60:02d}:{i * 5 % 60:02d}.000 --> 00:{(i * 5 + 4) // 60:02d}:{(i * 5 + 4) % 60:02d}.000",
+                  f"Caption {i + 1} of {info['title']}", ""]
+    return "\n".join(lines)
+
+
+def video_info(video_id: str) -> dict:
+    """Canned -j output: fixture info.json over deterministic defaults."""
+    rng = rng_for("info", video_id)
+    channel = rng.randrange(50)
+    info = {
+        "id": video_id,
+        "title": f"Fake video {video_id}",
+        "uploader": f"Fake Channel {channel}",
+        "uploader_id": f"@fakechannel{channel}",
+        "channel": f"Fake Channel {channel}",
+        "channel_url": f"https://www.youtube.com/@fakechannel{channel}",
+        "upload_date": f"{rng.randint(2008, 2025)}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}",
+        "duration": rng.randint(30, 3600),
+        "view_count": int(rng.lognormvariate(9, 2)),
+        "description": f"Synthesized description of {video_id}.",
+        "tags": ["fake", f"tag{rng.randrange(10)}"],
+        "categories": [rng.choice(["Music", "Gaming", "Science & Technology", "Education"])],
+        "language": "en",
+        "webpage_url": f"https://www.youtube.com/watch?v={video_id}",
+        "ext": "mp4",
+        "extractor": "youtube",
+        "extractor_version": VERSION,
+    }
+
+    try:
+        info.update(json.loads((FIXTURES_DIR / video_id / "info.json").read_text(encoding="utf-8")))
+    except (OSError, json.JSONDecodeError):
+        pass
+    return info
+
+
+def fixture_bytes(video_id: str, name: str) -> bytes | None:
+    try:
+        return (FIXTURES_DIR / video_id / name).read_bytes()
+    except OSError:
+        return None
+
+
+def output_name(info: dict, ext: str) -> str:
+    """yt-dlp's default template, "%(title)s [%(id)s].%(ext)s"."""
+    title = re.sub(r'[\\/:*?"<>|]', "_", str(info["title"])).strip()
+    return f"{title} [{info['id']}].{ext}"
+
+
+def write_atomic(path: Path, data: bytes):
+    tmp = path.with_name(path.name + ".part")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+# ---------------------------
+# yt-dlp
+# ---------------------------
+
+def parse_ytdlp_args(argv: list[str]) -> tuple[set[str], dict[str, str], list[str]]:
+    """(flags, options with values, positional URLs)"""
+    flags, options, urls = set(), {}, []
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg == "--":
+            urls.extend(argv[i + 1:])
+            break
+        if arg in YTDLP_VALUE_OPTIONS and i + 1 < len(argv):
+            options[arg] = argv[i + 1]
+            i += 2
+            continue
+        if arg.startswith("-"):
+            flags.add(arg)
+        else:
+            urls.append(arg)
+        i += 1
+    return flags, options, urls
+
+
+def extract_id(url: str) -> str | None:
+    if VIDEO_ID_REGEX.match(url):
+        return url
+    for regex in URL_ID_REGEXES:
+        match = regex.search(url)
+        if match:
+            return match.group(1)
+    return None
+
+
+def playlist_ids(url: str) -> list[str]:
+    """Fixture listing of a channel/playlist, or a deterministic synthesized one."""
+    try:
+        listings = json.loads((FIXTURES_DIR / "playlists.json").read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        listings = {}
+    if url in listings:
+        return listings[url]
+
+    rng = rng_for("playlist", url)
+    alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+    size = int(os.environ.get("FAKE_PLAYLIST_SIZE", "50"))
+    return ["".join(rng.choice(alphabet) for _ in range(11)) for _ in range(size)]
+
+
+def ytdlp_kind(flags: set[str]) -> str:
+    if "--flat-playlist" in flags:
+        return "listing"
+    if "--get-id" in flags:
+        return "resolve"
+    if "-j" in flags or "--dump-json" in flags:
+        return "metadata"
+    if "--skip-download" in flags:
+        return "thumbnail" if "--write-thumbnail" in flags else "subtitles"
+    return "download"
+
+
+def ytdlp_failure(video_id: str, kind: str, attempt: int, limited: bool, has_cookies: bool) -> tuple[str, str] | None:
+    """(outcome, stderr message) of an injected failure, or None."""
+    if limited:
+        return "rate-limited", TOO_MANY_REQUESTS_MESSAGE
+    if rng_for("unavailable", video_id).random() < env_rate("FAKE_UNAVAILABLE_RATE"):
+        return "unavailable", UNAVAILABLE_MESSAGE
+    if not has_cookies and rng_for("age", video_id).random() < env_rate("FAKE_AGE_GATE_RATE"):
+        return "age-gated", AGE_GATE_MESSAGE
+
+    rng = rng_for("transient", video_id, kind, attempt)
+    if rng.random() < env_rate("FAKE_429_RATE"):
+        return "http-429", TOO_MANY_REQUESTS_MESSAGE
+    if rng.random() < env_rate("FAKE_ERROR_RATE"):
+        return "transient", TRANSIENT_MESSAGE
+    return None
+
+
+def ytdlp_write_files(info: dict, kind: str, flags: set[str], options: dict[str, str]):
+    out_dir = Path(options.get("-P") or options.get("--paths") or ".")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    video_id = info["id"]
+
+    thumb = fixture_bytes(video_id, "thumb.jpg") or synth_jpeg(320, 180, video_id[:1].encode())
+
+    if "--write-thumbnail" in flags:
+        write_atomic(out_dir / output_name(info, "jpg"), thumb)
+
+    if flags & {"--write-subs", "--write-auto-subs"}:
+        vtt = fixture_bytes(video_id, "en.vtt") or synth_vtt(info).encode("utf-8")
+        write_atomic(out_dir / output_name(info, "en.vtt"), vtt)
+
+    if kind == "download":
+        media = fixture_bytes(video_id, "video.mp4")
+        if media is None:
+            size = int(os.environ.get("FAKE_MEDIA_BYTES", "65536"))
+            media = synth_mp4(info, thumb if "--embed-thumbnail" in flags else None, size)
+        write_atomic(out_dir / output_name(info, "mp4"), media)
+
+
+def run_ytdlp(argv: list[str]) -> int:
+    flags, options, urls = parse_ytdlp_args(argv)
+
+    if "--version" in flags:
+        print(VERSION)
+        return 0
+    if not urls:
+        print("ERROR: You must provide at least one URL.", file=sys.stderr)
+        return 2
+
+    kind = ytdlp_kind(flags)
+    has_cookies = "--cookies" in options or "--cookies-from-browser" in options
+    status = 0
+
+    for url in urls:
+        if kind == "listing":
+            status = max(status, run_listing(url, flags, options, has_cookies))
+            continue
+
+        video_id = extract_id(url)
+        if video_id is None:
+            print(f"ERROR: Unsupported URL: {url}", file=sys.stderr)
+            log_call("yt-dlp", kind, None, 0, "unsupported-url", 0.0)
+            status = 1
+            continue
+
+        attempt, limited = begin_call(f"{kind}:{video_id}")
+        spec = os.environ.get("FAKE_LATENCY", "fixed:0")
+        if kind == "download":
+            spec = os.environ.get("FAKE_DOWNLOAD_LATENCY", spec)
+        latency = sample_latency(spec, rng_for("latency", video_id, kind, attempt))
+        time.sleep(latency)
+
+        failure = ytdlp_failure(video_id, kind, attempt, limited, has_cookies)
+        if failure:
+            outcome, message = failure
+            print(message.format(id=video_id), file=sys.stderr)
+            log_call("yt-dlp", kind, video_id, attempt, outcome, latency)
+            status = 1
+            continue
+
+        info = video_info(video_id)
+        if kind == "resolve":
+            print(video_id)
+        elif kind == "metadata":
+            print(json.dumps(info, ensure_ascii=False))
+        else:
+            ytdlp_write_files(info, kind, flags, options)
+        log_call("yt-dlp", kind, video_id, attempt, "ok", latency)
+
+    return status
+
+def run_listing(url: str, flags: set[str], options: dict[str, str], has_cookies: bool) -> int:
+    """--flat-playlist: one request for the whole channel/playlist."""
+    attempt, limited = begin_call(f"listing:{url}")
+    latency = sample_latency(os.environ.get("FAKE_LATENCY", "fixed:0"), rng_for("latency", url, "listing", attempt))
+    time.sleep(latency)
+
+    failure = ytdlp_failure(url, "listing", attempt, limited, has_cookies=True)
+    if failure:
+        outcome, message = failure
+        print(message.format(id=url), file=sys.stderr)
+        log_call("yt-dlp", "listing", url, attempt, outcome, latency)
+        return 1
+
+    for video_id in playlist_ids(url):
+        if options.get("--print") == "id":
+            print(video_id)
+        else:
+            print(json.dumps({"_type": "url", "ie_key": "Youtube", "id": video_id,
+                              "url": f"https://www.youtube.com/watch?v={video_id}",
+                              "title": video_info(video_id)["title"]}))
+    log_call("yt-dlp", "listing", url, attempt, "ok", latency)
+    return 0
+
+# ---------------------------
+# ffmpeg / ffprobe
+# ---------------------------
+
+def ffmpeg_delay(kind: str, key: str) -> float:
+    # ffmpeg is local: its calls do not count towards FAKE_RATE_LIMIT
+    latency = sample_latency(os.environ.get("FAKE_FFMPEG_LATENCY", "fixed:0"), rng_for("ffmpeg", kind, key))
+    time.sleep(latency)
+    return latency
+
+
+def faststart_copy(source: Path, target: Path):
+    """Stream copy with +faststart: top-level atoms reordered, moov before mdat."""
+    data = source.read_bytes()
+    atoms, pos = [], 0
+    while pos + 8 <= len(data):
+        size = struct.unpack(">I", data[pos:pos + 4])[0]
+        if size == 1:
+            size = struct.unpack(">Q", data[pos + 8:pos + 16])[0]
+        elif size == 0:
+            size = len(data) - pos
+        atoms.append(data[pos:pos + size])
+        pos += size
+    order = {b"ftyp": 0, b"moov": 1}
+    atoms.sort(key=lambda a: order.get(a[4:8], 2))
+    target.write_bytes(b"".join(atoms))
+
+
+def _filter_numbers(filters: str, pattern: str, default: tuple) -> tuple:
+    match = re.search(pattern, filters)
+    return tuple(float(g) for g in match.groups()) if match else default
+
+
+def run_ffmpeg(argv: list[str]) -> int:
+    inputs = [argv[i + 1] for i, a in enumerate(argv[:-1]) if a == "-i"]
+    if not inputs or len(argv) < 2:
+        print("ffmpeg: at least one input and one output are needed", file=sys.stderr)
+        return 1
+    source, target = inputs[0], Path(argv[-1])
+    filters = next((argv[i + 1] for i, a in enumerate(argv[:-1]) if a in ("-vf", "-filter:v")), "")
+
+    latency = ffmpeg_delay("ffmpeg", source)
+    if rng_for("ffmpeg-error", source, target.name).random() < env_rate("FAKE_FFMPEG_ERROR_RATE"):
+        print(f"{source}: Invalid data found when processing input", file=sys.stderr)
+        log_call("ffmpeg", "convert", None, 0, "error", latency)
+        return 1
+
+    data = sys.stdin.buffer.read() if source == "-" else None
+    head = data[:64] if data is not None else b""
+    if source != "-":
+        with open(source, "rb") as f:
+            head = f.read(64)
+        if container_format(head) is None and image_format(head) is None:
+            print(f"{source}: Invalid data found when processing input", file=sys.stderr)
+            log_call("ffmpeg", "convert", None, 0, "invalid-input", latency)
+            return 1
+
+    if "%" in target.name:
+        # Sprite sheets: fps=1/N,scale=W:-2,tile=CxR
+        (interval,) = _filter_numbers(filters, r"fps=1/([\d.]+)", (10.0,))
+        (width,) = _filter_numbers(filters, r"scale='?(?:min\()?(\d+)", (160.0,))
+        cols, rows = _filter_numbers(filters, r"tile=(\d+)x(\d+)", (1.0, 1.0))
+        duration = embedded_tags(Path(source)).get("duration") or interval
+        sheets = max(1, math.ceil(duration / interval / (cols * rows)))
+        sheet = synth_jpeg(int(width * cols), int(width * 9 // 16 * rows))
+        for n in range(1, sheets + 1):
+            (target.parent / (target.name % n)).write_bytes(sheet)
+        kind = "sprites"
+    elif target.suffix.lower() in (".jpg", ".jpeg", ".png") or "image2" in argv:
+        (width,) = _filter_numbers(filters, r"scale='?(?:min\()?(\d+)", (320.0,))
+        target.write_bytes(synth_jpeg(int(width), int(width * 9 // 16)))
+        kind = "image"
+    elif "+faststart" in argv and container_format(head) == "mp4":
+        faststart_copy(Path(source), target)
+        kind = "remux"
+    else:
+        if data is not None:
+            target.write_bytes(data)
+        else:
+            shutil.copyfile(source, target)
+        kind = "copy"
+
+    log_call("ffmpeg", kind, None, 0, "ok", latency)
+    return 0
+
+
+def run_ffprobe(argv: list[str]) -> int:
+    path = Path(argv[-1]) if argv else None
+    if path is None or not path.is_file():
+        print(f"{path}: No such file or directory", file=sys.stderr)
+        return 1
+
+    latency = ffmpeg_delay("ffprobe", str(path))
+    with path.open("rb") as f:
+        fmt = container_format(f.read(64))
+    duration = embedded_tags(path).get("duration") if fmt else None
+    if not duration:
+        message = "moov atom not found" if fmt == "mp4" else "Invalid data found when processing input"
+        print(f"{path}: {message}", file=sys.stderr)
+        log_call("ffprobe", "probe", None, 0, "invalid-input", latency)
+        return 1
+
+    size = path.stat().st_size
+    codecs = ("h264", "aac") if fmt == "mp4" else ("vp9", "opus")
+    print(json.dumps({
+        "streams": [
+            {"codec_type": "video", "codec_name": codecs[0], "width": 1280, "height": 720,
+             "avg_frame_rate": "30/1", "disposition": {"attached_pic": 0}},
+            {"codec_type": "audio", "codec_name": codecs[1]},
+        ],
+        "format": {
+            "format_name": "mov,mp4,m4a,3gp,3g2,mj2" if fmt == "mp4" else "matroska,webm",
+            "duration": f"{duration:.6f}",
+            "size": str(size),
+            "bit_rate": str(int(size * 8 / duration)),
+        },
+    }))
+    log_call("ffprobe", "probe", None, 0, "ok", latency)
+    return 0
+
+
+TOOLS = {"yt-dlp": run_ytdlp, "ffmpeg": run_ffmpeg, "ffprobe": run_ffprobe}
+
+
+def main(tool: str) -> int:
+    return TOOLS[tool](sys.argv[1:])
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in TOOLS:
+        print(f"Usage: fake_tools.py {{{','.join(TOOLS)}}} [args...]  (or run load_testing/bin/<tool>)")
+        sys.exit(2)
+    tool = sys.argv.pop(1)
+    sys.exit(main(tool))
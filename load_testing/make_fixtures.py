@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Fixtures for the fake yt-dlp in fake_tools.py.
+
+snapshot: copy the archive's sidecars (as -j style info.json), thumbnails
+          and English subtitles into the fixture directory, so fake runs
+          serve real titles, durations and image sizes. Media files are
+          only copied with --media.
+urls:     print N deterministic watch URLs, e.g. for a load-test list.txt.
+
+Usage:
+    python3 make_fixtures.py snapshot [--media]
+    python3 make_fixtures.py urls 500 > ../list.txt
+"""
+
+import argparse
+import json
+import random
+import shutil
+import string
+import sys
+from pathlib import Path
+
+from fake_tools import FIXTURES_DIR
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+SKIP_DIRS = {"1_New_Downloads", "1 New Downloads"}
+VIDEO_EXTENSIONS = {".mp4", ".mkv", ".webm"}
+ID_ALPHABET = string.ascii_letters + string.digits + "-_"
+
+# Sidecar keys that differ from yt-dlp's -j output
+SIDECAR_TO_INFO = {"duration_seconds": "duration"}
+SIDECAR_ONLY = {"original_filename", "extracted_by", "view_count_date", "year"}
+
+
+def snapshot_one(sidecar: Path, media: bool) -> bool:
+    try:
+        with sidecar.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception:
+        return False
+
+    video_id = data.get("id")
+    if not video_id:
+        return False
+
+    info = {SIDECAR_TO_INFO.get(k, k): v for k, v in data.items() if k not in SIDECAR_ONLY}
+    out_dir = FIXTURES_DIR / video_id
+    out_dir.mkdir(parents=True, exist_ok=True)
+    (out_dir / "info.json").write_text(json.dumps(info, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    video_dir = sidecar.parent
+    thumb = next(video_dir.glob("*.jpg"), None)
+    if thumb:
+        shutil.copyfile(thumb, out_dir / "thumb.jpg")
+    vtt = next(video_dir.glob("*.en*.vtt"), None)
+    if vtt:
+        shutil.copyfile(vtt, out_dir / "en.vtt")
+    if media:
+        video = next((p for p in sorted(video_dir.iterdir()) if p.suffix.lower() == ".mp4"), None)
+        if video:
+            shutil.copyfile(video, out_dir / "video.mp4")
+    return True
+
+
+def cmd_snapshot(args) -> int:
+    count = 0
+    for category_dir in sorted(ROOT.iterdir()):
+        if not category_dir.is_dir() or category_dir.name in SKIP_DIRS:
+            continue
+        for sidecar in sorted(category_dir.glob("*/*.json")):
+            count += snapshot_one(sidecar, args.media)
+
+    print(f"[OK] {count} video(s) copied to {FIXTURES_DIR}")
+    return 0
+
+
+def cmd_urls(args) -> int:
+    rng = random.Random(args.seed)
+    for _ in range(args.count):
+        video_id = "".join(rng.choice(ID_ALPHABET) for _ in range(11))
+        print(f"https://www.youtube.com/watch?v={video_id}")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Build fixtures for the fake yt-dlp.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_snapshot = sub.add_parser("snapshot", help="copy archive metadata into the fixture directory")
+    p_snapshot.add_argument("--media", action="store_true", help="also copy the MP4 files")
+
+    p_urls = sub.add_parser("urls", help="print deterministic watch URLs")
+    p_urls.add_argument("count", type=int)
+    p_urls.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+    if args.command == "snapshot":
+        return cmd_snapshot(args)
+    return cmd_urls(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,648 @@
+#!/usr/bin/env python3
+"""
+Header-only parsing of the media files in the archive.
+
+Nothing here decodes pixels or reads whole files: only the few bytes that
+carry the information asked for are read, so these helpers are cheap enough
+to run over the entire archive.
+
+Images:
+    image_info(path) -> ImageInfo(format, width, height)
+    Supports JPEG (SOFn marker), PNG (IHDR) and WebP (VP8 / VP8L / VP8X).
+    Raises ValueError for unrecognised, corrupt or truncated files.
+
+Containers:
+    MP4 atoms and Matroska (EBML) elements are walked by seeking from one
+    header to the next, so the media data between them is never read.
+    embedded_cover(path) -> (format, bytes) of the cover art that
+    yt-dlp --embed-thumbnail stored in the `covr` atom or as a Matroska
+    attachment, or None.
+    embedded_tags(path) -> title/artist/date/description/... written by
+    yt-dlp --embed-metadata, plus the container duration.
+    is_faststart(path) -> whether an MP4's `moov` precedes its `mdat`.
+"""
+
+import struct
+from pathlib import Path
+from typing import NamedTuple
+
+# ---------------------------
+# Configuration
+# ---------------------------
+
+HEADER_BYTES = 4096  # first read; enough for PNG/WebP and most JPEG headers
+
+IMAGE_SUFFIXES = {
+    "jpeg": {".jpg", ".jpeg"},
+    "png": {".png"},
+    "webp": {".webp"},
+}
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_IEND = b"\x00\x00\x00\x00IEND\xaeB`\x82"
+
+# SOF0..SOF15 carry the frame size; C4 (DHT), C8 (JPG) and CC (DAC) do not
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+JPEG_STANDALONE_MARKERS = set(range(0xD0, 0xD8)) | {0x01}
+JPEG_SOS = 0xDA
+JPEG_EOI = b"\xff\xd9"
+JPEG_TAIL_BYTES = 64  # EOI may be followed by a little padding
+
+# ---------------------------
+# Images
+# ---------------------------
+
+class ImageInfo(NamedTuple):
+    format: str  # "jpeg", "png" or "webp"
+    width: int
+    height: int
+
+
+def image_format(head: bytes) -> str | None:
+    """Format from the file signature alone, regardless of the file's suffix."""
+    if head[:3] == b"\xff\xd8\xff":
+        return "jpeg"
+    if head[:8] == PNG_SIGNATURE:
+        return "png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def suffix_matches(path: Path, fmt: str) -> bool:
+    return path.suffix.lower() in IMAGE_SUFFIXES.get(fmt, ())
+
+
+def _jpeg_size(f, size: int) -> tuple[int, int]:
+    """Walk the marker segments up to the first SOFn, seeking over payloads."""
+    pos = 2
+    while pos + 4 <= size:
+        f.seek(pos)
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            raise ValueError(f"bad JPEG marker at offset {pos}")
+        if marker[1] == 0xFF:  # fill byte
+            pos += 1
+            continue
+
+        code = marker[1]
+        if code in JPEG_STANDALONE_MARKERS:
+            pos += 2
+            continue
+        if code == JPEG_SOS or code == 0xD9:
+            raise ValueError("JPEG has no frame header before scan data")
+
+        raw = f.read(2)
+        if len(raw) < 2:
+            break
+        (length,) = struct.unpack(">H", raw)
+        if length < 2:
+            raise ValueError(f"bad JPEG segment length at offset {pos}")
+
+        if code in JPEG_SOF_MARKERS:
+            sof = f.read(5)
+            if len(sof) < 5:
+                break
+            height, width = struct.unpack(">HH", sof[1:5])
+            if not width or not height:
+                raise ValueError("JPEG frame header has zero size")
+            return width, height
+
+        pos += 2 + length
+
+    raise ValueError("JPEG truncated before frame header")
+
+
+def _png_size(head: bytes) -> tuple[int, int]:
+    if len(head) < 24 or head[12:16] != b"IHDR":
+        raise ValueError("PNG has no IHDR chunk")
+    width, height = struct.unpack(">II", head[16:24])
+    if not width or not height:
+        raise ValueError("PNG header has zero size")
+    return width, height
+
+
+def _webp_size(head: bytes) -> tuple[int, int]:
+    chunk = head[12:16]
+
+    if chunk == b"VP8 " and len(head) >= 30:
+        if head[23:26] != b"\x9d\x01\x2a":
+            raise ValueError("bad VP8 frame tag")
+        width, height = struct.unpack("<HH", head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+
+    if chunk == b"VP8L" and len(head) >= 25:
+        if head[20] != 0x2F:
+            raise ValueError("bad VP8L signature")
+        bits = int.from_bytes(head[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+
+    if chunk == b"VP8X" and len(head) >= 30:
+        width = int.from_bytes(head[24:27], "little") + 1
+        height = int.from_bytes(head[27:30], "little") + 1
+        return width, height
+
+    raise ValueError(f"unsupported WebP chunk {chunk!r}")
+
+
+def image_info(path: Path) -> ImageInfo:
+    """
+    Format and pixel size of an image, read from its header.
+    The end of the file is checked as well, so truncated downloads are caught.
+    """
+    with open(path, "rb") as f:
+        f.seek(0, 2)
+        size = f.tell()
+        if size == 0:
+            raise ValueError("empty file")
+
+        f.seek(0)
+        head = f.read(HEADER_BYTES)
+        fmt = image_format(head)
+
+        if fmt == "jpeg":
+            width, height = _jpeg_size(f, size)
+            f.seek(max(0, size - JPEG_TAIL_BYTES))
+            if JPEG_EOI not in f.read():
+                raise ValueError("JPEG truncated (no end-of-image marker)")
+
+        elif fmt == "png":
+            width, height = _png_size(head)
+            f.seek(max(0, size - len(PNG_IEND)))
+            if f.read() != PNG_IEND:
+                raise ValueError("PNG truncated (no IEND chunk)")
+
+        elif fmt == "webp":
+            width, height = _webp_size(head)
+            (riff_size,) = struct.unpack("<I", head[4:8])
+            if riff_size + 8 > size:
+                raise ValueError("WebP truncated (RIFF size exceeds file)")
+
+        else:
+            raise ValueError("not a JPEG, PNG or WebP image")
+
+    return ImageInfo(fmt, width, height)
+
+
+def image_size(path: str | Path) -> tuple[int, int] | None:
+    """(width, height), or None when the image is missing or unreadable."""
+    if not path:
+        return None
+    try:
+        info = image_info(Path(path))
+    except (OSError, ValueError):
+        return None
+    return info.width, info.height
+
+# ---------------------------
+# MP4 atoms
+# ---------------------------
+
+# ilst items written by yt-dlp --embed-metadata (via ffmpeg), by tag name
+MP4_TAG_NAMES = {
+    "\xa9nam": "title",
+    "\xa9ART": "artist",
+    "\xa9day": "date",
+    "desc": "description",
+    "ldes": "synopsis",
+    "\xa9cmt": "comment",
+    "\xa9gen": "genre",
+}
+MP4_DATA_UTF8 = 1
+MP4_TAG_MAX_BYTES = 1 << 20  # a description longer than this is not metadata
+
+class Atom(NamedTuple):
+    type: str
+    offset: int
+    header_size: int
+    size: int
+
+    @property
+    def data_offset(self) -> int:
+        return self.offset + self.header_size
+
+    @property
+    def end(self) -> int:
+        return self.offset + self.size
+
+
+def iter_atoms(f, start: int, end: int):
+    """Atoms between `start` and `end`, one 8 or 16 byte header read per atom."""
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        size, kind = struct.unpack(">I4s", header)
+        header_size = 8
+
+        if size == 1:  # 64-bit size follows the type
+            ext = f.read(8)
+            if len(ext) < 8:
+                return
+            (size,) = struct.unpack(">Q", ext)
+            header_size = 16
+        elif size == 0:  # extends to the end of the enclosing space
+            size = end - pos
+
+        if size < header_size:
+            raise ValueError(f"bad MP4 atom size at offset {pos}")
+
+        yield Atom(kind.decode("latin-1"), pos, header_size, size)
+        pos += size
+
+
+def _atom_children_start(f, atom: Atom) -> int:
+    start = atom.data_offset
+    if atom.type == "meta":
+        # ISO `meta` is a full box (4 bytes version/flags); QuickTime's is not
+        f.seek(start + 4)
+        if f.read(4) != b"hdlr":
+            start += 4
+    return start
+
+
+def find_atom(f, path: list[str], start: int, end: int) -> Atom | None:
+    """Follow a path such as ["moov", "udta", "meta", "ilst"] down the atom tree."""
+    atom = None
+    for kind in path:
+        atom = next((a for a in iter_atoms(f, start, end) if a.type == kind), None)
+        if atom is None:
+            return None
+        start, end = _atom_children_start(f, atom), atom.end
+    return atom
+
+
+def mp4_item_data(f, item: Atom) -> list[tuple[int, int, int]]:
+    """(type code, offset, length) of every `data` atom in an ilst item."""
+    values = []
+    for data in iter_atoms(f, item.data_offset, item.end):
+        if data.type != "data" or data.size < data.header_size + 8:
+            continue
+        f.seek(data.data_offset)
+        (code,) = struct.unpack(">I", f.read(4))
+        values.append((code & 0xFFFFFF, data.data_offset + 8, data.size - data.header_size - 8))
+    return values
+
+
+def _mp4_duration(f, moov: Atom) -> float | None:
+    mvhd = next((a for a in iter_atoms(f, moov.data_offset, moov.end) if a.type == "mvhd"), None)
+    if mvhd is None:
+        return None
+    f.seek(mvhd.data_offset)
+    body = f.read(32)
+    if body[:1] == b"\x01":
+        timescale, duration = struct.unpack(">IQ", body[20:32])
+    else:
+        timescale, duration = struct.unpack(">II", body[12:20])
+    return duration / timescale if timescale else None
+
+
+def _mp4_tags(f, size: int) -> dict:
+    tags = {}
+    moov = find_atom(f, ["moov"], 0, size)
+    if moov is None:
+        return tags
+
+    duration = _mp4_duration(f, moov)
+    if duration:
+        tags["duration"] = duration
+
+    ilst = find_atom(f, ["udta", "meta", "ilst"], moov.data_offset, moov.end)
+    if ilst is None:
+        return tags
+
+    for item in iter_atoms(f, ilst.data_offset, ilst.end):
+        name = MP4_TAG_NAMES.get(item.type)
+        if name is None:
+            continue
+        for code, offset, length in mp4_item_data(f, item):
+            if code == MP4_DATA_UTF8 and length <= MP4_TAG_MAX_BYTES:
+                f.seek(offset)
+                tags.setdefault(name, f.read(length).decode("utf-8", errors="replace"))
+                break
+
+    return tags
+
+
+def _mp4_cover(f, size: int) -> tuple[str, bytes] | None:
+    ilst = find_atom(f, ["moov", "udta", "meta", "ilst"], 0, size)
+    if ilst is None:
+        return None
+
+    covr = next((a for a in iter_atoms(f, ilst.data_offset, ilst.end) if a.type == "covr"), None)
+    if covr is None:
+        return None
+
+    for _code, offset, length in mp4_item_data(f, covr):
+        f.seek(offset)
+        data = f.read(length)
+        fmt = image_format(data[:12])
+        if fmt:
+            return fmt, data
+    return None
+
+# ---------------------------
+# Matroska (EBML) elements
+# ---------------------------
+
+# SimpleTag names (lower-cased) kept from global Matroska tags
+EMBEDDED_TAG_NAMES = {"title", "artist", "date", "description", "synopsis", "comment", "purl", "genre"}
+
+EBML_HEADER = 0x1A45DFA3
+MKV_SEGMENT = 0x18538067
+MKV_SEEKHEAD = 0x114D9B74
+MKV_SEEK = 0x4DBB
+MKV_SEEK_ID = 0x53AB
+MKV_SEEK_POSITION = 0x53AC
+MKV_CLUSTER = 0x1F43B675
+MKV_ATTACHMENTS = 0x1941A469
+MKV_ATTACHED_FILE = 0x61A7
+MKV_FILE_NAME = 0x466E
+MKV_FILE_MIME_TYPE = 0x4660
+MKV_FILE_DATA = 0x465C
+MKV_INFO = 0x1549A966
+MKV_TIMECODE_SCALE = 0x2AD7B1
+MKV_DURATION = 0x4489
+MKV_TITLE = 0x7BA9
+MKV_TAGS = 0x1254C367
+MKV_TAG = 0x7373
+MKV_TARGETS = 0x63C0
+MKV_TAG_TRACK_UID = 0x63C5
+MKV_SIMPLE_TAG = 0x67C8
+MKV_TAG_NAME = 0x45A3
+MKV_TAG_STRING = 0x4487
+
+
+class Element(NamedTuple):
+    id: int
+    offset: int
+    header_size: int
+    size: int | None  # None for "unknown size" (live-written files)
+
+    @property
+    def data_offset(self) -> int:
+        return self.offset + self.header_size
+
+    @property
+    def end(self) -> int | None:
+        return None if self.size is None else self.data_offset + self.size
+
+
+def _read_vint(f, strip_marker: bool) -> tuple[int | None, int]:
+    first = f.read(1)
+    if not first or first[0] == 0:
+        raise ValueError("invalid or truncated EBML header")
+
+    length = 9 - first[0].bit_length()
+    rest = f.read(length - 1)
+    if len(rest) < length - 1:
+        raise ValueError("truncated EBML header")
+
+    value = first[0] & (0xFF >> length) if strip_marker else first[0]
+    for b in rest:
+        value = (value << 8) | b
+
+    if strip_marker and value == (1 << (7 * length)) - 1:
+        return None, length
+    return value, length
+
+
+def read_element(f, pos: int) -> Element:
+    f.seek(pos)
+    element_id, id_len = _read_vint(f, strip_marker=False)
+    size, size_len = _read_vint(f, strip_marker=True)
+    return Element(element_id, pos, id_len + size_len, size)
+
+
+def iter_elements(f, start: int, end: int):
+    """Children between `start` and `end`; stops after an unknown-size child."""
+    pos = start
+    while pos < end:
+        try:
+            element = read_element(f, pos)
+        except ValueError:
+            return
+        yield element
+        if element.size is None:
+            return
+        pos = element.end
+
+
+def read_uint(f, element: Element) -> int:
+    f.seek(element.data_offset)
+    return int.from_bytes(f.read(element.size or 0), "big")
+
+
+def read_text(f, element: Element) -> str:
+    f.seek(element.data_offset)
+    return f.read(element.size or 0).rstrip(b"\0").decode("utf-8", errors="replace")
+
+
+def mkv_top_level(f, size: int, wanted: set[int]) -> list[Element]:
+    """
+    Top-level elements of the Segment whose id is in `wanted`. The SeekHead is used
+    to jump straight to them; without one the Segment's children are walked
+    header to header (cluster payloads are skipped, never read).
+    """
+    header = read_element(f, 0)
+    if header.id != EBML_HEADER or header.size is None:
+        raise ValueError("not a Matroska file")
+
+    segment = read_element(f, header.end)
+    if segment.id != MKV_SEGMENT:
+        raise ValueError("Matroska file has no Segment")
+    seg_start = segment.data_offset
+    seg_end = size if segment.size is None else min(segment.end, size)
+
+    found = []
+    seek_positions = []
+    seen_seekhead = False
+
+    for element in iter_elements(f, seg_start, seg_end):
+        if element.id in wanted:
+            found.append(element)
+        elif element.id == MKV_SEEKHEAD and element.size is not None:
+            seen_seekhead = True
+            for seek in iter_elements(f, element.data_offset, element.end):
+                if seek.id != MKV_SEEK or seek.size is None:
+                    continue
+                seek_id = position = None
+                for child in iter_elements(f, seek.data_offset, seek.end):
+                    if child.id == MKV_SEEK_ID:
+                        seek_id = read_uint(f, child)
+                    elif child.id == MKV_SEEK_POSITION:
+                        position = read_uint(f, child)
+                if seek_id in wanted and position is not None:
+                    seek_positions.append(seg_start + position)
+        elif element.id == MKV_CLUSTER and seen_seekhead:
+            break
+
+    for pos in seek_positions:
+        if any(e.offset == pos for e in found) or pos >= size:
+            continue
+        try:
+            element = read_element(f, pos)
+        except ValueError:
+            continue
+        if element.id in wanted:
+            found.append(element)
+
+    return found
+
+
+def _mkv_cover(f, size: int) -> tuple[str, bytes] | None:
+    candidates = []
+
+    for attachments in mkv_top_level(f, size, {MKV_ATTACHMENTS}):
+        if attachments.size is None:
+            continue
+        for attached in iter_elements(f, attachments.data_offset, attachments.end):
+            if attached.id != MKV_ATTACHED_FILE or attached.size is None:
+                continue
+            name = mime = ""
+            data = None
+            for child in iter_elements(f, attached.data_offset, attached.end):
+                if child.id == MKV_FILE_NAME:
+                    name = read_text(f, child)
+                elif child.id == MKV_FILE_MIME_TYPE:
+                    mime = read_text(f, child)
+                elif child.id == MKV_FILE_DATA and child.size:
+                    data = child
+            if data is not None and mime.startswith("image/"):
+                candidates.append((not name.lower().startswith("cover"), data))
+
+    for _not_cover, element in sorted(candidates, key=lambda c: c[0]):
+        f.seek(element.data_offset)
+        data = f.read(element.size)
+        fmt = image_format(data[:12])
+        if fmt:
+            return fmt, data
+    return None
+
+def _mkv_tags(f, size: int) -> dict:
+    tags = {}
+
+    for element in mkv_top_level(f, size, {MKV_INFO, MKV_TAGS}):
+        if element.size is None:
+            continue
+
+        if element.id == MKV_INFO:
+            scale, duration = 1_000_000, None
+            for child in iter_elements(f, element.data_offset, element.end):
+                if child.id == MKV_TIMECODE_SCALE:
+                    scale = read_uint(f, child)
+                elif child.id == MKV_DURATION and child.size in (4, 8):
+                    f.seek(child.data_offset)
+                    (duration,) = struct.unpack(">f" if child.size == 4 else ">d", f.read(child.size))
+                elif child.id == MKV_TITLE:
+                    tags.setdefault("title", read_text(f, child))
+            if duration:
+                tags["duration"] = duration * scale / 1e9
+            continue
+
+        for tag in iter_elements(f, element.data_offset, element.end):
+            if tag.id != MKV_TAG or tag.size is None:
+                continue
+            simple_tags = []
+            per_track = False
+            for child in iter_elements(f, tag.data_offset, tag.end):
+                if child.id == MKV_TARGETS and child.size:
+                    per_track = any(t.id == MKV_TAG_TRACK_UID for t in iter_elements(f, child.data_offset, child.end))
+                elif child.id == MKV_SIMPLE_TAG and child.size is not None:
+                    simple_tags.append(child)
+            if per_track:  # stream-level tags (encoder, DURATION, ...)
+                continue
+
+            for simple in simple_tags:
+                name = value = None
+                for child in iter_elements(f, simple.data_offset, simple.end):
+                    if child.id == MKV_TAG_NAME:
+                        name = read_text(f, child).lower()
+                    elif child.id == MKV_TAG_STRING and (child.size or 0) <= MP4_TAG_MAX_BYTES:
+                        value = read_text(f, child)
+                if name in EMBEDDED_TAG_NAMES and value:
+                    tags.setdefault(name, value)
+
+    return tags
+
+# ---------------------------
+# Containers
+# ---------------------------
+
+def container_format(head: bytes) -> str | None:
+    if head[:4] == b"\x1a\x45\xdf\xa3":
+        return "matroska"
+    if head[4:8] in (b"ftyp", b"moov", b"mdat", b"free", b"wide"):
+        return "mp4"
+    return None
+
+
+def embedded_cover(path: Path) -> tuple[str, bytes] | None:
+    """
+    (image format, image bytes) of the cover art embedded in an MP4 or
+    Matroska/WebM file, or None if it has none or cannot be parsed.
+    """
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, 2)
+            size = f.tell()
+            f.seek(0)
+            kind = container_format(f.read(12))
+
+            if kind == "mp4":
+                return _mp4_cover(f, size)
+            if kind == "matroska":
+                return _mkv_cover(f, size)
+    except (OSError, ValueError, struct.error):
+        return None
+    return None
+
+
+def embedded_tags(path: Path) -> dict:
+    """
+    Metadata written by yt-dlp --embed-metadata, read from the MP4 `ilst` /
+    Matroska `Tags` and `Info` headers. Keys (when present): title, artist,
+    date, description, synopsis, comment, purl, genre, duration (seconds).
+    """
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, 2)
+            size = f.tell()
+            f.seek(0)
+            kind = container_format(f.read(12))
+
+            if kind == "mp4":
+                return _mp4_tags(f, size)
+            if kind == "matroska":
+                return _mkv_tags(f, size)
+    except (OSError, ValueError, struct.error):
+        return {}
+    return {}
+
+
+def mp4_top_level(path: Path) -> list[Atom]:
+    """Top-level atoms of an MP4; raises ValueError if it is not one."""
+    with open(path, "rb") as f:
+        f.seek(0, 2)
+        size = f.tell()
+        f.seek(0)
+        if container_format(f.read(12)) != "mp4":
+            raise ValueError("not an MP4 file")
+        return list(iter_atoms(f, 0, size))
+
+
+def is_faststart(path: Path) -> bool | None:
+    """
+    True when `moov` comes before `mdat`, so playback can start without
+    reading to the end of the file. None if the file is not a readable MP4.
+    """
+    try:
+        kinds = [atom.type for atom in mp4_top_level(path)]
+    except (OSError, ValueError, struct.error):
+        return None
+
+    if "moov" not in kinds or "mdat" not in kinds:
+        return None
+    return kinds.index("moov") < kinds.index("mdat")
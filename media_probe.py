@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Technical metadata for every video in catalog.json, from ffprobe.
+
+Each video is probed once with `ffprobe -print_format json` by a pool of
+workers; results are cached in probe_cache.json keyed by video id and
+checked against the file's (size, mtime), so later runs only probe new or
+changed files, and moving a video to its category keeps its entry.
+
+Each catalog record gets:
+    "container", "file_size", "bitrate", "probed_duration",
+    "width", "height", "fps", "video_codec", "audio_codec"
+and, when something is wrong with the file:
+    "duration_mismatch": true   # probed duration differs from the sidecar's
+    "probe_error": "<message>"  # ffprobe could not read the file
+
+A duration mismatch usually means a partial download.
+
+Usage:
+    python3 media_probe.py               # probe new/changed files, patch catalog
+    python3 media_probe.py --workers 8
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import archive_roots
+import metrics
+from catalog_io import load_catalog, update_records, write_json_atomic
+from sidecar_io import locked
+
+# ---------------------------
+# Configuration
+# ---------------------------
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+REPO_ROOT = SCRIPT_DIR.parent
+CACHE_PATH = SCRIPT_DIR / "probe_cache.json"
+
+DEFAULT_WORKERS = os.cpu_count() or 2
+PROBE_TIMEOUT_SECONDS = 60
+
+# Sidecar durations are whole seconds; anything beyond this is a real difference
+DURATION_TOLERANCE_SECONDS = 2.0
+DURATION_TOLERANCE_RATIO = 0.01
+
+PROBE_FIELDS = (
+    "container", "file_size", "bitrate", "probed_duration",
+    "width", "height", "fps", "video_codec", "audio_codec",
+)
+
+# ---------------------------
+# Cache
+# ---------------------------
+
+_cache: tuple[int, dict] | None = None
+
+
+def load_cache() -> dict:
+    """video id -> {"path", "size", "mtime_ns", <PROBE_FIELDS> or "error"}"""
+    try:
+        with CACHE_PATH.open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def duration_mismatch(sidecar_duration, probed_duration) -> bool:
+    if sidecar_duration is None or probed_duration is None:
+        return False
+    try:
+        expected = float(sidecar_duration)
+    except (TypeError, ValueError):
+        return False
+    tolerance = max(DURATION_TOLERANCE_SECONDS, expected * DURATION_TOLERANCE_RATIO)
+    return abs(probed_duration - expected) > tolerance
+
+
+def catalog_fields(entry: dict, sidecar_duration) -> dict:
+    """Fields merged into a catalog record; None values remove stale ones."""
+    fields = {name: entry.get(name) for name in PROBE_FIELDS}
+    fields["probe_error"] = entry.get("error")
+    fields["duration_mismatch"] = duration_mismatch(sidecar_duration, entry.get("probed_duration")) or None
+    return fields
+
+
+def cached_fields(video_id: str, path: str, sidecar_duration) -> dict:
+    """
+    Catalog fields for a video (at `path`, see archive_roots.file_key)
+    whose probe result is cached and current. Used by 5_generate_catalog.py;
+    the cache file is re-read only when it changes.
+    """
+    global _cache
+
+    try:
+        mtime = CACHE_PATH.stat().st_mtime_ns
+    except OSError:
+        return {}
+
+    if _cache is None or _cache[0] != mtime:
+        _cache = (mtime, load_cache())
+
+    entry = _cache[1].get(video_id)
+    if not entry:
+        return {}
+
+    try:
+        st = (REPO_ROOT / path).stat()
+    except OSError:
+        return {}
+    if (st.st_size, st.st_mtime_ns) != (entry["size"], entry["mtime_ns"]):
+        return {}
+
+    return catalog_fields(entry, sidecar_duration)
+
+# ---------------------------
+# Probing
+# ---------------------------
+
+def _number(value, kind=float):
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _frame_rate(value) -> float | None:
+    """ffprobe rates look like "30000/1001"."""
+    try:
+        num, _, den = str(value).partition("/")
+        rate = float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return None
+    return round(rate, 3) if rate else None
+
+
+def parse_probe(data: dict) -> dict:
+    fmt = data.get("format", {})
+    streams = data.get("streams", [])
+
+    # Embedded cover art shows up as a video stream with attached_pic set
+    video = next(
+        (s for s in streams
+         if s.get("codec_type") == "video" and not s.get("disposition", {}).get("attached_pic")),
+        {},
+    )
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), {})
+
+    duration = _number(fmt.get("duration"))
+
+    return {
+        "container": fmt.get("format_name"),
+        "file_size": _number(fmt.get("size"), int),
+        "bitrate": _number(fmt.get("bit_rate"), int),
+        "probed_duration": round(duration, 3) if duration is not None else None,
+        "width": video.get("width"),
+        "height": video.get("height"),
+        "fps": _frame_rate(video.get("avg_frame_rate")),
+        "video_codec": video.get("codec_name"),
+        "audio_codec": audio.get("codec_name"),
+    }
+
+
+def probe(video_path: Path) -> dict:
+    """Probe one file; returns PROBE_FIELDS, or {"error": ...} if ffprobe fails."""
+    with metrics.timed("ffprobe") as event:
+        fields = _run_ffprobe(video_path)
+        if "error" in fields:
+            event.update(outcome="failed", reason="ffprobe-error")
+    return fields
+
+
+def _run_ffprobe(video_path: Path) -> dict:
+    try:
+        result = subprocess.run(
+            [
+                "ffprobe", "-v", "error",
+                "-print_format", "json",
+                "-show_format", "-show_streams",
+                str(video_path),
+            ],
+            capture_output=True,
+            text=True,
+            timeout=PROBE_TIMEOUT_SECONDS,
+        )
+    except subprocess.TimeoutExpired:
+        return {"error": "ffprobe timed out"}
+
+    if result.returncode != 0:
+        return {"error": result.stderr.strip()[:200] or f"ffprobe exited with {result.returncode}"}
+
+    try:
+        return parse_probe(json.loads(result.stdout))
+    except (json.JSONDecodeError, AttributeError):
+        return {"error": "unreadable ffprobe output"}
+
+
+def probe_if_changed(path: str, entry: dict | None) -> dict | None:
+    """Cached entry if the file is unchanged, else a fresh probe; None if missing."""
+    try:
+        st = (REPO_ROOT / path).stat()
+    except OSError:
+        return None
+
+    if entry and (st.st_size, st.st_mtime_ns) == (entry["size"], entry["mtime_ns"]):
+        return {**entry, "path": path}  # may have been moved by Step 4
+
+    return {"path": path, "size": st.st_size, "mtime_ns": st.st_mtime_ns, **probe(REPO_ROOT / path)}
+
+
+def store_entries(entries: dict[str, dict]):
+    """Merge fresh entries (video id -> entry) into probe_cache.json."""
+    with locked(CACHE_PATH):
+        cache = load_cache()
+        cache.update(entries)
+        write_json_atomic(CACHE_PATH, cache, indent=None)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Probe catalog videos with ffprobe and record technical fields.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="parallel ffprobe processes")
+    args = parser.parse_args()
+
+    catalog = load_catalog(SCRIPT_DIR)
+    if not catalog:
+        print("[ERROR] catalog.json not found, run 5_generate_catalog.py first.")
+        return 1
+
+    old_cache = load_cache()
+    records = list(catalog["videos"].values())
+
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            entries = list(pool.map(lambda r: probe_if_changed(archive_roots.file_key(r), old_cache.get(r["id"])), records))
+    except FileNotFoundError:
+        print("[ERROR] ffprobe not found (it ships with ffmpeg).")
+        return 1
+
+    cache = {r["id"]: e for r, e in zip(records, entries) if e is not None}
+    with locked(CACHE_PATH):
+        # Keep entries of videos not in the catalog yet (probed by pipeline.py
+        # before sorting, possibly while this run was probing)
+        for vid, entry in load_cache().items():
+            if vid not in cache and "path" in entry and (REPO_ROOT / entry["path"]).exists():
+                cache[vid] = entry
+        write_json_atomic(CACHE_PATH, cache, indent=None)
+
+    probed = sum(1 for vid, e in cache.items() if old_cache.get(vid) != e)
+    print(f"[OK] {len(cache)} video(s) in probe cache, {probed} probed this run.")
+
+    updates = {}
+    mismatches = []
+    errors = []
+    for record, entry in zip(records, entries):
+        if entry is None:
+            continue
+        fields = catalog_fields(entry, record.get("duration"))
+        updates[record["id"]] = fields
+        if fields["duration_mismatch"]:
+            mismatches.append((record, entry["probed_duration"]))
+        if fields["probe_error"]:
+            errors.append((record, fields["probe_error"]))
+
+    changed = update_records(SCRIPT_DIR, updates)
+    print(f"[OK] {changed} catalog record(s) updated.")
+
+    for record, probed_duration in mismatches:
+        print(f"[WARN] duration mismatch: {record['path']} (sidecar {record.get('duration')}s, file {probed_duration}s)")
+    for record, error in errors:
+        print(f"[WARN] unreadable: {record['path']}: {error}")
+
+    if mismatches or errors:
+        print(f"[info] {len(mismatches)} duration mismatch(es), {len(errors)} unreadable file(s); "
+              "these are likely partial downloads.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Pipeline metrics: structured events, and a Prometheus textfile built from them.
+
+Every stage appends one JSON line per unit of work (usually one video) to
+metrics_events.jsonl:
+
+    {"at": 1760000000.0, "stage": "download", "outcome": "ok",
+     "seconds": 41.2, "bytes": 187000000, "video_id": "...", "reason": null}
+
+`outcome` is ok / failed / duplicate / interrupted / ..., and `reason` a
+short, fixed keyword for failures (it becomes a Prometheus label). Events
+are best-effort: a write error never stops the stage that emits them.
+Bash scripts emit through `python3 metrics.py emit ...`.
+
+The collector folds new events into metrics_state.json (it remembers how far
+it has read, so it can run from cron after every run) and writes visorum.prom
+for node_exporter's textfile collector:
+
+    visorum_stage_duration_seconds{stage}           histogram
+    visorum_stage_bytes_total{stage}                counter
+    visorum_stage_events_total{stage,outcome}       counter
+    visorum_stage_failures_total{stage,reason}      counter
+    visorum_stage_last_event_timestamp_seconds{stage}
+    visorum_archive_videos, visorum_archive_bytes,
+    visorum_archive_duration_seconds, visorum_catalog_generation
+
+The events file may be deleted or rotated at any time; the collector notices
+and starts reading the new file from the beginning.
+
+Usage:
+    python3 metrics.py                                   # collect -> visorum.prom
+    python3 metrics.py --output /var/lib/node_exporter/textfile/visorum.prom
+    python3 metrics.py emit download ok --started "$EPOCHREALTIME" --bytes-of <dir>
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import archive_roots
+
+# ---------------------------
+# Configuration
+# ---------------------------
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+EVENTS_PATH = SCRIPT_DIR / "metrics_events.jsonl"
+STATE_PATH = SCRIPT_DIR / "metrics_state.json"
+PROM_PATH = SCRIPT_DIR / "visorum.prom"
+
+# Upper bounds (seconds) of the latency histogram buckets
+DURATION_BUCKETS = (0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+MAX_REASON_LENGTH = 64
+
+# ---------------------------
+# Emitting
+# ---------------------------
+
+_lock = threading.Lock()
+
+
+def emit(stage: str, outcome: str = "ok", **fields):
+    """Append one event. Known fields: seconds, bytes, reason, video_id."""
+    event = {"at": round(time.time(), 3), "stage": stage, "outcome": outcome}
+    event.update((k, v) for k, v in fields.items() if v is not None)
+    if isinstance(event.get("seconds"), float):
+        event["seconds"] = round(event["seconds"], 3)
+
+    # One write() on an O_APPEND descriptor, so lines from concurrent
+    # processes never interleave
+    line = (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+    try:
+        with _lock:
+            fd = os.open(EVENTS_PATH, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+    except OSError:
+        pass
+
+
+@contextmanager
+def timed(stage: str, **fields):
+    """
+    Time a block and emit its event. The block may fill in the yielded dict
+    (outcome, reason, bytes, ...); an exception makes it a failure.
+    """
+    event = dict(fields)
+    start = time.monotonic()
+    try:
+        yield event
+    except KeyboardInterrupt:
+        event["outcome"] = "interrupted"
+        raise
+    except BaseException as e:
+        event.setdefault("outcome", "failed")
+        event.setdefault("reason", type(e).__name__)
+        raise
+    finally:
+        event.setdefault("outcome", "ok")
+        emit(stage, seconds=time.monotonic() - start, **event)
+
+
+def tree_size(path: Path) -> int:
+    if path.is_file():
+        return path.stat().st_size
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+# ---------------------------
+# Collecting
+# ---------------------------
+
+def empty_stage() -> dict:
+    return {
+        "buckets": [0] * len(DURATION_BUCKETS),
+        "count": 0,
+        "sum": 0.0,
+        "bytes": 0,
+        "outcomes": {},
+        "failures": {},
+        "last": 0.0,
+    }
+
+
+def load_state() -> dict:
+    try:
+        with STATE_PATH.open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {"inode": None, "offset": 0, "stages": {}}
+
+
+def fold(stages: dict, event: dict):
+    stage = stages.setdefault(str(event.get("stage", "unknown")), empty_stage())
+    outcome = str(event.get("outcome", "ok"))
+
+    stage["outcomes"][outcome] = stage["outcomes"].get(outcome, 0) + 1
+    stage["last"] = max(stage["last"], float(event.get("at") or 0))
+
+    if outcome == "failed":
+        reason = str(event.get("reason") or "unknown")[:MAX_REASON_LENGTH]
+        stage["failures"][reason] = stage["failures"].get(reason, 0) + 1
+
+    if isinstance(event.get("bytes"), int):
+        stage["bytes"] += event["bytes"]
+
+    seconds = event.get("seconds")
+    if isinstance(seconds, (int, float)):
+        stage["count"] += 1
+        stage["sum"] += seconds
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if seconds <= bound:
+                stage["buckets"][i] += 1
+
+
+def collect_events(state: dict) -> int:
+    """Fold events appended since the last run into `state`. Returns how many."""
+    try:
+        st = EVENTS_PATH.stat()
+    except FileNotFoundError:
+        return 0
+
+    if st.st_ino != state["inode"] or st.st_size < state["offset"]:
+        state["inode"], state["offset"] = st.st_ino, 0  # new or rotated file
+
+    with EVENTS_PATH.open("rb") as f:
+        f.seek(state["offset"])
+        data = f.read()
+
+    # A line still being written has no newline yet; leave it for next time
+    complete = data[:data.rfind(b"\n") + 1]
+    state["offset"] += len(complete)
+
+    count = 0
+    for line in complete.splitlines():
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        fold(state["stages"], event)
+        count += 1
+    return count
+
+
+def archive_gauges() -> dict[str, float]:
+    try:
+        with (SCRIPT_DIR / "catalog.json").open("r", encoding="utf-8") as f:
+            catalog = json.load(f)
+    except Exception:
+        return {}
+
+    total_bytes = 0
+    for record in catalog.get("videos", {}).values():
+        size = record.get("file_size")
+        if size is None:
+            try:
+                size = archive_roots.resolve(record).stat().st_size
+            except (OSError, KeyError, ValueError):
+                size = 0
+        total_bytes += size
+
+    summary = catalog.get("summary", {})
+    return {
+        "visorum_archive_videos": len(catalog.get("videos", {})),
+        "visorum_archive_bytes": total_bytes,
+        "visorum_archive_duration_seconds": summary.get("total_duration", 0),
+        "visorum_catalog_generation": catalog.get("generation", 0),
+    }
+
+# ---------------------------
+# Textfile output
+# ---------------------------
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prom(stages: dict, gauges: dict[str, float]) -> str:
+    lines = []
+
+    def header(name: str, kind: str, help_text: str):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    header("visorum_stage_duration_seconds", "histogram", "Wall time per unit of work (usually one video).")
+    for name, s in sorted(stages.items()):
+        stage = _label(name)
+        for bound, count in zip(DURATION_BUCKETS, s["buckets"]):
+            lines.append(f'visorum_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+        lines.append(f'visorum_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {s["count"]}')
+        lines.append(f'visorum_stage_duration_seconds_sum{{stage="{stage}"}} {_number(s["sum"])}')
+        lines.append(f'visorum_stage_duration_seconds_count{{stage="{stage}"}} {s["count"]}')
+
+    header("visorum_stage_bytes_total", "counter", "Bytes written by each stage.")
+    for name, s in sorted(stages.items()):
+        lines.append(f'visorum_stage_bytes_total{{stage="{_label(name)}"}} {s["bytes"]}')
+
+    header("visorum_stage_events_total", "counter", "Units of work by outcome.")
+    for name, s in sorted(stages.items()):
+        for outcome, count in sorted(s["outcomes"].items()):
+            lines.append(f'visorum_stage_events_total{{stage="{_label(name)}",outcome="{_label(outcome)}"}} {count}')
+
+    header("visorum_stage_failures_total", "counter", "Failures by reason.")
+    for name, s in sorted(stages.items()):
+        for reason, count in sorted(s["failures"].items()):
+            lines.append(f'visorum_stage_failures_total{{stage="{_label(name)}",reason="{_label(reason)}"}} {count}')
+
+    header("visorum_stage_last_event_timestamp_seconds", "gauge", "Unix time of the latest event per stage.")
+    for name, s in sorted(stages.items()):
+        lines.append(f'visorum_stage_last_event_timestamp_seconds{{stage="{_label(name)}"}} {_number(s["last"])}')
+
+    gauge_help = {
+        "visorum_archive_videos": "Videos in catalog.json.",
+        "visorum_archive_bytes": "Size of the video files in catalog.json.",
+        "visorum_archive_duration_seconds": "Total duration of the videos in catalog.json.",
+        "visorum_catalog_generation": "Generation of catalog.json.",
+    }
+    for name, value in gauges.items():
+        header(name, "gauge", gauge_help[name])
+        lines.append(f"{name} {_number(value)}")
+
+    return "\n".join(lines) + "\n"
+
+
+def write_atomic(path: Path, text: str):
+    # node_exporter only reads *.prom, so the temp file is never half-read
+    tmp = path.with_name(f".{path.name}.tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+# ---------------------------
+# Main
+# ---------------------------
+
+def cmd_emit(args) -> int:
+    fields = {"reason": args.reason, "video_id": args.video_id, "bytes": args.bytes}
+    if args.started is not None:
+        fields["seconds"] = max(0.0, time.time() - args.started)
+    if args.bytes_of is not None:
+        try:
+            fields["bytes"] = tree_size(args.bytes_of)
+        except OSError:
+            pass
+    emit(args.stage, args.outcome, **fields)
+    return 0
+
+
+def cmd_collect(args) -> int:
+    state = load_state()
+    new_events = collect_events(state)
+
+    write_atomic(args.output, render_prom(state["stages"], archive_gauges()))
+    write_atomic(STATE_PATH, json.dumps(state))
+
+    print(f"[OK] {new_events} new event(s) folded, {args.output} written.")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Pipeline metrics events and Prometheus textfile export.")
+    parser.add_argument("--output", type=Path, default=PROM_PATH, help="textfile to write (default: %(default)s)")
+    sub = parser.add_subparsers(dest="command")
+
+    p_emit = sub.add_parser("emit", help="append one event (for shell scripts)")
+    p_emit.add_argument("stage")
+    p_emit.add_argument("outcome")
+    p_emit.add_argument("--started", type=float, help="unix start time; seconds are measured from it")
+    p_emit.add_argument("--bytes", type=int)
+    p_emit.add_argument("--bytes-of", type=Path, metavar="PATH", help="count the size of this file/folder")
+    p_emit.add_argument("--reason")
+    p_emit.add_argument("--video-id")
+
+    args = parser.parse_args()
+    if args.command == "emit":
+        return cmd_emit(args)
+    return cmd_collect(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,483 @@
+#!/usr/bin/env python3
+"""
+Pipelined Steps 1-3: every URL in list.txt flows through per-video stages
+connected by queues,
+
+    resolve -> download -> tag -> probe -> manifest
+
+instead of each step finishing for all videos before the next one starts.
+Every stage has its own worker threads (STAGE_WORKERS, or --workers), so
+video N+1 downloads while video N is being tagged and probed.
+
+Failed downloads are classified from yt-dlp's stderr (ytdlp_errors.py).
+Age-gated videos go to a separate cookie queue (with the cookie file of
+1_download_multiple_cookies.sh) in the same run; private and removed videos
+are recorded in permanent_failures.txt and never requested again.
+
+Each completed stage is appended to pipeline_journal.jsonl. After a crash
+or Ctrl+C the next run resumes every video after its last completed stage;
+the journal is removed once a run ends with nothing left to resume.
+
+Sorting (Step 4) stays interactive and is offered at the end, as before.
+
+Usage:
+    python3 pipeline.py
+    python3 pipeline.py --workers download=3 probe=8
+    python3 pipeline.py --no-sort
+"""
+
+import argparse
+import importlib
+import json
+import os
+import queue
+import re
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import media_probe
+import metrics
+import ytdlp_errors
+
+tagger = importlib.import_module("2a_tag_youtube_video")
+
+# ---------------------------
+# Configuration
+# ---------------------------
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+REPO_ROOT = SCRIPT_DIR.parent
+
+URL_FILE = SCRIPT_DIR / "list.txt"
+MANIFEST_FILE = SCRIPT_DIR / "manifest.txt"
+FAILED_FILE = SCRIPT_DIR / "failed_downloads.txt"
+DUPES_FILE = SCRIPT_DIR / "dupes.txt"
+JOURNAL_PATH = SCRIPT_DIR / "pipeline_journal.jsonl"
+
+STAGES = ("resolve", "download", "tag", "probe", "manifest")
+# "cookies" is a side queue: age-gated and bot-checked downloads, retried with the cookie file
+STAGE_WORKERS = {"resolve": 4, "download": 2, "cookies": 1, "tag": 4, "probe": 4, "manifest": 1}
+NEXT_STAGE = {"resolve": "download", "download": "tag", "cookies": "tag", "tag": "probe", "probe": "manifest", "manifest": None}
+JOURNAL_STAGE = {"cookies": "download"}  # journaled as the stage it replaces
+
+VIDEO_EXTENSIONS = {".mp4", ".mkv", ".webm"}
+VIDEO_ID_REGEX = re.compile(r"\[([A-Za-z0-9_-]{11})\]")
+WATCH_URL_REGEX = re.compile(r"^https://www\.youtube\.com/watch\?v=([A-Za-z0-9_-]{11})$")
+
+# Same options as 1_download_multiple.sh
+DOWNLOAD_ARGS = [
+    "-t", "mp4",
+    "--write-thumbnail",
+    "--convert-thumbnails", "jpg",
+    "--embed-thumbnail",
+    "--embed-metadata",
+    "--write-subs",
+    "--write-auto-subs",
+    "--sub-langs", "en.*",
+    "--sub-format", "vtt",
+]
+
+# ---------------------------
+# Journal
+# ---------------------------
+
+class Journal:
+    """Append-only JSONL log of stage outcomes, fsynced per line."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def load(self) -> dict[str, dict]:
+        """url -> {"stage": last completed stage or None, "video_id", "final"}"""
+        state = {}
+        try:
+            lines = self.path.read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            return state
+
+        for line in lines:
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn last line after a crash
+
+            entry = state.setdefault(event["url"], {"stage": None, "video_id": None, "final": False})
+            if event.get("video_id"):
+                entry["video_id"] = event["video_id"]
+            if event["status"] == "done":
+                entry["stage"] = event["stage"]
+                entry["final"] = event["stage"] == STAGES[-1]
+            elif event["status"] in ("duplicate", "skipped"):
+                entry["final"] = True
+
+        return state
+
+    def record(self, url: str, stage: str, status: str, **extra):
+        event = {"at": datetime.now().isoformat(timespec="seconds"), "url": url, "stage": stage, "status": status, **extra}
+        line = json.dumps(event, ensure_ascii=False) + "\n"
+        with self.lock:
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+# ---------------------------
+# Stages
+# ---------------------------
+
+class Duplicate(Exception):
+    pass
+
+
+class Skipped(Exception):
+    """Permanently unavailable (see ytdlp_errors.py), not requested again."""
+
+
+class NeedsCookies(Exception):
+    pass
+
+
+class StageError(Exception):
+    def __init__(self, message: str, reason: str):
+        super().__init__(message)
+        self.reason = reason  # short keyword for metrics
+
+
+def stderr_tail(result: subprocess.CompletedProcess) -> str:
+    lines = (result.stderr or "").strip().splitlines()
+    return lines[-1] if lines else f"exit code {result.returncode}"
+
+
+def find_video(video_dir: Path) -> Path:
+    videos = sorted(p for p in video_dir.iterdir() if p.is_file() and p.suffix.lower() in VIDEO_EXTENSIONS)
+    if not videos:
+        raise StageError(f"no video file in {video_dir.name}", "no-video")
+    return videos[0]
+
+
+class Pipeline:
+    def __init__(self, workers: dict[str, int], journal: Journal, seen_ids: set[str], permanent: dict[str, str]):
+        self.workers = workers
+        self.journal = journal
+        self.seen_ids = seen_ids
+        self.permanent = permanent
+        self.cookies_available = ytdlp_errors.cookies_available()
+        self.seen_lock = threading.Lock()
+        self.manifest_lock = threading.Lock()
+        self.probes: dict[str, dict] = {}
+        self.probe_warned = False
+
+        self.queues = {stage: queue.Queue() for stage in workers}
+        self.finished = queue.Queue()
+        self.stop = threading.Event()
+
+    # --- stage functions: raise Duplicate / StageError, or update `item` ---
+
+    def resolve(self, item: dict):
+        # Plain watch URLs (as queued by ingest.py) carry the ID, no request needed
+        match = WATCH_URL_REGEX.match(item["url"])
+        if match:
+            video_id = match.group(1)
+        else:
+            cmd = ["yt-dlp", "--remote-components", "ejs:github", "--get-id", item["url"]]
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            failure = ytdlp_errors.classify(result.stderr) if result.returncode != 0 else None
+            if failure in ytdlp_errors.RETRY_WITH_COOKIES and self.cookies_available:
+                cmd[1:3] = ["--cookies", str(ytdlp_errors.COOKIE_FILE)]
+                result = subprocess.run(cmd, capture_output=True, text=True)
+                failure = ytdlp_errors.classify(result.stderr) if result.returncode != 0 else None
+
+            video_id = result.stdout.strip().splitlines()[0] if result.stdout.strip() else ""
+            if failure or not video_id:
+                raise StageError(f"could not extract ID: {stderr_tail(result)}", failure or "no-id")
+
+        item["video_id"] = video_id
+        if video_id in self.permanent:
+            raise Skipped(self.permanent[video_id])
+        with self.seen_lock:
+            if video_id in self.seen_ids:
+                raise Duplicate(video_id)
+            self.seen_ids.add(video_id)
+
+    def download(self, item: dict, cookies: bool = False):
+        video_dir = SCRIPT_DIR / item["video_id"]
+        video_dir.mkdir(exist_ok=True)
+
+        cookie_args = ["--cookies", str(ytdlp_errors.COOKIE_FILE)] if cookies else []
+        result = subprocess.run(
+            ["yt-dlp", "--quiet", "--no-progress", *cookie_args, *DOWNLOAD_ARGS, "-P", str(video_dir), item["url"]],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        if result.returncode != 0:
+            failure = ytdlp_errors.classify(result.stderr)
+            if failure in ytdlp_errors.RETRY_WITH_COOKIES and self.cookies_available and not cookies:
+                raise NeedsCookies()
+            if ytdlp_errors.is_permanent(failure):
+                ytdlp_errors.record_permanent(item["video_id"], failure, item["url"])
+                self.permanent[item["video_id"]] = failure
+                if not any(video_dir.iterdir()):
+                    video_dir.rmdir()
+            raise StageError(f"download failed ({failure}): {stderr_tail(result)}", failure)
+        find_video(video_dir)
+        item["bytes"] = metrics.tree_size(video_dir)
+        item["cookies"] = cookies
+
+    def cookies(self, item: dict):
+        self.download(item, cookies=True)
+
+    def tag(self, item: dict):
+        video_path = find_video(SCRIPT_DIR / item["video_id"])
+        try:
+            tagger.tag_video(video_path, cookies=item.get("cookies", False))
+        except (RuntimeError, ValueError, OSError) as e:
+            raise StageError(f"tagging failed: {(str(e).strip().splitlines() or [''])[-1]}", "tag-error")
+
+    def probe(self, item: dict):
+        video_path = find_video(SCRIPT_DIR / item["video_id"])
+        try:
+            entry = media_probe.probe_if_changed(video_path.relative_to(REPO_ROOT).as_posix(), None)
+        except FileNotFoundError:
+            # Optional stage: media_probe.py can fill this in later
+            if not self.probe_warned:
+                self.probe_warned = True
+                print("[WARN] ffprobe not found, skipping the probe stage")
+            return
+        if entry:
+            self.probes[item["video_id"]] = entry
+
+    def manifest(self, item: dict):
+        video_dir = SCRIPT_DIR / item["video_id"]
+        lines = [str(p.relative_to(REPO_ROOT)) for p in sorted(video_dir.rglob("*")) if p.is_file()]
+
+        with self.manifest_lock:
+            new_file = not MANIFEST_FILE.exists()
+            with MANIFEST_FILE.open("a", encoding="utf-8") as f:
+                if new_file:
+                    f.write("Date of creation: " + datetime.now().strftime("%Y-%m-%d") + "\n")
+                f.writelines(line + "\n" for line in lines)
+
+    # --- plumbing ---
+
+    def worker(self, stage: str):
+        func = getattr(self, stage)
+        next_stage = NEXT_STAGE[stage]
+        journal_stage = JOURNAL_STAGE.get(stage, stage)
+
+        while True:
+            item = self.queues[stage].get()
+            if item is None:
+                return
+            if self.stop.is_set():
+                self.finished.put((item, "interrupted", stage))
+                continue
+
+            start = time.monotonic()
+            try:
+                func(item)
+            except Duplicate:
+                self.journal.record(item["url"], stage, "duplicate", video_id=item["video_id"])
+                metrics.emit(stage, "duplicate", video_id=item["video_id"])
+                self.finished.put((item, "duplicate", stage))
+                continue
+            except Skipped as e:
+                self.journal.record(item["url"], stage, "skipped", video_id=item["video_id"], reason=str(e))
+                metrics.emit(stage, "skipped", reason=str(e), video_id=item["video_id"])
+                print(f"[info] {item['video_id']} skipped, permanently unavailable ({e})")
+                self.finished.put((item, "skipped", stage))
+                continue
+            except NeedsCookies:
+                metrics.emit(stage, "cookie-retry", seconds=time.monotonic() - start, video_id=item["video_id"])
+                print(f"[info] {item['video_id']} needs cookies, queued for a download with cookies")
+                self.queues["cookies"].put(item)
+                continue
+            except Exception as e:
+                if self.stop.is_set():
+                    # Ctrl+C also reaches yt-dlp/ffprobe; redo this stage next run
+                    metrics.emit(stage, "interrupted", video_id=item.get("video_id"))
+                    self.finished.put((item, "interrupted", stage))
+                    continue
+                reason = str(e) or type(e).__name__
+                self.journal.record(item["url"], journal_stage, "failed", video_id=item.get("video_id"), reason=reason)
+                metrics.emit(
+                    stage, "failed",
+                    seconds=time.monotonic() - start,
+                    reason=getattr(e, "reason", type(e).__name__),
+                    video_id=item.get("video_id"),
+                )
+                print(f"[WARN] {stage} failed for {item.get('video_id') or item['url']}: {reason}")
+                self.finished.put((item, "failed", stage))
+                continue
+
+            self.journal.record(item["url"], journal_stage, "done", video_id=item["video_id"])
+            metrics.emit(
+                stage, "ok",
+                seconds=time.monotonic() - start,
+                bytes=item.pop("bytes", None),
+                video_id=item["video_id"],
+            )
+            if next_stage:
+                self.queues[next_stage].put(item)
+            else:
+                print(f"[OK] {item['video_id']} ready for sorting")
+                self.finished.put((item, "done", stage))
+
+    def run(self, items: list[tuple[dict, str]]) -> list[tuple[dict, str, str]]:
+        threads = [
+            threading.Thread(target=self.worker, args=(stage,), daemon=True)
+            for stage, count in self.workers.items()
+            for _ in range(count)
+        ]
+        for t in threads:
+            t.start()
+
+        for item, stage in items:
+            self.queues[stage].put(item)
+
+        results = []
+        try:
+            while len(results) < len(items):
+                results.append(self.finished.get())
+        except KeyboardInterrupt:
+            print("\n[info] Interrupted, waiting for running stages to stop (progress is journaled)...")
+            self.stop.set()
+            try:
+                while len(results) < len(items):
+                    results.append(self.finished.get())
+            except KeyboardInterrupt:
+                print("[info] Stopping now; unfinished stages will be redone on the next run.")
+                return results  # worker threads are daemons
+
+        for stage, count in self.workers.items():
+            for _ in range(count):
+                self.queues[stage].put(None)
+        for t in threads:
+            t.join()
+
+        return results
+
+# ---------------------------
+# Main
+# ---------------------------
+
+def load_urls() -> list[str]:
+    urls = []
+    with URL_FILE.open("r", encoding="utf-8") as f:
+        for line in f:
+            url = line.strip()
+            if url and not url.startswith("#") and url not in urls:
+                urls.append(url)
+    return urls
+
+
+def load_manifest_ids() -> set[str]:
+    ids = set()
+    try:
+        with MANIFEST_FILE.open("r", encoding="utf-8") as f:
+            for line in f:
+                match = VIDEO_ID_REGEX.search(line)
+                if match:
+                    ids.add(match.group(1))
+    except FileNotFoundError:
+        pass
+    return ids
+
+
+def parse_workers(values: list[str]) -> dict[str, int]:
+    workers = dict(STAGE_WORKERS)
+    for value in values:
+        stage, _, n = value.partition("=")
+        if stage not in workers or not n.isdigit() or int(n) < 1:
+            raise SystemExit(f"[error] bad --workers value {value!r} (stages: {', '.join(workers)})")
+        workers[stage] = int(n)
+    return workers
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Download, tag, probe and index videos as a pipeline.")
+    parser.add_argument("--workers", nargs="*", default=[], metavar="STAGE=N", help="threads per stage")
+    parser.add_argument("--no-sort", action="store_true", help="do not offer Step 4 at the end")
+    args = parser.parse_args()
+    workers = parse_workers(args.workers)
+
+    if not URL_FILE.exists():
+        print(f"Error: {URL_FILE.name} not found.")
+        return 1
+
+    journal = Journal(JOURNAL_PATH)
+    state = journal.load()
+    seen_ids = load_manifest_ids()
+    permanent = ytdlp_errors.load_permanent()
+    print(f"Loaded {len(seen_ids)} existing video IDs from manifest.")
+
+    items = []
+    already_done = 0
+    for url in load_urls():
+        entry = state.get(url)
+        if entry and entry["final"]:
+            already_done += 1
+            continue
+
+        match = WATCH_URL_REGEX.match(url)
+        if (entry and entry["video_id"] in permanent) or (match and match.group(1) in permanent):
+            already_done += 1  # permanently unavailable, see permanent_failures.txt
+            continue
+
+        start = "resolve"
+        if entry and entry["stage"]:
+            start = STAGES[STAGES.index(entry["stage"]) + 1]
+            seen_ids.add(entry["video_id"])
+        items.append(({"url": url, "video_id": entry["video_id"] if entry else None}, start))
+
+    resumed = sum(1 for _, stage in items if stage != "resolve")
+    print(f"[info] {len(items)} URL(s) to process ({resumed} resumed), {already_done} already finished.")
+
+    pipeline = Pipeline(workers, journal, seen_ids, permanent)
+    results = pipeline.run(items)
+
+    if pipeline.probes:
+        media_probe.store_entries(pipeline.probes)
+
+    failed = [
+        item["url"] for item, status, _ in results
+        if status == "failed" and item.get("video_id") not in permanent
+    ]
+    gone = [item for item, status, _ in results if status == "failed" and item.get("video_id") in permanent]
+    dupes = [item["url"] for item, status, _ in results if status == "duplicate"]
+    FAILED_FILE.write_text("".join(url + "\n" for url in failed), encoding="utf-8")
+    DUPES_FILE.write_text("".join(url + "\n" for url in dupes), encoding="utf-8")
+
+    counts = {"interrupted": len(items) - len(results)}
+    for _, status, _ in results:
+        counts[status] = counts.get(status, 0) + 1
+    print(f"\nPipeline finished: {counts.get('done', 0)} ready, {len(failed)} failed, "
+          f"{len(gone)} permanently unavailable, {len(dupes)} duplicate(s), "
+          f"{counts.get('interrupted', 0)} interrupted.")
+    if failed:
+        print(f"Some downloads failed. See {FAILED_FILE.name}; rerun to retry them from the failed stage.")
+    if dupes:
+        print(f"Duplicates logged to {DUPES_FILE.name}.")
+    if gone:
+        print(f"Private/removed videos recorded in {ytdlp_errors.PERMANENT_FILE.name} and not retried.")
+
+    if counts.get("interrupted"):
+        return 130
+    if not failed:
+        JOURNAL_PATH.unlink(missing_ok=True)
+
+    if args.no_sort or not counts.get("done"):
+        return 0
+    answer = input("Pipeline complete. Sort now? (Y/n): ").strip()
+    if answer[:1].lower() == "n":
+        return 0
+    return subprocess.run(["./4_sort.sh"], cwd=SCRIPT_DIR).returncode
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,53 +1,107 @@
 #!/usr/bin/env python3
-import json
+import argparse
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # --- PATHS ---
 ROOT = Path(__file__).resolve().parent.parent.parent
-CATALOG_PATH = ROOT / "catalog.json"
+sys.path.insert(0, str(ROOT))
 
-# --- LOAD ---
-with CATALOG_PATH.open("r", encoding="utf-8") as f:
-    catalog = json.load(f)
+import archive_roots  # noqa: E402
+import metrics  # noqa: E402
+from catalog_io import load_catalog, update_records  # noqa: E402
+from media_headers import image_info, suffix_matches  # noqa: E402
 
-videos = catalog.get("videos", {})
+DEFAULT_WORKERS = 16
 
-if not isinstance(videos, dict):
-    raise TypeError("catalog['videos'] is not a dict — catalog format mismatch")
 
-checked = 0
-ignored_empty = 0
-missing = []
+def check_one(entry: dict) -> tuple[str, str | None, int | None, int | None]:
+    """
+    Only the header (and the last few bytes) of each file is read.
+    Returns (status, detail, width, height); status is ok/missing/corrupt/mistyped.
+    """
+    thumb_path = Path(entry["thumbnail"])
 
-# --- CHECK ---
-for video_id, entry in videos.items():
-    thumb = entry.get("thumbnail", "")
+    # thumbnails in your catalog are absolute, but this keeps it safe
+    # (relative ones belong to the record's archive root, see archive_roots.py)
+    if not thumb_path.is_absolute():
+        try:
+            thumb_path = (archive_roots.root_path(entry.get("root")) / thumb_path).resolve()
+        except (KeyError, ValueError) as e:
+            return "missing", str(e), None, None
 
-    if not thumb:
-        ignored_empty += 1
-        continue
+    try:
+        info = image_info(thumb_path)
+    except FileNotFoundError:
+        return "missing", None, None, None
+    except (OSError, ValueError) as e:
+        return "corrupt", str(e), None, None
 
-    checked += 1
-    thumb_path = Path(thumb)
+    if not suffix_matches(thumb_path, info.format):
+        return "mistyped", f"{info.format} data in a {thumb_path.suffix} file", info.width, info.height
 
-    # thumbnails in your catalog are absolute, but this keeps it safe
-    if not thumb_path.is_absolute():
-        thumb_path = (ROOT / thumb_path).resolve()
-
-    if not thumb_path.exists():
-        missing.append({
-            "id": video_id,
-            "title": entry.get("title", "<no title>"),
-            "thumbnail": str(thumb_path),
-        })
-
-# --- REPORT ---
-print(f"Thumbnails checked : {checked}")
-print(f"Ignored empty       : {ignored_empty}")
-print(f"Missing thumbnails  : {len(missing)}")
-
-if missing:
-    print("\nMissing thumbnail files:")
-    for m in missing:
-        print(f"- {m['title']} ({m['id']})")
-        print(f"  {m['thumbnail']}")
+    return "ok", None, info.width, info.height
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Validate catalog thumbnails and record their dimensions.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="parallel file checks")
+    parser.add_argument("--no-write", action="store_true", help="report only, leave catalog.json untouched")
+    args = parser.parse_args()
+
+    # --- LOAD ---
+    catalog = load_catalog(ROOT)
+    if catalog is None:
+        print(f"[error] catalog not found or unreadable: {ROOT / 'catalog.json'}")
+        return 1
+
+    videos = catalog["videos"]
+    entries = [(vid, entry) for vid, entry in videos.items() if entry.get("thumbnail")]
+    ignored_empty = len(videos) - len(entries)
+
+    # --- CHECK ---
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(lambda item: check_one(item[1]), entries))
+
+    problems = {"missing": [], "corrupt": [], "mistyped": []}
+    updates = {}
+
+    for (video_id, entry), (status, detail, width, height) in zip(entries, results):
+        if status != "ok":
+            metrics.emit("thumbnail-check", "failed", reason=status, video_id=video_id)
+            problems[status].append({
+                "id": video_id,
+                "title": entry.get("title", "<no title>"),
+                "thumbnail": entry["thumbnail"],
+                "detail": detail,
+            })
+        updates[video_id] = {"thumbnail_width": width, "thumbnail_height": height}
+
+    # --- REPORT ---
+    print(f"Thumbnails checked : {len(entries)}")
+    print(f"Ignored empty       : {ignored_empty}")
+    print(f"Missing thumbnails  : {len(problems['missing'])}")
+    print(f"Corrupt thumbnails  : {len(problems['corrupt'])}")
+    print(f"Mis-typed thumbnails: {len(problems['mistyped'])}")
+
+    for status, label in (("missing", "Missing"), ("corrupt", "Corrupt"), ("mistyped", "Mis-typed")):
+        if not problems[status]:
+            continue
+        print(f"\n{label} thumbnail files:")
+        for m in problems[status]:
+            print(f"- {m['title']} ({m['id']})")
+            print(f"  {m['thumbnail']}")
+            if m["detail"]:
+                print(f"  {m['detail']}")
+
+    # --- RECORD DIMENSIONS ---
+    if not args.no_write:
+        changed = update_records(ROOT, updates)
+        print(f"\n[OK] {changed} catalog record(s) updated with thumbnail dimensions.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
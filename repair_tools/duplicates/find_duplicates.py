@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Find duplicate videos in the archive and suggest what to remove.
+
+Three kinds of duplicates:
+- same-id:         one video ID in more than one <category>/<id> folder
+                   (Step 5 keeps only one of them, the GUI may show both)
+- multiple-media:  more than one media file in one video folder
+- content:         the same file under different IDs (re-uploads)
+
+Content duplicates are found without reading whole files: media files are
+grouped by size, and only files sharing a size are fingerprinted, by
+hashing their first and last few MB on a thread pool.
+
+Every archive root (archive_roots.json) is scanned, so copies on different
+disks are found too; paths on roots other than this archive are prefixed
+with the root name ("disk2:Music/<id>").
+
+Nothing is deleted. The report (JSON) lists every group with the copy to
+keep and a flat `suggested_removals` list:
+
+    {"path": "Music/<id>", "kind": "folder", "reason": "same-id", "keep": "Gaming/<id>"}
+
+Usage:
+    python3 find_duplicates.py
+    python3 find_duplicates.py --output /tmp/dupes.json --workers 16
+"""
+
+import argparse
+import hashlib
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+TOOLS_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(TOOLS_DIR))
+
+import archive_roots  # noqa: E402
+from sidecar_io import read_json, write_json_atomic  # noqa: E402
+
+SKIP_DIRS = {"1_New_Downloads", "1 New Downloads"}
+VIDEO_EXTENSIONS = {".mp4", ".mkv", ".webm"}
+EXTENSION_PREFERENCE = (".mp4", ".mkv", ".webm")  # kept first within one folder
+VIDEO_ID_REGEX = re.compile(r"\[([A-Za-z0-9_-]{11})\]")
+
+DEFAULT_WORKERS = 8
+SAMPLE_BYTES = 4 << 20  # hashed from the start and from the end of each file
+DEFAULT_OUTPUT = TOOLS_DIR / "duplicates_report.json"
+
+# -----------------------------
+# Scan
+# -----------------------------
+
+def scan_folders() -> list[dict]:
+    """One entry per <category>/<folder> of every root: id, media files (with sizes), sidecar data."""
+    folders = []
+    for category_dir in archive_roots.category_dirs(SKIP_DIRS):
+        for video_dir in sorted(p for p in category_dir.iterdir() if p.is_dir()):
+            media = []
+            sidecar = None
+            for p in sorted(video_dir.iterdir()):
+                if p.suffix.lower() in VIDEO_EXTENSIONS:
+                    media.append({"path": archive_roots.label(p), "file": p, "size": p.stat().st_size})
+                elif p.suffix == ".json" and sidecar is None:
+                    sidecar = read_json(p)
+
+            match = VIDEO_ID_REGEX.search(media[0]["path"]) if media else None
+            folders.append({
+                "folder": archive_roots.label(video_dir),
+                "id": match.group(1) if match else video_dir.name,
+                "media": media,
+                "sidecar": sidecar or {},
+            })
+    return folders
+
+
+def fingerprint(path: Path, size: int) -> str | None:
+    """Hash of the first and last SAMPLE_BYTES (the whole file if it is small)."""
+    h = hashlib.blake2b(digest_size=16)
+    try:
+        with path.open("rb") as f:
+            if size <= 2 * SAMPLE_BYTES:
+                h.update(f.read())
+            else:
+                h.update(f.read(SAMPLE_BYTES))
+                f.seek(size - SAMPLE_BYTES)
+                h.update(f.read(SAMPLE_BYTES))
+    except OSError:
+        return None
+    return h.hexdigest()
+
+# -----------------------------
+# Detection
+# -----------------------------
+
+def folder_rank(entry: dict) -> tuple:
+    """Sort key, best copy first: has a sidecar, then the largest media, then path."""
+    largest = max((m["size"] for m in entry["media"]), default=0)
+    return (not entry["sidecar"], -largest, entry["folder"])
+
+
+def find_same_id(folders: list[dict]) -> list[dict]:
+    by_id: dict[str, list[dict]] = {}
+    for entry in folders:
+        if entry["media"]:
+            by_id.setdefault(entry["id"], []).append(entry)
+
+    groups = []
+    for vid, entries in sorted(by_id.items()):
+        if len(entries) < 2:
+            continue
+        entries.sort(key=folder_rank)
+        groups.append({
+            "id": vid,
+            "folders": [e["folder"] for e in entries],
+            "keep": entries[0]["folder"],
+            "remove": [e["folder"] for e in entries[1:]],
+        })
+    return groups
+
+
+def media_rank(media: dict) -> tuple:
+    suffix = Path(media["path"]).suffix.lower()
+    return (EXTENSION_PREFERENCE.index(suffix), -media["size"], media["path"])
+
+
+def find_multiple_media(folders: list[dict]) -> list[dict]:
+    groups = []
+    for entry in folders:
+        if len(entry["media"]) < 2:
+            continue
+        media = sorted(entry["media"], key=media_rank)
+        groups.append({
+            "folder": entry["folder"],
+            "files": [m["path"] for m in entry["media"]],
+            "keep": media[0]["path"],
+            "remove": [m["path"] for m in media[1:]],
+        })
+    return groups
+
+
+def content_rank(entry: dict) -> tuple:
+    """The original upload is kept: earliest upload_date first, then the usual rank."""
+    return (entry["sidecar"].get("upload_date") or "99999999", *folder_rank(entry))
+
+
+def find_content(folders: list[dict], workers: int) -> tuple[list[dict], int]:
+    """Returns (groups, files hashed)."""
+    by_size: dict[int, list[tuple[dict, dict]]] = {}
+    for entry in folders:
+        for media in entry["media"]:
+            by_size.setdefault(media["size"], []).append((entry, media))
+
+    # Only sizes shared by files of different IDs can be re-uploads
+    candidates = [
+        item for items in by_size.values()
+        if len({entry["id"] for entry, _ in items}) > 1
+        for item in items
+    ]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        digests = list(pool.map(lambda item: fingerprint(item[1]["file"], item[1]["size"]), candidates))
+
+    by_digest: dict[tuple[int, str], list[dict]] = {}
+    for (entry, media), digest in zip(candidates, digests):
+        if digest is not None:
+            by_digest.setdefault((media["size"], digest), []).append(entry)
+
+    groups = []
+    for (size, digest), entries in sorted(by_digest.items(), key=lambda kv: kv[1][0]["folder"]):
+        # One folder per ID; several copies of one ID are same-id duplicates
+        unique = {}
+        for entry in sorted(entries, key=content_rank):
+            unique.setdefault(entry["id"], entry)
+        if len(unique) < 2:
+            continue
+
+        entries = list(unique.values())
+        groups.append({
+            "size": size,
+            "fingerprint": digest,
+            "ids": [e["id"] for e in entries],
+            "folders": [e["folder"] for e in entries],
+            "keep": entries[0]["folder"],
+            "remove": [e["folder"] for e in entries[1:]],
+        })
+    return groups, len(candidates)
+
+
+def suggested_removals(same_id: list[dict], multiple: list[dict], content: list[dict]) -> list[dict]:
+    removals = {}
+    for reason, kind, groups in (
+        ("same-id", "folder", same_id),
+        ("content", "folder", content),
+        ("multiple-media", "file", multiple),
+    ):
+        for group in groups:
+            for path in group["remove"]:
+                removals.setdefault(path, {"path": path, "kind": kind, "reason": reason, "keep": group["keep"]})
+
+    # The copy to keep may itself be a duplicate of another one; point at the final copy
+    for r in removals.values():
+        seen = {r["path"]}
+        while r["keep"] in removals and r["keep"] not in seen:
+            seen.add(r["keep"])
+            r["keep"] = removals[r["keep"]]["keep"]
+
+    # A file inside a folder that is removed anyway needs no entry of its own
+    folders = {path for path, r in removals.items() if r["kind"] == "folder"}
+    return [
+        r for path, r in sorted(removals.items())
+        if r["kind"] == "folder" or path.rsplit("/", 1)[0] not in folders
+    ]
+
+# -----------------------------
+# Main
+# -----------------------------
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Find duplicate videos and suggest removals.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="parallel file hashes")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="JSON report (default: %(default)s)")
+    args = parser.parse_args()
+
+    try:
+        roots = archive_roots.load_roots()
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        return 1
+
+    folders = scan_folders()
+    same_id = find_same_id(folders)
+    multiple = find_multiple_media(folders)
+    content, hashed = find_content(folders, args.workers)
+    removals = suggested_removals(same_id, multiple, content)
+
+    report = {
+        "generated_at": datetime.utcnow().isoformat() + "Z",
+        "roots": {root.name: str(root.path) for root in roots},
+        "folders_scanned": len(folders),
+        "files_hashed": hashed,
+        "sample_bytes": SAMPLE_BYTES,
+        "same_id": same_id,
+        "multiple_media": multiple,
+        "content": content,
+        "suggested_removals": removals,
+    }
+    write_json_atomic(args.output, report, ensure_ascii=False)
+
+    print(f"[info] {len(folders)} folder(s) scanned, {hashed} file(s) fingerprinted.")
+    for group in same_id:
+        print(f"[WARN] same id {group['id']} in {', '.join(group['folders'])}")
+    for group in multiple:
+        print(f"[WARN] {len(group['files'])} media files in {group['folder']}")
+    for group in content:
+        print(f"[WARN] same content under ids {', '.join(group['ids'])}: {', '.join(group['folders'])}")
+
+    print(f"[OK] {len(removals)} suggested removal(s) written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
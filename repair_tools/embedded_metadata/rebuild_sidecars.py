@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Rebuild missing JSON sidecars from the metadata embedded in the videos.
+
+Videos without a sidecar are left out of catalog.json by Step 5. For every
+such folder in the archive, the title/uploader/date/description that
+yt-dlp --embed-metadata stored in the MP4 `ilst` or Matroska `Tags` are read
+(headers only, no network) and written as a sidecar marked
+"extracted_by": "embedded". Folders are processed by a pool of processes.
+Every archive root (archive_roots.json) is covered.
+
+Usage:
+    python3 rebuild_sidecars.py            # write sidecars
+    python3 rebuild_sidecars.py --dry-run  # only list what would be written
+"""
+
+import argparse
+import importlib
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+TOOLS_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(TOOLS_DIR))
+
+import archive_roots  # noqa: E402
+import metrics  # noqa: E402
+
+tagger = importlib.import_module("2a_tag_youtube_video")  # noqa: E402
+
+SKIP_DIRS = {"1_New_Downloads", "1 New Downloads"}
+VIDEO_EXTENSIONS = {".mp4", ".mkv", ".webm"}
+DEFAULT_WORKERS = os.cpu_count() or 2
+
+
+def find_missing() -> list[Path]:
+    """First video file of every <category>/<video_id> folder (of every root) without a .json."""
+    missing = []
+
+    for category_dir in archive_roots.category_dirs(SKIP_DIRS):
+        for video_dir in sorted(p for p in category_dir.iterdir() if p.is_dir()):
+            with os.scandir(video_dir) as entries:
+                names = sorted(e.name for e in entries if e.is_file())
+            if any(n.endswith(".json") for n in names):
+                continue
+            videos = [n for n in names if Path(n).suffix.lower() in VIDEO_EXTENSIONS]
+            if videos:
+                missing.append(video_dir / videos[0])
+
+    return missing
+
+
+def rebuild_one(video_path: Path, dry_run: bool) -> tuple[Path, str]:
+    """Returns (video, status); status is written / no-id / no-tags / error."""
+    try:
+        video_id = tagger.extract_video_id(video_path.name)
+    except ValueError:
+        return video_path, "no-id"
+
+    metadata = tagger.fetch_embedded_metadata(video_path, video_id)
+    if metadata is None:
+        return video_path, "no-tags"
+
+    if dry_run:
+        return video_path, "written"
+
+    try:
+        tagger.write_json_sidecar(video_path, metadata, extracted_by="embedded")
+    except OSError:
+        return video_path, "error"
+    return video_path, "written"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Rebuild missing sidecars from embedded metadata.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="parallel processes")
+    parser.add_argument("--dry-run", action="store_true", help="do not write anything")
+    args = parser.parse_args()
+
+    try:
+        missing = find_missing()
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        return 1
+
+    print(f"[info] {len(missing)} video(s) without a sidecar")
+    if not missing:
+        return 0
+
+    counts = {"written": 0, "no-id": 0, "no-tags": 0, "error": 0}
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for video_path, status in pool.map(rebuild_one, missing, [args.dry_run] * len(missing), chunksize=8):
+            counts[status] += 1
+            if not args.dry_run:
+                metrics.emit(
+                    "sidecar-rebuild", "ok" if status == "written" else "failed",
+                    reason=None if status == "written" else status,
+                    video_id=video_path.parent.name,
+                )
+            if status != "written":
+                print(f"[WARN] {status}: {archive_roots.label(video_path)}")
+            elif args.dry_run:
+                print(f"[dry-run] {archive_roots.label(video_path)}")
+
+    verb = "would be written" if args.dry_run else "written"
+    print(f"[OK] {counts['written']} sidecar(s) {verb}, {counts['no-tags']} without embedded tags, "
+          f"{counts['no-id']} without a video id, {counts['error']} error(s)")
+    if counts["written"] and not args.dry_run:
+        print("[info] Run 5_generate_catalog.py to add them to the catalog.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Find MP4 files that are not "faststart" and remux them.
+
+When the `moov` atom sits after the media data, a player has to read to the
+end of the file before playback starts, which is slow over a network share.
+The scan only reads top-level atom headers (a few bytes per file). Remuxing
+is a stream copy with `-movflags +faststart`, as in embed_metadata_webm()
+of 2a_tag_youtube_video.py.
+
+Each remux writes a temp file next to the original, checks the result and
+atomically replaces the original. A remux only starts when the disk has
+room for the copy (plus a margin), counting the copies still in progress.
+Every archive root (archive_roots.json) is scanned; free space is tracked
+per disk.
+
+Usage:
+    python3 faststart.py               # dry run: list files and byte totals
+    python3 faststart.py --remux       # remux them (2 at a time)
+    python3 faststart.py --remux --workers 4
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+TOOLS_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(TOOLS_DIR))
+
+import archive_roots  # noqa: E402
+import metrics  # noqa: E402
+from media_headers import is_faststart  # noqa: E402
+
+SKIP_DIRS = {"1_New_Downloads", "1 New Downloads"}
+DEFAULT_WORKERS = 2                      # remuxing is disk-bound
+FREE_SPACE_MARGIN = 1 << 30              # keep 1 GiB free on top of the copies
+
+
+def format_bytes(n: int) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if n < 1024:
+            return f"{n:.1f} {unit}" if unit != "B" else f"{n} B"
+        n /= 1024
+    return f"{n:.1f} TiB"
+
+
+def find_mp4s() -> list[Path]:
+    found = []
+    for category_dir in archive_roots.category_dirs(SKIP_DIRS):
+        found.extend(p for p in sorted(category_dir.glob("*/*")) if p.suffix.lower() == ".mp4")
+    return found
+
+
+def scan(paths: list[Path], workers: int) -> tuple[list[Path], list[Path]]:
+    """Returns (not faststart, unreadable)."""
+    with ThreadPoolExecutor(max_workers=max(workers, 8)) as pool:
+        results = list(pool.map(is_faststart, paths))
+
+    slow = [p for p, ok in zip(paths, results) if ok is False]
+    unreadable = [p for p, ok in zip(paths, results) if ok is None]
+    return slow, unreadable
+
+# -----------------------------
+# Free space accounting
+# -----------------------------
+
+class SpaceReservations:
+    """Bytes promised to remuxes still running, per device."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reserved: dict[int, int] = {}
+
+    def reserve(self, path: Path, size: int) -> bool:
+        device = path.parent.stat().st_dev
+        with self.lock:
+            free = shutil.disk_usage(path.parent).free - self.reserved.get(device, 0)
+            if free < size + FREE_SPACE_MARGIN:
+                return False
+            self.reserved[device] = self.reserved.get(device, 0) + size
+            return True
+
+    def release(self, path: Path, size: int):
+        device = path.parent.stat().st_dev
+        with self.lock:
+            self.reserved[device] -= size
+
+# -----------------------------
+# Remux
+# -----------------------------
+
+def remux(path: Path, space: SpaceReservations) -> tuple[str, str]:
+    """Returns (status, detail); status is ok / no-space / error."""
+    size = path.stat().st_size
+    if not space.reserve(path, size):
+        return "no-space", f"needs {format_bytes(size + FREE_SPACE_MARGIN)} free"
+
+    # Not *.mp4, so a leftover from a crash is never picked up as a video
+    tmp = path.with_name(f".{path.name}.faststart.tmp")
+    try:
+        result = subprocess.run(
+            [
+                "ffmpeg", "-nostdin", "-loglevel", "error", "-y",
+                "-i", str(path),
+                "-map", "0", "-map_metadata", "0",
+                "-c", "copy",
+                "-movflags", "+faststart",
+                "-f", "mp4",
+                str(tmp),
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+
+        if result.returncode != 0:
+            return "error", result.stderr.strip()[:200]
+        if is_faststart(tmp) is not True:
+            return "error", "remuxed file is still not faststart"
+
+        # ffmpeg creates the file with the umask's mode; keep the video's own.
+        # The mtime is left as ffmpeg set it: the catalog does not use it, and
+        # the probe/thumbnail caches and sync_archive see the rewrite by it.
+        try:
+            shutil.copymode(path, tmp)
+        except OSError:
+            pass  # filesystems without Unix permissions
+        os.replace(tmp, path)
+        return "ok", ""
+
+    except OSError as e:
+        return "error", str(e)
+    finally:
+        tmp.unlink(missing_ok=True)
+        space.release(path, size)
+
+
+def remux_timed(path: Path, space: SpaceReservations) -> tuple[str, str]:
+    started = time.monotonic()
+    status, detail = remux(path, space)
+    metrics.emit(
+        "faststart", "ok" if status == "ok" else "failed",
+        seconds=time.monotonic() - started,
+        bytes=path.stat().st_size if status == "ok" else None,
+        reason=None if status == "ok" else f"remux-{status}",
+    )
+    return status, detail
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Detect and fix MP4 files without faststart.")
+    parser.add_argument("--remux", action="store_true", help="remux the files found (default: dry run)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="parallel remuxes")
+    args = parser.parse_args()
+
+    try:
+        paths = find_mp4s()
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        return 1
+
+    slow, unreadable = scan(paths, args.workers)
+    slow_bytes = sum(p.stat().st_size for p in slow)
+
+    print(f"[info] {len(paths)} MP4 file(s) scanned, {len(slow)} not faststart, {len(unreadable)} unreadable")
+    for p in unreadable:
+        print(f"[WARN] unreadable: {archive_roots.label(p)}")
+
+    if not args.remux:
+        for p in slow:
+            print(f"[dry-run] {format_bytes(p.stat().st_size):>10}  {archive_roots.label(p)}")
+        peak = sum(sorted(p.stat().st_size for p in slow)[-args.workers:])
+        print(f"[dry-run] {format_bytes(slow_bytes)} would be rewritten "
+              f"(peak temp space with {args.workers} worker(s): up to {format_bytes(peak)})")
+        return 0
+
+    space = SpaceReservations()
+    counts = {"ok": 0, "no-space": 0, "error": 0}
+    done_bytes = 0
+
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(remux_timed, p, space): p for p in slow}
+        for future in as_completed(futures):
+            path = futures[future]
+            status, detail = future.result()
+            counts[status] += 1
+            if status == "ok":
+                done_bytes += path.stat().st_size
+                print(f"[OK] {archive_roots.label(path)}")
+            else:
+                print(f"[WARN] {status}: {archive_roots.label(path)}: {detail}")
+
+    print(f"[OK] {counts['ok']} file(s) remuxed ({format_bytes(done_bytes)}), "
+          f"{counts['no-space']} skipped for lack of space, {counts['error']} error(s)")
+    if counts["ok"]:
+        print("[info] Rerun media_probe.py to refresh the probe cache.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
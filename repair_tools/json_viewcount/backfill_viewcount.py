@@ -1,20 +1,87 @@
+"""
+Refresh view_count / view_count_date in every sidecar, stalest first.
+
+- Videos without a view_count come first, then oldest view_count_date
+- A failed fetch stamps view_count_checked, which counts as a refresh in
+  that order, so dead videos don't take the front of every run's budget
+- Videos in permanent_failures.txt (private/removed) are skipped; new
+  permanent failures are added to it
+- Fetches run on a bounded worker pool under one global request-rate cap
+- Stops at the per-run time or request budget; the next run picks up
+  where the staleness order left off
+- Sidecars are updated with sidecar_io.update_json (merged under the
+  folder lock, temp file + fsync + rename), so the tagger and the catalog
+  generator can run at the same time; the sidecar only keeps the latest
+  count, every snapshot is appended to view_history.sqlite
+
+Examples:
+    python3 backfill_viewcount.py                      # defaults below
+    python3 backfill_viewcount.py --max-requests 2000 --rate 1
+    python3 backfill_viewcount.py --missing-only       # old behaviour
+"""
+
+import argparse
 import json
 import subprocess
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
-ROOT = Path(__file__).resolve().parent.parent.parent.parent
+from view_history import ViewHistory
+
+TOOLS_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(TOOLS_DIR))
+
+import archive_roots  # noqa: E402
+import metrics  # noqa: E402
+import ytdlp_errors  # noqa: E402
+from sidecar_io import update_json  # noqa: E402
+
 EXCLUDE_DIR = "1_New_Downloads"
 FAIL_LOG = Path("view_count_failures.txt")
 
+DEFAULT_WORKERS = 4
+DEFAULT_RATE = 0.5          # yt-dlp requests per second, across all workers
+DEFAULT_MAX_SECONDS = 3600  # per-run wall clock budget
+REQUEST_TIMEOUT = 30
+
+log_lock = threading.Lock()
+
 
 def log_failure(path: Path, reason: str):
-    with FAIL_LOG.open("a", encoding="utf-8") as f:
-        f.write(f"{path} :: {reason}\n")
+    with log_lock:
+        with FAIL_LOG.open("a", encoding="utf-8") as f:
+            f.write(f"{path} :: {reason}\n")
+    metrics.emit("viewcount", "failed", reason=reason, video_id=path.parent.name)
+
+
+class RateLimiter:
+    """Spaces request starts at least 1/rate seconds apart, shared by all workers."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self, deadline: float) -> bool:
+        """Block until the next slot. Returns False if that slot is past the deadline."""
+        with self.lock:
+            now = time.monotonic()
+            slot = max(self.next_slot, now)
+            if slot >= deadline:
+                return False
+            self.next_slot = slot + self.interval
 
+        if slot > now:
+            time.sleep(slot - now)
+        return True
 
-def get_view_count(url: str) -> int | None:
+
+def get_view_count(url: str) -> tuple[int | None, str]:
+    """(view_count, failure class); the class is "" on success."""
     cmd = [
         "yt-dlp",
         "--cookies-from-browser", "firefox",
@@ -28,74 +95,143 @@ def get_view_count(url: str) -> int | None:
             cmd,
             capture_output=True,
             text=True,
-            timeout=30
+            timeout=REQUEST_TIMEOUT
         )
-    except Exception as e:
-        return None
+    except Exception:
+        return None, "network"
 
     if result.returncode != 0:
-        return None
+        return None, ytdlp_errors.classify(result.stderr)
 
     try:
         data = json.loads(result.stdout)
     except json.JSONDecodeError:
-        return None
-
-    return data.get("view_count")
-
-
-def process_json(path: Path):
-    try:
-        with path.open("r", encoding="utf-8") as f:
-            data = json.load(f)
-    except Exception:
-        log_failure(path, "invalid json")
-        print(f"[error] failed to load json: {path}")
-        return
+        return None, "error"
+
+    view_count = data.get("view_count")
+    return view_count, "" if view_count is not None else "error"
+
+
+def build_schedule(missing_only: bool) -> list[tuple[str, Path, str]]:
+    """
+    (last refresh date, sidecar, url) for every refreshable sidecar, oldest
+    first. The date is the later of view_count_date and view_count_checked
+    (last failed attempt); sidecars never tried sort first ("" date).
+    """
+    schedule = []
+    permanent = ytdlp_errors.load_permanent()
+
+    paths = (path for category_dir in archive_roots.category_dirs({EXCLUDE_DIR}) for path in category_dir.glob("*/*.json"))
+    for path in paths:
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            log_failure(path, "invalid json")
+            print(f"[error] failed to load json: {path}")
+            continue
 
-    if "view_count" in data:
-        return  # idempotent; remove if you want to overwrite
+        has_count = "view_count" in data
+        if missing_only and has_count:
+            continue
+        if (data.get("id") or path.parent.name) in permanent:
+            continue
 
-    url = data.get("webpage_url")
-    if not url:
-        log_failure(path, "missing webpage_url")
-        print(f"[error] failed to retrieve url {url}")
-        return
+        url = data.get("webpage_url")
+        if not url:
+            log_failure(path, "missing webpage_url")
+            print(f"[error] failed to retrieve url for {path.name}")
+            continue
 
-    print(f"[info] processing url: {url}")
+        date_key = str(data.get("view_count_date", "")) if has_count else ""
+        date_key = max(date_key, str(data.get("view_count_checked", "")))
+        schedule.append((date_key, path, url))
 
-    view_count = get_view_count(url)
-    if view_count is None:
-        log_failure(path, "view_count unavailable")
-        print(f"[warn] no view count extracted")
-        return
+    schedule.sort(key=lambda item: (item[0], str(item[1])))
+    return schedule
 
-    print(f"[info] retrieved view_count: {view_count}")
 
-    data["view_count"] = view_count
+def refresh_one(path: Path, url: str, limiter: RateLimiter, deadline: float, history: ViewHistory) -> str:
+    if not limiter.wait(deadline):
+        return "budget"
 
+    started = time.monotonic()
+    view_count, failure = get_view_count(url)
     date_str = datetime.now().strftime("%Y%m%d")
-    data["view_count_date"] = date_str
 
+    if view_count is None:
+        log_failure(path, f"view_count unavailable ({failure})")
+        print(f"[warn] no view count extracted ({failure}): {url}")
+        if ytdlp_errors.is_permanent(failure):
+            with log_lock:
+                ytdlp_errors.record_permanent(path.parent.name, failure, url)
+        try:
+            # Moves it back in the staleness order, like a refresh would
+            update_json(path, {"view_count_checked": date_str}, ensure_ascii=False)
+        except Exception as e:
+            print(f"[fatal error] failed to write json: {e}")
+        return "failed"
+
+    # Merged under the folder lock, so edits made since scheduling are kept.
     try:
-        with path.open("w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        data = update_json(
+            path,
+            {"view_count": view_count, "view_count_date": date_str, "view_count_checked": None},
+            ensure_ascii=False,
+        )
     except Exception as e:
         log_failure(path, "failed to write json")
         print(f"[fatal error] failed to write json: {e}")
+        return "failed"
+
+    if data is None:
+        log_failure(path, "invalid json")
+        return "failed"
 
-    print(f"[info] success!")
+    history.record(data.get("id") or path.parent.name, view_count, date_str)
+    metrics.emit("viewcount", "ok", seconds=time.monotonic() - started, video_id=path.parent.name)
+
+    print(f"[info] {view_count} views: {url}")
+    return "ok"
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Refresh sidecar view counts, stalest first.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="parallel yt-dlp processes")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="max requests per second overall")
+    parser.add_argument("--max-requests", type=int, default=None, help="stop after this many requests")
+    parser.add_argument("--max-seconds", type=float, default=DEFAULT_MAX_SECONDS, help="stop after this many seconds")
+    parser.add_argument("--missing-only", action="store_true", help="only fill sidecars that have no view_count")
+    args = parser.parse_args()
+
     if FAIL_LOG.exists():
         FAIL_LOG.unlink()
 
-    for json_path in ROOT.rglob("*.json"):
-        if EXCLUDE_DIR in json_path.parts:
-            continue
-        process_json(json_path)
+    deadline = time.monotonic() + args.max_seconds
+    try:
+        schedule = build_schedule(args.missing_only)
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        return 1
+    if args.max_requests is not None:
+        schedule = schedule[:args.max_requests]
+
+    print(f"[info] {len(schedule)} sidecar(s) scheduled, {args.workers} worker(s), {args.rate}/s")
+
+    limiter = RateLimiter(args.rate)
+    results = {"ok": 0, "failed": 0, "budget": 0}
+
+    with ViewHistory() as history, ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(refresh_one, path, url, limiter, deadline, history) for _, path, url in schedule]
+        for future in futures:
+            results[future.result()] += 1
+
+    print(
+        f"[info] refreshed {results['ok']}, failed {results['failed']}, "
+        f"left for next run {results['budget']}"
+    )
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
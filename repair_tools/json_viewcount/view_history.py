@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+View-count history store.
+
+Sidecars and the catalog only keep the latest view_count. Every snapshot
+taken by backfill_viewcount.py is also appended here, one row per
+(video, day), in a WITHOUT ROWID SQLite table whose primary key is the
+covering index for every query below.
+
+All queries are set-based: one SQL statement over the whole table, no
+per-video Python loops.
+
+Usage:
+    python3 view_history.py import                  # seed from current sidecars
+    python3 view_history.py video <video_id>        # full history of one video
+    python3 view_history.py top [-n 10] [--since YYYYMMDD]
+    python3 view_history.py growth [-n 10]          # fastest views/day
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import threading
+from datetime import date, datetime
+from pathlib import Path
+
+TOOLS_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(TOOLS_DIR))
+
+import archive_roots  # noqa: E402
+
+EXCLUDE_DIR = "1_New_Downloads"
+DB_PATH = Path(__file__).resolve().parent / "view_history.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS views (
+    video_id   TEXT    NOT NULL,
+    day        INTEGER NOT NULL,  -- date.toordinal()
+    view_count INTEGER NOT NULL,
+    PRIMARY KEY (video_id, day)
+) WITHOUT ROWID;
+"""
+
+# first and last snapshot per video; SQLite takes the bare columns from the
+# row that produced MIN()/MAX()
+FIRST_LAST_SQL = """
+SELECT f.video_id AS video_id, f.day AS d0, f.view_count AS c0, l.day AS d1, l.view_count AS c1
+FROM (SELECT video_id, MIN(day) AS day, view_count FROM views WHERE day >= ? GROUP BY video_id) AS f
+JOIN (SELECT video_id, MAX(day) AS day, view_count FROM views WHERE day >= ? GROUP BY video_id) AS l
+USING (video_id)
+"""
+
+
+def to_day(value: date | str | None) -> int:
+    """Accepts a date, a YYYYMMDD string, or None for today."""
+    if value is None:
+        return date.today().toordinal()
+    if isinstance(value, str):
+        return datetime.strptime(value, "%Y%m%d").date().toordinal()
+    return value.toordinal()
+
+
+def from_day(day: int) -> str:
+    return date.fromordinal(day).strftime("%Y%m%d")
+
+
+class ViewHistory:
+    """Thread-safe: backfill workers may call record() concurrently."""
+
+    def __init__(self, path: Path = DB_PATH):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    def close(self):
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- writing ----------
+
+    def record(self, video_id: str, view_count: int, day: date | str | None = None):
+        """Store a snapshot; a second snapshot on the same day replaces the first."""
+        self.record_many([(video_id, view_count, day)])
+
+    def record_many(self, rows):
+        values = [(vid, to_day(day), int(count)) for vid, count, day in rows]
+        with self.lock:
+            self.conn.executemany("INSERT OR REPLACE INTO views VALUES (?, ?, ?)", values)
+            self.conn.commit()
+
+    # ---------- queries ----------
+
+    def history(self, video_id: str) -> list[tuple[str, int]]:
+        rows = self.conn.execute(
+            "SELECT day, view_count FROM views WHERE video_id = ? ORDER BY day", (video_id,)
+        )
+        return [(from_day(day), count) for day, count in rows]
+
+    def first_last(self, since: str | None = None) -> dict[str, tuple[str, int, str, int]]:
+        """video_id -> (first_date, first_count, last_date, last_count)"""
+        start = to_day(since) if since else 0
+        rows = self.conn.execute(FIRST_LAST_SQL, (start, start))
+        return {
+            vid: (from_day(d0), c0, from_day(d1), c1)
+            for vid, d0, c0, d1, c1 in rows
+        }
+
+    def growth_rates(self, since: str | None = None, limit: int | None = None) -> list[tuple[str, float, int]]:
+        """
+        (video_id, views per day, views gained) between the first and last
+        snapshot, fastest first. Videos with a single snapshot are left out.
+        """
+        start = to_day(since) if since else 0
+        sql = f"""
+            SELECT video_id, CAST(c1 - c0 AS REAL) / (d1 - d0) AS rate, c1 - c0 AS gained
+            FROM ({FIRST_LAST_SQL})
+            WHERE d1 > d0
+            ORDER BY rate DESC
+        """
+        params = [start, start]
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return list(self.conn.execute(sql, params))
+
+    def top_movers(self, n: int = 10, since: str | None = None) -> list[tuple[str, int, float]]:
+        """(video_id, views gained, views per day), biggest absolute gain first."""
+        start = to_day(since) if since else 0
+        sql = f"""
+            SELECT video_id, c1 - c0 AS gained, CAST(c1 - c0 AS REAL) / MAX(d1 - d0, 1) AS rate
+            FROM ({FIRST_LAST_SQL})
+            WHERE d1 > d0
+            ORDER BY gained DESC
+            LIMIT ?
+        """
+        return list(self.conn.execute(sql, (start, start, n)))
+
+
+def import_sidecars(history: ViewHistory) -> int:
+    """Seed the store with the view_count currently held by every sidecar (of every archive root)."""
+    rows = []
+    paths = (path for category_dir in archive_roots.category_dirs({EXCLUDE_DIR}) for path in category_dir.glob("*/*.json"))
+    for path in paths:
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            continue
+        if data.get("view_count") is None or not data.get("view_count_date"):
+            continue
+        rows.append((data.get("id") or path.parent.name, data["view_count"], str(data["view_count_date"])))
+
+    history.record_many(rows)
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the view-count history store.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("import", help="seed from the view_count in current sidecars")
+
+    p_video = sub.add_parser("video", help="full history of one video")
+    p_video.add_argument("video_id")
+
+    for name in ("top", "growth"):
+        p = sub.add_parser(name)
+        p.add_argument("-n", type=int, default=10)
+        p.add_argument("--since", help="only snapshots on or after YYYYMMDD")
+
+    args = parser.parse_args()
+
+    with ViewHistory() as history:
+        if args.command == "import":
+            try:
+                print(f"[info] imported {import_sidecars(history)} snapshot(s)")
+            except ValueError as e:
+                print(f"[ERROR] {e}")
+                return 1
+
+        elif args.command == "video":
+            for day, count in history.history(args.video_id):
+                print(f"{day}  {count:,}")
+
+        elif args.command == "top":
+            for vid, gained, rate in history.top_movers(args.n, args.since):
+                print(f"{vid}  +{gained:,}  ({rate:,.1f}/day)")
+
+        elif args.command == "growth":
+            for vid, rate, gained in history.growth_rates(args.since, args.n):
+                print(f"{vid}  {rate:,.1f}/day  (+{gained:,})")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
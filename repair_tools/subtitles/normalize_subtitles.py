@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Collapse rolling YouTube auto-captions into compact, plain VTT files.
+
+--write-auto-subs VTTs repeat every line two or three times with inline
+<c> and timestamp tags. This rewrites each such file in place (atomically)
+with one plain cue per spoken line and reports the bytes saved. The
+original is kept as <name>.vtt.orig unless --discard-original is given.
+Files without inline timing tags are already compact and are left alone,
+so the tool is safe to re-run. Every archive root is covered.
+
+Usage:
+    python3 normalize_subtitles.py                    # rewrite in place, keep <name>.vtt.orig
+    python3 normalize_subtitles.py --dry-run          # only report savings
+    python3 normalize_subtitles.py --discard-original # no .orig copies
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from vtt import format_vtt, header_fields, is_rolling, parse_vtt
+
+TOOLS_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(TOOLS_DIR))
+
+import archive_roots  # noqa: E402
+
+SKIP_DIRS = {"1_New_Downloads", "1 New Downloads"}
+
+SUB_EXT = ".vtt"
+ORIGINAL_SUFFIX = ".orig"
+
+
+def find_subtitles() -> list[Path]:
+    found = []
+    for category_dir in archive_roots.category_dirs(SKIP_DIRS):
+        found.extend(sorted(category_dir.glob(f"*/*{SUB_EXT}")))
+    return found
+
+
+def normalize_file(path: Path, dry_run: bool, keep_original: bool) -> tuple[str, int, int]:
+    """Returns (status, bytes before, bytes after); status is one of ok / clean / error."""
+    try:
+        raw = path.read_bytes()
+        text = raw.decode("utf-8", errors="replace")
+    except OSError:
+        return "error", 0, 0
+
+    if not is_rolling(text):
+        return "clean", len(raw), len(raw)
+
+    compact = format_vtt(parse_vtt(text, collapse=True), header_fields(text)).encode("utf-8")
+
+    if dry_run:
+        return "ok", len(raw), len(compact)
+
+    try:
+        if keep_original:
+            original = path.with_name(path.name + ORIGINAL_SUFFIX)
+            if not original.exists():
+                original.write_bytes(raw)
+
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.write_bytes(compact)
+        os.replace(tmp, path)
+    except OSError:
+        return "error", len(raw), len(raw)
+
+    return "ok", len(raw), len(compact)
+
+
+def format_bytes(n: float) -> str:
+    for unit in ("B", "KB", "MB"):
+        if abs(n) < 1024:
+            return f"{n:,.1f} {unit}"
+        n /= 1024
+    return f"{n:,.1f} GB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collapse rolling auto-caption VTTs.")
+    parser.add_argument("--dry-run", action="store_true", help="report savings without writing")
+    parser.add_argument(
+        "--discard-original", action="store_true",
+        help=f"do not keep the original as <name>{SUB_EXT}{ORIGINAL_SUFFIX}",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    try:
+        paths = find_subtitles()
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        return 1
+    print(f"[info] {len(paths)} subtitle file(s) found")
+
+    counts = {"ok": 0, "clean": 0, "error": 0}
+    before = after = 0
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        results = pool.map(
+            normalize_file, paths,
+            [args.dry_run] * len(paths), [not args.discard_original] * len(paths),
+            chunksize=64,
+        )
+        for path, (status, size_before, size_after) in zip(paths, results):
+            counts[status] += 1
+            if status == "error":
+                print(f"[error] failed to normalize {archive_roots.label(path)}")
+                continue
+            before += size_before
+            after += size_after
+
+    label = "to normalize" if args.dry_run else "normalized"
+    print(f"[info] {label} {counts['ok']}, already compact {counts['clean']}, errors {counts['error']}")
+    print(f"[info] {format_bytes(before)} -> {format_bytes(after)} ({format_bytes(before - after)} saved)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Full-text search index over every subtitle in the archive.
+
+Each VTT cue becomes one (video_id, start_ms, text) row in an SQLite FTS5
+table stored next to catalog.json (subtitle_index.sqlite), so the GUI can
+jump straight to the matching moment.
+
+Files are tracked by (size, mtime): re-runs only parse subtitles that are
+new or changed, and drop rows for subtitles that were deleted. Every
+archive root is indexed (paths on other roots as "disk2:Music/..."); rows
+of a root that is not mounted are kept.
+
+Usage:
+    python3 subtitle_index.py update
+    python3 subtitle_index.py search "never gonna give you up" [-n 20] [--json]
+    python3 subtitle_index.py search 'rick NEAR/5 astley' --raw
+"""
+
+import argparse
+import json
+import re
+import sqlite3
+import sys
+from pathlib import Path
+
+from vtt import read_vtt
+
+TOOLS_DIR = Path(__file__).resolve().parent.parent.parent  # 1_New_Downloads
+sys.path.insert(0, str(TOOLS_DIR))
+
+import archive_roots  # noqa: E402
+
+SKIP_DIRS = {"1_New_Downloads", "1 New Downloads"}
+DB_PATH = TOOLS_DIR / "subtitle_index.sqlite"
+
+SUB_EXT = ".vtt"
+VIDEO_ID_RE = re.compile(r"\[([A-Za-z0-9_-]{11})\]")
+
+# cue rowid = file_id << CUE_BITS | cue number, so one file's cues are a
+# contiguous rowid range and can be deleted without scanning the FTS table
+CUE_BITS = 24
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    file_id  INTEGER PRIMARY KEY,
+    path     TEXT    NOT NULL UNIQUE,  -- archive_roots.label(): relative to its root
+    video_id TEXT    NOT NULL,
+    size     INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS cues USING fts5(
+    text,
+    video_id UNINDEXED,
+    start_ms UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+def connect(path: Path = DB_PATH) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript(SCHEMA)
+    except sqlite3.OperationalError as e:
+        raise RuntimeError(f"SQLite FTS5 is required for the subtitle index: {e}")
+    return conn
+
+
+def find_subtitles() -> dict[str, tuple[Path, int, int]]:
+    """label -> (path, size, mtime_ns) for every <category>/<video_id>/*.vtt of every root"""
+    found = {}
+    for category_dir in archive_roots.category_dirs(SKIP_DIRS):
+        for path in category_dir.glob(f"*/*{SUB_EXT}"):
+            st = path.stat()
+            found[archive_roots.label(path)] = (path, st.st_size, st.st_mtime_ns)
+    return found
+
+
+def unmounted_prefixes() -> tuple[str, ...]:
+    """Label prefixes of the roots that are not mounted now; their rows are left alone."""
+    return tuple(f"{root.name}:" for root in archive_roots.load_roots() if not root.path.is_dir())
+
+
+def delete_file(conn: sqlite3.Connection, file_id: int):
+    first = file_id << CUE_BITS
+    conn.execute("DELETE FROM cues WHERE rowid BETWEEN ? AND ?", (first, first + (1 << CUE_BITS) - 1))
+    conn.execute("DELETE FROM files WHERE file_id = ?", (file_id,))
+
+
+def index_file(conn: sqlite3.Connection, rel: str, path: Path, size: int, mtime_ns: int) -> int:
+    match = VIDEO_ID_RE.search(path.name)
+    video_id = match.group(1) if match else path.parent.name
+
+    # Read before the files row exists: a file that fails to read stays
+    # unindexed and is retried on the next run
+    cues = read_vtt(path)[: (1 << CUE_BITS) - 1]
+
+    cur = conn.execute(
+        "INSERT INTO files (path, video_id, size, mtime_ns) VALUES (?, ?, ?, ?)",
+        (rel, video_id, size, mtime_ns),
+    )
+    base = cur.lastrowid << CUE_BITS
+    conn.executemany(
+        "INSERT INTO cues (rowid, text, video_id, start_ms) VALUES (?, ?, ?, ?)",
+        ((base + i, cue.text, video_id, cue.start_ms) for i, cue in enumerate(cues)),
+    )
+    return len(cues)
+
+
+def update_index(conn: sqlite3.Connection) -> tuple[int, int, int]:
+    """Returns (files indexed, files removed, cues added)."""
+    on_disk = find_subtitles()
+    offline = unmounted_prefixes()
+    known = {
+        rel: (file_id, size, mtime_ns)
+        for file_id, rel, size, mtime_ns in conn.execute("SELECT file_id, path, size, mtime_ns FROM files")
+    }
+
+    indexed = removed = added = 0
+
+    with conn:
+        for rel, (file_id, size, mtime_ns) in known.items():
+            current = on_disk.get(rel)
+            if current and current[1:] == (size, mtime_ns):
+                del on_disk[rel]  # unchanged
+                continue
+            if not current and offline and rel.startswith(offline):
+                continue  # its disk is not mounted, not deleted
+            delete_file(conn, file_id)
+            if not current:
+                removed += 1
+
+        for rel, (path, size, mtime_ns) in sorted(on_disk.items()):
+            try:
+                added += index_file(conn, rel, path, size, mtime_ns)
+                indexed += 1
+            except OSError as e:
+                print(f"[warn] failed to read {rel}: {e}")
+
+    return indexed, removed, added
+
+
+def search(conn: sqlite3.Connection, query: str, limit: int = 20, raw: bool = False) -> list[dict]:
+    """
+    Matching cues, best first: {"video_id", "start_ms", "text"}.
+    Without `raw` the query is matched as one phrase.
+    """
+    if not raw:
+        query = '"' + query.replace('"', '""') + '"'
+
+    rows = conn.execute(
+        """
+        SELECT video_id, start_ms, text
+        FROM cues
+        WHERE cues MATCH ?
+        GROUP BY video_id, start_ms
+        ORDER BY MIN(rank)
+        LIMIT ?
+        """,
+        (query, limit),
+    )
+    return [{"video_id": vid, "start_ms": start_ms, "text": text} for vid, start_ms, text in rows]
+
+
+def format_ms(ms: int) -> str:
+    seconds = ms // 1000
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Subtitle full-text index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("update", help="index new or changed subtitles")
+
+    p_search = sub.add_parser("search", help="find cues containing a phrase")
+    p_search.add_argument("query")
+    p_search.add_argument("-n", type=int, default=20)
+    p_search.add_argument("--raw", action="store_true", help="pass the query to FTS5 unchanged")
+    p_search.add_argument("--json", action="store_true", help="machine-readable output")
+
+    args = parser.parse_args()
+    conn = connect()
+
+    if args.command == "update":
+        try:
+            indexed, removed, added = update_index(conn)
+        except ValueError as e:
+            print(f"[ERROR] {e}")
+            conn.close()
+            return 1
+        print(f"[info] indexed {indexed} file(s) ({added} cues), removed {removed}")
+
+    elif args.command == "search":
+        hits = search(conn, args.query, args.n, args.raw)
+        if args.json:
+            print(json.dumps(hits, ensure_ascii=False, indent=2))
+        else:
+            for hit in hits:
+                print(f"{hit['video_id']}  {format_ms(hit['start_ms'])}  {hit['text']}")
+
+    conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
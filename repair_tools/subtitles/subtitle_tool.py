@@ -1,46 +1,74 @@
 #!/usr/bin/env python3
-
+"""
+Backfill English subtitles for every video in the archive.
+
+Phase 1: one directory listing per video folder decides whether subtitles
+         are missing and where the metadata JSON is.
+Phase 2: a bounded pool of yt-dlp processes fetches the missing ones.
+
+Progress is kept in subtitle_state.json next to this script. Videos that
+have no subtitles (yt-dlp succeeded without writing any) or that are
+private/removed are not retried on the next run (use --retry-failed).
+Rate limits, network errors and other failures (classified with
+ytdlp_errors.py) are retried next time, and Ctrl+C stops cleanly with the
+state saved and the interrupted fetches left unrecorded.
+"""
+
+import argparse
 import json
+import os
 import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
-ROOT = Path(__file__).resolve().parent.parent.parent.parent
-SKIP_DIRS = {"1 New Downloads"}
+TOOLS_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(TOOLS_DIR))
+
+import archive_roots  # noqa: E402
+import ytdlp_errors  # noqa: E402
+
+SKIP_DIRS = {"1_New_Downloads", "1 New Downloads"}
+STATE_PATH = Path(__file__).resolve().parent / "subtitle_state.json"
 
 SUB_LANG = "en"
 SUB_EXT = ".vtt"
+DEFAULT_WORKERS = 4
+
+NO_SUBTITLES = "no-subtitles"  # yt-dlp exited 0 without writing any
 
 SKIPPED = []
 
 
-def find_metadata_json(video_dir: Path, video_id: str) -> Path | None:
+def scan_video_dir(video_dir: Path, video_id: str) -> tuple[bool, Path | None]:
     """
-    Find the metadata JSON assumed to be named *[<video_id>].json
+    Single listing of a video folder.
+    Returns (subtitles present, metadata JSON named *[<video_id>].json or None).
     """
-    for file in video_dir.iterdir():
-        if file.suffix == ".json" and f"[{video_id}]" in file.name:
-            return file
-    return None
+    has_subs = False
+    meta_json = None
+    tag = f"[{video_id}]"
+
+    with os.scandir(video_dir) as entries:
+        for entry in entries:
+            if tag not in entry.name or not entry.is_file():
+                continue
+            if entry.name.endswith(SUB_EXT) and f".{SUB_LANG}" in entry.name:
+                has_subs = True
+            elif entry.name.endswith(".json") and meta_json is None:
+                meta_json = Path(entry.path)
+
+    return has_subs, meta_json
 
 
 def subtitles_exist(video_dir: Path, video_id: str) -> bool:
+    return scan_video_dir(video_dir, video_id)[0]
+
+
+def fetch_subtitles(video_dir: Path, video_id: str, url: str) -> str | None:
     """
-    Check for any English VTT subtitle containing the video ID.
-    """
-    for file in video_dir.iterdir():
-        if (
-            file.is_file()
-            and file.suffix == SUB_EXT
-            and f".{SUB_LANG}" in file.name
-            and f"[{video_id}]" in file.name
-        ):
-            return True
-    return False
-
-
-def fetch_subtitles(video_dir: Path, video_id: str) -> bool:
-    """
-    Invoke yt-dlp to fetch subtitles only
+    Invoke yt-dlp to fetch subtitles only.
+    Returns None if they were fetched, else NO_SUBTITLES or the ytdlp_errors class.
     """
     cmd = [
         "yt-dlp",
@@ -50,62 +78,157 @@ def fetch_subtitles(video_dir: Path, video_id: str) -> bool:
         "--write-auto-subs",
         "--sub-langs", f"{SUB_LANG}.*",
         "--sub-format", "vtt",
-        "--", video_id,
+        "--no-playlist",
+        "--", url,
     ]
 
-    subprocess.run(cmd, cwd=video_dir, check=False)
-
-    return subtitles_exist(video_dir, video_id)
-
-
-def process_video_dir(video_dir: Path):
-    video_id = video_dir.name
+    result = subprocess.run(cmd, cwd=video_dir, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=False)
 
     if subtitles_exist(video_dir, video_id):
-        print(f"    ✓ Subtitles already exist for {video_id}")
-        return
+        return None
+    if result.returncode == 0:
+        return NO_SUBTITLES
+    return ytdlp_errors.classify(result.stderr)
+
 
-    meta_json = find_metadata_json(video_dir, video_id)
-    if not meta_json:
-        print(f"    ⚠️  No metadata JSON found for {video_id}")
-        SKIPPED.append(f"No metadata found for: {video_id}")
-        return
+# -----------------------------
+# Resume state
+# -----------------------------
 
+def load_state() -> dict:
     try:
-        with meta_json.open("r", encoding="utf-8") as f:
-            data = json.load(f)
-    except Exception as e:
-        print(f"    ❌ Failed to read JSON for {video_id}: {e}")
-        return
+        with STATE_PATH.open("r", encoding="utf-8") as f:
+            state = json.load(f)
+    except Exception:
+        state = {}
+    state.setdefault("failed", {})
+    return state
 
-    url = data.get("webpage_url")
-    if not url:
-        print(f"    ⚠️  No webpage_url in JSON for {video_id}")
-        return
 
-    print(f"    ⬇ Fetching subtitles for {video_id}")
-    if not fetch_subtitles(video_dir, video_id):
-        SKIPPED.append(f"yt-dlp failure, skipped: {video_id}")
+def save_state(state: dict):
+    tmp = STATE_PATH.with_name(f".{STATE_PATH.name}.tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, STATE_PATH)
 
 
-def main():
-    for category_dir in ROOT.iterdir():
-        if not category_dir.is_dir():
-            continue
-        if category_dir.name in SKIP_DIRS:
-            continue
+# -----------------------------
+# Phases
+# -----------------------------
+
+def plan_jobs(state: dict, retry_failed: bool) -> list[tuple[Path, str, str]]:
+    """Phase 1: (video_dir, video_id, url) for every video missing subtitles."""
+    jobs = []
 
-        print(f"\nProcessing category: {category_dir.name}")
+    for category_dir in archive_roots.category_dirs(SKIP_DIRS):
+        print(f"Scanning category: {archive_roots.label(category_dir)}")
 
-        for video_dir in category_dir.iterdir():
+        for video_dir in sorted(category_dir.iterdir()):
             if not video_dir.is_dir():
                 continue
 
-            process_video_dir(video_dir)
+            video_id = video_dir.name
+            has_subs, meta_json = scan_video_dir(video_dir, video_id)
+
+            if has_subs:
+                continue
+
+            if video_id in state["failed"] and not retry_failed:
+                continue
+
+            if not meta_json:
+                print(f"    ⚠️  No metadata JSON found for {video_id}")
+                SKIPPED.append(f"No metadata found for: {video_id}")
+                continue
+
+            try:
+                with meta_json.open("r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except Exception as e:
+                print(f"    ❌ Failed to read JSON for {video_id}: {e}")
+                continue
+
+            url = data.get("webpage_url")
+            if not url:
+                print(f"    ⚠️  No webpage_url in JSON for {video_id}")
+                SKIPPED.append(f"No webpage_url for: {video_id}")
+                continue
+
+            jobs.append((video_dir, video_id, url))
+
+    return jobs
+
+
+def run_jobs(jobs: list[tuple[Path, str, str]], state: dict, workers: int):
+    """Phase 2: fetch concurrently, recording every result in the state file."""
+    fetched = 0
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    futures = {
+        pool.submit(fetch_subtitles, video_dir, video_id, url): video_id
+        for video_dir, video_id, url in jobs
+    }
+
+    try:
+        for future in as_completed(futures):
+            video_id = futures[future]
+            try:
+                failure = future.result()
+            except Exception as e:
+                # A bug or I/O error in one job must not lose the others' results
+                state["failed"][video_id] = f"error: {e}"
+                SKIPPED.append(f"error ({e}), skipped: {video_id}")
+                save_state(state)
+                continue
+
+            if failure is None:
+                fetched += 1
+                state["failed"].pop(video_id, None)
+                print(f"    ✓ Subtitles fetched for {video_id}")
+            elif failure == NO_SUBTITLES or ytdlp_errors.is_permanent(failure):
+                state["failed"][video_id] = failure
+                SKIPPED.append(f"{failure}, skipped: {video_id}")
+            else:
+                # Transient (rate limit, network, ...): retried on the next run
+                SKIPPED.append(f"yt-dlp failure ({failure}), retry next run: {video_id}")
+                continue
+            save_state(state)
+    except KeyboardInterrupt:
+        # The children got the Ctrl+C too; nothing finishing from here on is
+        # recorded, their failures mean nothing
+        print("\nInterrupted, finishing running fetches...")
+        pool.shutdown(wait=True, cancel_futures=True)
+        save_state(state)
+        raise
+
+    pool.shutdown(wait=True)
+    print(f"\nFetched subtitles for {fetched}/{len(jobs)} video(s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill missing English subtitles.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="parallel yt-dlp processes")
+    parser.add_argument("--retry-failed", action="store_true", help="also retry videos that failed before")
+    args = parser.parse_args()
+
+    state = load_state()
+    try:
+        jobs = plan_jobs(state, args.retry_failed)
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        return 1
+    print(f"\n{len(jobs)} video(s) missing subtitles")
+
+    try:
+        run_jobs(jobs, state, args.workers)
+    except KeyboardInterrupt:
+        return 130
 
     for video in SKIPPED:
         print(video)
 
+    return 0
+
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Minimal WebVTT reader shared by the subtitle tools.
+
+Only what yt-dlp writes is supported: a WEBVTT header, optional
+NOTE/STYLE/REGION blocks, and cues with an optional identifier line.
+
+YouTube auto-captions ("rolling" cues) repeat every line two or three
+times: once with inline <00:00:01.000><c> word timings, again as the top
+line of the next cue, and once more in a 10 ms bridging cue. Those are
+detected by their inline timestamps and collapsed so each spoken line
+appears once. The line a cue adds is found by its position and tags, not
+by its text, so a line that is really said twice is kept twice.
+"""
+
+import html
+import re
+from pathlib import Path
+from typing import NamedTuple
+
+TIMING_RE = re.compile(
+    r"^\s*((?:\d+:)?\d{2}:\d{2}\.\d{3})\s+-->\s+((?:\d+:)?\d{2}:\d{2}\.\d{3})"
+)
+TAG_RE = re.compile(r"<[^>]*>")
+SPACE_RE = re.compile(r"\s+")
+INLINE_TIMESTAMP_RE = re.compile(r"<\d{2}:\d{2}:\d{2}\.\d{3}>")
+INLINE_TIMING_RE = re.compile(r"<\d{2}:\d{2}:\d{2}\.\d{3}>|</?c[.>]")
+HEADER_FIELD_RE = re.compile(r"^(Kind|Language):", re.MULTILINE)
+
+
+class Cue(NamedTuple):
+    start_ms: int
+    end_ms: int
+    text: str
+
+
+def parse_timestamp(value: str) -> int:
+    """'01:02:03.456' or '02:03.456' -> milliseconds"""
+    parts = value.split(":")
+    seconds, millis = parts[-1].split(".")
+    total = int(seconds) + 60 * int(parts[-2])
+    if len(parts) == 3:
+        total += 3600 * int(parts[0])
+    return total * 1000 + int(millis)
+
+
+def clean_line(line: str) -> str:
+    """Drop inline tags (<c>, <00:00:01.000>, <i>...) and entities from one cue line."""
+    return SPACE_RE.sub(" ", html.unescape(TAG_RE.sub("", line))).strip()
+
+
+def iter_cue_blocks(text: str):
+    """Yield (start_ms, end_ms, raw payload lines) for every cue block."""
+    for block in re.split(r"\n{2,}", text.replace("\r\n", "\n").replace("\r", "\n")):
+        lines = block.strip("\n").split("\n")
+
+        for i, line in enumerate(lines[:2]):
+            match = TIMING_RE.match(line)
+            if match:
+                yield parse_timestamp(match.group(1)), parse_timestamp(match.group(2)), lines[i + 1:]
+                break
+        # blocks without a timing line: header, NOTE, STYLE, REGION
+
+
+def is_rolling(text: str) -> bool:
+    return INLINE_TIMESTAMP_RE.search(text) is not None
+
+
+def new_lines(raw_lines: list[str], carried: str | None) -> list[str]:
+    """
+    Cleaned lines a rolling cue adds. A line with inline word timings is
+    always new. Otherwise only an untagged top line equal to the previous
+    cue's last line is the carry-over; everything below it is new
+    (one-word lines carry no timings).
+    """
+    added = []
+    top = True
+    for raw in raw_lines:
+        line = clean_line(raw)
+        if not line:
+            continue
+        if top and line == carried and INLINE_TIMING_RE.search(raw) is None:
+            top = False
+            continue
+        top = False
+        added.append(line)
+    return added
+
+
+def collapse_rolling(blocks) -> list[Cue]:
+    """Keep only the lines each rolling cue adds; bridging cues vanish."""
+    cues = []
+    carried = None  # last line shown by the previous cue
+
+    for start_ms, end_ms, raw_lines in blocks:
+        new = new_lines(raw_lines, carried)
+        shown = [line for line in map(clean_line, raw_lines) if line]
+        if shown:
+            carried = shown[-1]
+        if new:
+            cues.append(Cue(start_ms, end_ms, " ".join(new)))
+
+    return cues
+
+
+def parse_vtt(text: str, collapse: bool | None = None) -> list[Cue]:
+    """
+    Cues with plain text. Rolling auto-captions are collapsed when `collapse`
+    is True, or when it is None and inline timestamps are present.
+    """
+    if collapse is None:
+        collapse = is_rolling(text)
+
+    if collapse:
+        return collapse_rolling(iter_cue_blocks(text))
+
+    cues = []
+    for start_ms, end_ms, raw_lines in iter_cue_blocks(text):
+        cue_text = " ".join(line for line in map(clean_line, raw_lines) if line)
+        if cue_text:
+            cues.append(Cue(start_ms, end_ms, cue_text))
+    return cues
+
+
+def read_vtt(path: Path) -> list[Cue]:
+    return parse_vtt(path.read_text(encoding="utf-8", errors="replace"))
+
+
+def format_timestamp(ms: int) -> str:
+    seconds, millis = divmod(ms, 1000)
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}.{millis:03d}"
+
+
+def format_vtt(cues: list[Cue], header_fields: list[str] | None = None) -> str:
+    """Compact WebVTT: header, then one plain-text line per cue."""
+    out = ["WEBVTT", *(header_fields or []), ""]
+    for cue in cues:
+        out.append(f"{format_timestamp(cue.start_ms)} --> {format_timestamp(cue.end_ms)}")
+        out.append(html.escape(cue.text, quote=False))
+        out.append("")
+    return "\n".join(out)
+
+
+def header_fields(text: str) -> list[str]:
+    """'Kind: ...' / 'Language: ...' lines of the header block, to carry over."""
+    header = re.split(r"\n{2,}", text.replace("\r\n", "\n"), maxsplit=1)[0]
+    return [line.strip() for line in header.split("\n") if HEADER_FIELD_RE.match(line.strip())]
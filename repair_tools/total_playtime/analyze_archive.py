@@ -4,25 +4,33 @@
 ===========================================================
 VISORUM ARCHIVE ANALYZER
 -----------------------------------------------------------
-Single-pass statistics generator for catalog.json
-Relative path: ../../catalog.json
+Column-based statistics generator for catalog.json
+(see archive_stats.py in 1_New_Downloads)
+Catalog path: 1_New_Downloads/catalog.json
 ===========================================================
 """
 
 # ========================
 # IMPORTS
 # ========================
+import argparse
 import json
-import heapq
-from collections import defaultdict
+import sys
+from collections import Counter
 from pathlib import Path
 
+TOOLS_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(TOOLS_DIR))
+
+import archive_stats as stats  # noqa: E402
+
 
 # ========================
 # CONSTANTS
 # ========================
-CATALOG_PATH = Path("../../catalog.json")
+CATALOG_PATH = TOOLS_DIR / "catalog.json"
 TOP_N = 5
+UPLOADER_MIN_VIDEOS = 3
 
 
 # ========================
@@ -30,40 +38,46 @@ TOP_N = 5
 # ========================
 def format_duration(seconds: int) -> str:
     """Convert seconds → H:M:S"""
+    seconds = int(seconds)
     hours = seconds // 3600
     minutes = (seconds % 3600) // 60
     secs = seconds % 60
     return f"{hours}h {minutes}m {secs}s"
 
 
-def push_top(heap, item, max_size=TOP_N):
-    """
-    Maintain a fixed-size min-heap for top N values.
-    Stores (view_count, title)
-    """
-    if len(heap) < max_size:
-        heapq.heappush(heap, item)
-    else:
-        heapq.heappushpop(heap, item)
+def print_histogram(title: str, edges: list[int], counts: list[int], fmt):
+    print(f"\n{title}:")
+    width = max(counts, default=0) or 1
+    for i, count in enumerate(counts):
+        if i + 1 < len(edges):
+            label = f"{fmt(edges[i])} – {fmt(edges[i + 1])}"
+        else:
+            label = f"{fmt(edges[i])}+"
+        print(f"  {label:>22}  {count:>7,}  {'#' * round(30 * count / width)}")
 
 
-def push_bottom(heap, item, max_size=TOP_N):
-    """
-    Maintain fixed-size max-heap for lowest N values.
-    We invert view_count so heapq still works as min-heap.
-    Stores (-view_count, title)
-    """
-    inverted = (-item[0], item[1])
-    if len(heap) < max_size:
-        heapq.heappush(heap, inverted)
-    else:
-        heapq.heappushpop(heap, inverted)
+def print_groups(title: str, groups: dict[str, dict], min_count: int = 0):
+    print("\n============================")
+    print(title)
+    print("============================")
+    for name, g in sorted(groups.items()):
+        if g["count"] < min_count:
+            continue
+        print(f"\n{name}")
+        print(f"  Videos: {g['count']}")
+        print(f"  Total Duration: {format_duration(g['duration'])}")
+        print(f"  Total Views: {g['views']:,}")
 
 
 # ========================
 # MAIN
 # ========================
 def main():
+    parser = argparse.ArgumentParser(description="Archive statistics from catalog.json.")
+    parser.add_argument("--uploaders", type=int, nargs="?", const=UPLOADER_MIN_VIDEOS, default=None,
+                        metavar="MIN_VIDEOS", help=f"also list uploaders with at least MIN_VIDEOS videos (default {UPLOADER_MIN_VIDEOS})")
+    args = parser.parse_args()
+
     if not CATALOG_PATH.exists():
         print(f"Catalog file not found at {CATALOG_PATH}")
         return
@@ -71,88 +85,23 @@ def main():
     with open(CATALOG_PATH, "r", encoding="utf-8") as f:
         data = json.load(f)
 
-    # Allow either list or {"videos": [...]}
-    #if isinstance(data, dict):
-        #videos = data.get("videos", [])
-        #videos = data["videos"]
-    #else:
-        #videos = data
+    videos = data.get("videos", {})
 
     # ========================
-    # GLOBAL ARCHIVE STATS
+    # COLUMNS + REDUCTIONS
     # ========================
-    total_videos = 0
-    total_duration = 0
-    total_views = 0
+    cols = stats.load_columns(videos)
+    summary = data.get("summary") or stats.summarize(videos)
 
-    tag_counter = defaultdict(int)
+    total_videos = summary["videos"]
+    total_duration = summary["total_duration"]
+    total_views = summary["total_views"]
 
-    top_videos = []      # min-heap
-    bottom_videos = []   # inverted min-heap
+    top_videos = [(int(cols["views"][i]), cols["titles"][i]) for i in stats.top_n(cols["views"], TOP_N)]
+    lowest_videos = [(int(cols["views"][i]), cols["titles"][i]) for i in stats.top_n(cols["views"], TOP_N, largest=False)]
 
-    # ========================
-    # PER GENRE / UPLOADER
-    # ========================
-    genre_stats = {}
-    uploader_stats = {}
-
-    # ========================
-    # SINGLE PASS LOOP
-    # ========================
-    for video, data in data.get("videos", {}).items():
-        total_videos += 1
-
-        title = data.get("title", "UNKNOWN")
-        genre = data.get("genre", "UNKNOWN")
-        uploader = data.get("uploader", "UNKNOWN")
-        duration = int(data.get("duration", 0))
-        view_count = int(data.get("view_count", 0))
-        tags = data.get("tags", [])
-
-        # ----- Global counters -----
-        total_duration += duration
-        total_views += view_count
-
-        push_top(top_videos, (view_count, title))
-        push_bottom(bottom_videos, (view_count, title))
-
-        for tag in tags:
-            tag_counter[tag] += 1
-
-        # ----- Genre stats -----
-        if genre not in genre_stats:
-            genre_stats[genre] = {
-                "count": 0,
-                "duration": 0,
-                "views": 0,
-            }
-
-        genre_stats[genre]["count"] += 1
-        genre_stats[genre]["duration"] += duration
-        genre_stats[genre]["views"] += view_count
-
-        # ----- Uploader stats -----
-        if uploader not in uploader_stats:
-            uploader_stats[uploader] = {
-                "count": 0,
-                "duration": 0,
-                "views": 0,
-            }
-
-        uploader_stats[uploader]["count"] += 1
-        uploader_stats[uploader]["duration"] += duration
-        uploader_stats[uploader]["views"] += view_count
-
-    # ========================
-    # FINAL COMPUTATIONS
-    # ========================
-    top_tags = heapq.nlargest(TOP_N, tag_counter.items(), key=lambda x: x[1])
-
-    # Convert bottom heap back
-    lowest_videos = [(-v, t) for v, t in bottom_videos]
-    lowest_videos.sort()
-
-    top_videos.sort(reverse=True)
+    tag_counter = Counter(tag for record in videos.values() for tag in (record.get("tags") or []))
+    top_tags = tag_counter.most_common(TOP_N)
 
     # ========================
     # PRINT RESULTS
@@ -165,36 +114,37 @@ def main():
     print(f"Total views: {total_views:,}")
     print(f"Average duration: {format_duration(total_duration // max(total_videos, 1))}")
 
-    print("\nTop 5 Most Viewed:")
+    print("\nDuration percentiles:")
+    for p, value in summary["duration_percentiles"].items():
+        print(f"  {p:>4}: {format_duration(value)}")
+
+    print("\nView count percentiles:")
+    for p, value in summary["views_percentiles"].items():
+        print(f"  {p:>4}: {int(value):,}")
+
+    hist = summary["duration_histogram"]
+    print_histogram("Duration histogram", hist["edges"], hist["counts"], lambda s: f"{s // 60}m")
+    hist = summary["views_histogram"]
+    print_histogram("Views histogram", hist["edges"], hist["counts"], lambda v: f"{v:,}")
+
+    print(f"\nTop {TOP_N} Most Viewed:")
     for views, title in top_videos:
         print(f"{views:,} views — {title}")
 
-    print("\nTop 5 Least Viewed:")
+    print(f"\nTop {TOP_N} Least Viewed:")
     for views, title in lowest_videos:
         print(f"{views:,} views — {title}")
 
-    print("\nTop 5 Tags:")
+    print(f"\nTop {TOP_N} Tags:")
     for tag, count in top_tags:
         print(f"{tag}: {count}")
 
-    print("\n============================")
-    print("PER GENRE")
-    print("============================")
-    for genre, stats in sorted(genre_stats.items()):
-        print(f"\n{genre}")
-        print(f"  Videos: {stats['count']}")
-        print(f"  Total Duration: {format_duration(stats['duration'])}")
-        print(f"  Total Views: {stats['views']:,}")
-
-    #print("\n============================")
-    #print("PER UPLOADER")
-    #print("============================")
-    #for uploader, stats in sorted(uploader_stats.items()):
-    #    if stats['count'] >= 3:
-    #        print(f"\n{uploader}")
-    #        print(f"  Videos: {stats['count']}")
-    #        print(f"  Total Duration: {format_duration(stats['duration'])}")
-    #        print(f"  Total Views: {stats['views']:,}")
+    print_groups("PER GENRE", summary["by_genre"])
+    print_groups("PER YEAR", summary["by_year"])
+
+    if args.uploaders is not None:
+        uploaders = stats.group_by(cols["uploader"], cols["uploader_names"], cols["duration"], cols["views"])
+        print_groups("PER UPLOADER", uploaders, min_count=args.uploaders)
 
 
 if __name__ == "__main__":
@@ -1,17 +1,13 @@
 import json
-import subprocess
 import sys
 from pathlib import Path
-from datetime import datetime
 
-ROOT = Path(__file__).resolve().parent.parent.parent.parent
-EXCLUDE_DIR = "1_New_Downloads"
-FAIL_LOG = Path("count_failures.txt")
+TOOLS_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(TOOLS_DIR))
 
+import archive_stats as stats  # noqa: E402
 
-def log_failure(path: Path, reason: str):
-    with FAIL_LOG.open("a", encoding="utf-8") as f:
-        f.write(f"{path} :: {reason}\n")
+CATALOG_PATH = TOOLS_DIR / "catalog.json"
 
 
 def format_time(n: int) -> str:
@@ -52,38 +48,31 @@ def format_time(n: int) -> str:
     return time
 
 
-def process_json(path: Path, counter: int):
-    try:
-        with path.open("r", encoding="utf-8") as f:
-            data = json.load(f)
-    except Exception:
-        log_failure(path, "invalid json")
-        print(f"[error] failed to load json: {path}")
-        return
+def total_duration(catalog: dict) -> int:
+    """Precomputed summary if the catalog has one, else a column sum over its records."""
+    summary = catalog.get("summary")
+    if summary and "total_duration" in summary:
+        return int(summary["total_duration"])
 
-    if "duration_seconds" in data:
-        time = int(data.get("duration_seconds", 0))
-        counter = counter + time
-
-    return counter
+    cols = stats.load_columns(catalog.get("videos", {}))
+    return stats.total(cols["duration"])
 
 
 def main():
-    if FAIL_LOG.exists():
-        FAIL_LOG.unlink()
-
-    counter = 0
+    if not CATALOG_PATH.exists():
+        print(f"[error] catalog not found: {CATALOG_PATH} (run 5_generate_catalog.py)")
+        return 1
 
-    for json_path in ROOT.rglob("*.json"):
-        if EXCLUDE_DIR in json_path.parts:
-            continue
-        counter = process_json(json_path, counter)
+    with CATALOG_PATH.open("r", encoding="utf-8") as f:
+        catalog = json.load(f)
 
+    counter = total_duration(catalog)
     time = format_time(counter)
 
     print(f"duration count before: {counter}")
     print(f"duration count after: {time}")
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
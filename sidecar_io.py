@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Crash- and concurrency-safe JSON file I/O for sidecars, catalog.json and the caches.
+
+- write_json_atomic: temp file in the same folder, fsync, rename. Readers
+  see the old or the new file, never a truncated one, so reading needs no
+  lock.
+- locked: fcntl advisory lock for read-modify-write updates. The lock is
+  taken on the file's folder, so it survives the rename of the file
+  itself. A video folder holds one sidecar, and catalog.json shares its
+  folder only with the caches.
+- update_json: merge-on-write. Re-reads the file under the lock, merges
+  the new fields into it and writes it back, so fields written by another
+  tool in the meantime are kept.
+
+With these, the tagger, backfill_viewcount.py and the catalog generator
+can run over the same archive at the same time.
+"""
+
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: atomic writes only, no locking
+    fcntl = None
+
+# ---------------------------
+# Reading
+# ---------------------------
+
+def read_json(path: Path) -> dict | None:
+    """Parsed JSON object, or None if the file is missing or unreadable."""
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception:
+        return None
+    return data if isinstance(data, dict) else None
+
+# ---------------------------
+# Writing
+# ---------------------------
+
+def _fsync_dir(directory: Path):
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_json_atomic(path: Path, data, indent: int | None = 2, ensure_ascii: bool = True):
+    # Serialized in one piece: json.dumps is several times faster than
+    # json.dump's chunked writes, and with indent=None it uses the C encoder
+    text = json.dumps(data, indent=indent, ensure_ascii=ensure_ascii)
+
+    # Unique temp name, so two writers of the same file never share one
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        try:
+            mode = path.stat().st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o644
+        os.fchmod(fd, mode)
+
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+    _fsync_dir(path.parent)
+
+# ---------------------------
+# Locking
+# ---------------------------
+
+@contextmanager
+def locked(path: Path):
+    """Exclusive advisory lock on the folder of `path`, for read-modify-write."""
+    if fcntl is None:
+        yield
+        return
+
+    fd = os.open(path.parent, os.O_RDONLY)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)  # releases the lock
+
+
+def update_json(path: Path, fields: dict, create: bool = False, **dump_options) -> dict | None:
+    """
+    Merge `fields` into the JSON object at `path` under the lock; a field
+    set to None is removed. Returns the merged object, or None if the file
+    is missing or unreadable (unless `create`, which starts from {}).
+    The file is only rewritten if something changed.
+    """
+    with locked(path):
+        current = read_json(path)
+        if current is None:
+            if not create:
+                return None
+            current, exists = {}, False
+        else:
+            exists = True
+
+        merged = {**current, **fields}
+        merged = {k: v for k, v in merged.items() if not (k in fields and v is None)}
+
+        if merged != current or not exists:
+            write_json_atomic(path, merged, **dump_options)
+        return merged
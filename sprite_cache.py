@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Seek-preview sprite sheets for GUI scrubbing.
+
+For every video in catalog.json, one frame every INTERVAL_SECONDS is taken
+(keyframes only, so nothing else is decoded), scaled to TILE_WIDTH and
+packed into COLUMNS x ROWS sprite sheets, with a WebVTT thumbnail track
+mapping each time range to a region of a sheet:
+
+    sprite_cache/<video_id>/sheet_001.jpg ...
+    sprite_cache/<video_id>/sprites.vtt
+    sprite_cache/<video_id>/meta.json     # source (size, mtime), written last
+
+Videos are processed by a pool of ffmpeg workers. A video is only redone
+when its file changed, and every finished video is complete on disk, so an
+interrupted run simply continues where it stopped.
+
+Each catalog record gets:
+    "sprite_vtt":    <path of sprites.vtt>
+    "sprite_sheets": [<path of each sheet>, ...]
+
+Usage:
+    python3 sprite_cache.py            # generate missing/stale, patch catalog
+    python3 sprite_cache.py --gc       # also delete sprites of removed videos
+"""
+
+import argparse
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import archive_roots
+import metrics
+from catalog_io import load_catalog, update_records, write_json_atomic
+from media_headers import image_size
+
+# ---------------------------
+# Configuration
+# ---------------------------
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+REPO_ROOT = SCRIPT_DIR.parent
+CACHE_DIR = SCRIPT_DIR / "sprite_cache"
+
+VIDEO_EXTENSIONS = {".mp4", ".mkv", ".webm"}
+
+INTERVAL_SECONDS = 10
+TILE_WIDTH = 160
+COLUMNS = 10
+ROWS = 10
+JPEG_QUALITY = 5  # ffmpeg -q:v, 2 (best) .. 31
+DEFAULT_WORKERS = os.cpu_count() or 2
+
+SHEET_PATTERN = "sheet_%03d.jpg"
+VTT_NAME = "sprites.vtt"
+META_NAME = "meta.json"
+
+# ---------------------------
+# Cache lookup
+# ---------------------------
+
+def load_meta(video_id: str) -> dict | None:
+    try:
+        with (CACHE_DIR / video_id / META_NAME).open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def catalog_fields(video_id: str, meta: dict | None) -> dict:
+    if not meta:
+        return {"sprite_vtt": None, "sprite_sheets": None}
+    out_dir = CACHE_DIR / video_id
+    return {
+        "sprite_vtt": (out_dir / VTT_NAME).as_posix(),
+        "sprite_sheets": [(out_dir / name).as_posix() for name in meta["sheets"]],
+    }
+
+
+def is_current(meta: dict | None, video_path: Path) -> bool:
+    if not meta:
+        return False
+    try:
+        st = video_path.stat()
+    except OSError:
+        return False
+    return (
+        (st.st_size, st.st_mtime_ns) == (meta["size"], meta["mtime_ns"])
+        and meta.get("interval") == INTERVAL_SECONDS
+        and meta.get("tile_width") == TILE_WIDTH
+    )
+
+
+def sprite_fields(video_id: str, path: str) -> dict:
+    """
+    Catalog fields for a video whose sprites exist for this exact file.
+    Used by 5_generate_catalog.py.
+    """
+    meta = load_meta(video_id)
+    if not is_current(meta, REPO_ROOT / path):
+        return {}
+    return catalog_fields(video_id, meta)
+
+# ---------------------------
+# Generation
+# ---------------------------
+
+def format_timestamp(seconds: float) -> str:
+    ms = round(seconds * 1000)
+    h, ms = divmod(ms, 3_600_000)
+    m, ms = divmod(ms, 60_000)
+    s, ms = divmod(ms, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d}.{ms:03d}"
+
+
+def write_vtt(path: Path, sheets: list[str], tile_w: int, tile_h: int, tiles: int, duration: float):
+    lines = ["WEBVTT", ""]
+    per_sheet = COLUMNS * ROWS
+
+    for i in range(tiles):
+        start = i * INTERVAL_SECONDS
+        end = min((i + 1) * INTERVAL_SECONDS, duration)
+        sheet = sheets[i // per_sheet]
+        col, row = (i % per_sheet) % COLUMNS, (i % per_sheet) // COLUMNS
+        lines.append(f"{format_timestamp(start)} --> {format_timestamp(end)}")
+        lines.append(f"{sheet}#xywh={col * tile_w},{row * tile_h},{tile_w},{tile_h}")
+        lines.append("")
+
+    path.write_text("\n".join(lines), encoding="utf-8")
+
+
+def render(video_id: str, video_path: Path, duration: float) -> tuple[str, str]:
+    """
+    Build the sprites of one video in a temp dir, then swap it in.
+    Returns (status, detail); status is ok / error.
+    """
+    with metrics.timed("sprites", video_id=video_id) as event:
+        status, detail = _render(video_id, video_path, duration)
+        if status != "ok":
+            event.update(outcome="failed", reason="ffmpeg-error")
+        else:
+            event["bytes"] = metrics.tree_size(CACHE_DIR / video_id)
+    return status, detail
+
+
+def _render(video_id: str, video_path: Path, duration: float) -> tuple[str, str]:
+    st = video_path.stat()
+    tiles = max(1, math.ceil(duration / INTERVAL_SECONDS))
+
+    out_dir = CACHE_DIR / video_id
+    tmp_dir = CACHE_DIR / f".{video_id}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    try:
+        result = subprocess.run(
+            [
+                "ffmpeg", "-nostdin", "-loglevel", "error", "-y",
+                "-threads", "1",
+                "-skip_frame", "nokey",  # decode keyframes only
+                "-i", str(video_path),
+                "-an", "-sn",
+                "-vf", f"fps=1/{INTERVAL_SECONDS},scale={TILE_WIDTH}:-2,tile={COLUMNS}x{ROWS}",
+                "-fps_mode", "vfr",
+                "-q:v", str(JPEG_QUALITY),
+                str(tmp_dir / SHEET_PATTERN),
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+    except OSError as e:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return "error", f"ffmpeg could not be started: {e}"
+
+    sheets = sorted(p.name for p in tmp_dir.glob("sheet_*.jpg"))
+    size = image_size(tmp_dir / sheets[0]) if sheets else None
+
+    if result.returncode != 0 or not size:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return "error", result.stderr.strip()[:200] or "no sprite sheet produced"
+
+    # The tile filter pads every sheet to the full grid
+    tile_w, tile_h = size[0] // COLUMNS, size[1] // ROWS
+    tiles = min(tiles, len(sheets) * COLUMNS * ROWS)
+
+    write_vtt(tmp_dir / VTT_NAME, sheets, tile_w, tile_h, tiles, duration)
+    write_json_atomic(tmp_dir / META_NAME, {
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "interval": INTERVAL_SECONDS,
+        "tile_width": TILE_WIDTH,
+        "tile": [tile_w, tile_h],
+        "sheets": sheets,
+    })
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    return "ok", ""
+
+
+def collect_garbage(video_ids: set[str]) -> int:
+    removed = 0
+    for path in CACHE_DIR.iterdir():
+        if path.is_dir() and path.name not in video_ids:
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate seek-preview sprite sheets for the catalog.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="parallel ffmpeg processes")
+    parser.add_argument("--gc", action="store_true", help="delete sprites of videos no longer in the catalog")
+    args = parser.parse_args()
+
+    catalog = load_catalog(SCRIPT_DIR)
+    if not catalog:
+        print("[ERROR] catalog.json not found, run 5_generate_catalog.py first.")
+        return 1
+
+    CACHE_DIR.mkdir(exist_ok=True)
+
+    jobs = []
+    skipped = 0
+    for vid, record in catalog["videos"].items():
+        video_path = archive_roots.resolve(record)
+        if video_path.suffix.lower() not in VIDEO_EXTENSIONS:
+            continue
+        if is_current(load_meta(vid), video_path):
+            continue
+        duration = record.get("probed_duration") or record.get("duration")
+        if not duration or not video_path.exists():
+            skipped += 1
+            continue
+        jobs.append((vid, video_path, float(duration)))
+
+    print(f"[info] {len(jobs)} video(s) need sprites, {skipped} skipped (missing file or unknown duration)")
+
+    counts = {"ok": 0, "error": 0}
+    pool = ThreadPoolExecutor(max_workers=args.workers)
+    futures = {pool.submit(render, *job): job for job in jobs}
+    try:
+        for future in as_completed(futures):
+            vid, video_path, _ = futures[future]
+            status, detail = future.result()
+            counts[status] += 1
+            if status == "ok":
+                print(f"[OK] {vid} ({counts['ok'] + counts['error']}/{len(jobs)})")
+            else:
+                print(f"[WARN] {video_path.name}: {detail}")
+    except KeyboardInterrupt:
+        print("\n[info] Interrupted; finished videos are kept, rerun to continue.")
+        pool.shutdown(wait=True, cancel_futures=True)
+    pool.shutdown(wait=True)
+
+    updates = {}
+    for vid, record in catalog["videos"].items():
+        meta = load_meta(vid)
+        updates[vid] = catalog_fields(vid, meta if is_current(meta, archive_roots.resolve(record)) else None)
+    changed = update_records(SCRIPT_DIR, updates)
+    print(f"[OK] {counts['ok']} generated, {counts['error']} failed, {changed} catalog record(s) updated.")
+
+    if args.gc:
+        print(f"[OK] {collect_garbage(set(catalog['videos']))} orphaned sprite folder(s) removed.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
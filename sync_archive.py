@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+Incremental backup of the archive's video folders to a second disk.
+
+The target keeps a manifest (.visorum_sync.json) of what it holds: every
+<category>/<video_id> folder with each file's size, mtime and hash. A run
+only stats the source and diffs it against that manifest; the target tree
+itself is never walked.
+
+- Folders that moved to another category are renamed on the target
+- New or changed folders are copied with a few parallel streams; only the
+  files whose size/mtime changed are copied, and a file whose hash still
+  matches (only touched) just gets its new mtime
+- Copies use os.copy_file_range (or os.sendfile), go to a temp file,
+  are fsynced, read back and compared against the source hash before the
+  rename
+- Folders that are gone from the source are only deleted with --delete
+
+The manifest is checkpointed while copying, so an interrupted run resumes
+with the folders it had not finished. 1_New_Downloads (scripts, caches,
+downloads in progress) is not synced.
+
+Every archive root (archive_roots.json) is synced: this archive's folders
+keep their layout on the target, another root's go under _root_<name>/.
+Folders of a root that is not mounted are left alone on the target.
+
+Usage:
+    python3 sync_archive.py /mnt/backup/yt-dlp --dry-run
+    python3 sync_archive.py /mnt/backup/yt-dlp
+    python3 sync_archive.py /mnt/backup/yt-dlp --delete --workers 2
+"""
+
+import argparse
+import errno
+import hashlib
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+import archive_roots
+import metrics
+from sidecar_io import locked, read_json, write_json_atomic
+
+# ---------------------------
+# Configuration
+# ---------------------------
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+REPO_ROOT = SCRIPT_DIR.parent
+
+MANIFEST_NAME = ".visorum_sync.json"
+MANIFEST_VERSION = 1
+TARGET_ROOT_FORMAT = "_root_{}"  # target folder of another archive root
+EXCLUDE_FOLDERS = {"1_New_Downloads", "1 New Downloads"}
+
+DEFAULT_WORKERS = 4           # parallel folder copies
+COPY_CHUNK = 64 << 20         # bytes per copy_file_range/sendfile call
+BUFFER_SIZE = 8 << 20         # read buffer for hashing and the fallback copy
+CHECKPOINT_SECONDS = 30       # manifest write interval while copying
+
+# Kernel copy errors that mean "not supported here", not "copy failed"
+FALLBACK_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP}
+
+
+class SyncError(Exception):
+    pass
+
+# ---------------------------
+# Source scan and manifest
+# ---------------------------
+
+def scan_source() -> dict[str, dict[str, dict]]:
+    """
+    Folder label (archive_roots.label: "<category>/<folder>", "disk2:<category>/<folder>")
+    -> file path within the folder -> {"size", "mtime_ns"}; stat only.
+    """
+    folders = {}
+    for category_dir in archive_roots.category_dirs(EXCLUDE_FOLDERS):
+        for video_dir in sorted(p for p in category_dir.iterdir() if p.is_dir()):
+            files = {}
+            for path in video_dir.rglob("*"):
+                # Hidden files are temp files of writers still running
+                if path.name.startswith(".") or not path.is_file():
+                    continue
+                st = path.stat()
+                files[path.relative_to(video_dir).as_posix()] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+            folders[archive_roots.label(video_dir)] = files
+    return folders
+
+
+def target_path(target: Path, rel_dir: str) -> Path:
+    """Where a folder label lives on the target."""
+    name, rel = archive_roots.split_label(rel_dir)
+    return target / rel if name is None else target / TARGET_ROOT_FORMAT.format(name) / rel
+
+
+def load_manifest(target: Path) -> dict:
+    manifest = read_json(target / MANIFEST_NAME)
+    if not manifest or manifest.get("version") != MANIFEST_VERSION:
+        return {"version": MANIFEST_VERSION, "dirs": {}}
+    return manifest
+
+
+def save_manifest(target: Path, manifest: dict):
+    manifest["source"] = str(REPO_ROOT)
+    manifest["roots"] = {root.name: str(root.path) for root in archive_roots.load_roots() if not root.is_home}
+    manifest["synced_at"] = datetime.utcnow().isoformat() + "Z"
+    manifest["dirs"] = dict(sorted(manifest["dirs"].items()))
+    write_json_atomic(target / MANIFEST_NAME, manifest, indent=None, ensure_ascii=False)
+
+
+def unchanged(files: dict[str, dict], synced: dict[str, dict]) -> bool:
+    if files.keys() != synced.keys():
+        return False
+    return all(
+        (st["size"], st["mtime_ns"]) == (synced[name]["size"], synced[name]["mtime_ns"])
+        for name, st in files.items()
+    )
+
+
+def folder_signature(rel_dir: str, files: dict) -> tuple:
+    """Folder name and the size of every file in it: what a move keeps."""
+    return rel_dir.rsplit("/", 1)[1], frozenset((name, meta["size"]) for name, meta in files.items())
+
+
+def plan(source: dict, synced: dict) -> tuple[list[tuple[str, str]], list[str], list[str]]:
+    """
+    (moves, folders to copy, folders only on the target).
+    A folder that disappeared from one category and appeared in another with
+    the same name and file sizes is a move; after the rename it is compared
+    like any other folder. When that match is not one-to-one (the same ID in
+    two categories), nothing is moved and the new folder is copied.
+    """
+    added = sorted(source.keys() - synced.keys())
+    gone = sorted(synced.keys() - source.keys())
+
+    gone_by_signature = {}
+    for rel_dir in gone:
+        gone_by_signature.setdefault(folder_signature(rel_dir, synced[rel_dir]), []).append(rel_dir)
+    added_by_signature = {}
+    for rel_dir in added:
+        added_by_signature.setdefault(folder_signature(rel_dir, source[rel_dir]), []).append(rel_dir)
+
+    moves = []
+    for signature, new_dirs in added_by_signature.items():
+        old_dirs = gone_by_signature.get(signature, [])
+        if len(new_dirs) == 1 and len(old_dirs) == 1:
+            moves.append((old_dirs[0], new_dirs[0]))
+    moves.sort(key=lambda move: move[1])
+
+    # Moved folders are compared against their entry under the old path
+    moved_to = {new: old for old, new in moves}
+    to_copy = []
+    for rel_dir, files in sorted(source.items()):
+        previous = synced.get(moved_to.get(rel_dir, rel_dir))
+        if previous is None or not unchanged(files, previous):
+            to_copy.append(rel_dir)
+
+    moved_from = set(moved_to.values())
+    only_target = [rel_dir for rel_dir in gone if rel_dir not in moved_from]
+    return moves, to_copy, only_target
+
+# ---------------------------
+# Copying
+# ---------------------------
+
+def hash_file(path: Path) -> str:
+    h = hashlib.blake2b(digest_size=20)
+    buf = bytearray(BUFFER_SIZE)
+    view = memoryview(buf)
+    with path.open("rb", buffering=0) as f:
+        # Read-back verification should hit the disk, not the page cache
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+        while n := f.readinto(buf):
+            h.update(view[:n])
+    return h.hexdigest()
+
+
+def _copy_file_range(src_fd: int, dst_fd: int, size: int):
+    offset = 0
+    while offset < size:
+        n = os.copy_file_range(src_fd, dst_fd, min(COPY_CHUNK, size - offset), offset, offset)
+        if n == 0:
+            raise SyncError("source file shrank during the copy")
+        offset += n
+
+
+def _sendfile(src_fd: int, dst_fd: int, size: int):
+    offset = 0
+    while offset < size:
+        n = os.sendfile(dst_fd, src_fd, offset, min(COPY_CHUNK, size - offset))
+        if n == 0:
+            raise SyncError("source file shrank during the copy")
+        offset += n
+
+
+def _read_write(src_fd: int, dst_fd: int, size: int):
+    with os.fdopen(os.dup(src_fd), "rb", buffering=0) as fsrc, os.fdopen(os.dup(dst_fd), "wb", buffering=0) as fdst:
+        shutil.copyfileobj(fsrc, fdst, BUFFER_SIZE)
+
+
+def copy_data(src_fd: int, dst_fd: int, size: int):
+    """Kernel-side copy where the platform/filesystem allows it, buffered copy otherwise."""
+    for method in (_copy_file_range, _sendfile, _read_write):
+        if method is _copy_file_range and not hasattr(os, "copy_file_range"):
+            continue
+        if method is _sendfile and not sys.platform.startswith("linux"):
+            continue  # sendfile() to a regular file is Linux-only
+        try:
+            method(src_fd, dst_fd, size)
+            return
+        except OSError as e:
+            if e.errno not in FALLBACK_ERRNOS or method is _read_write:
+                raise
+            os.ftruncate(dst_fd, 0)
+            os.lseek(src_fd, 0, os.SEEK_SET)
+            os.lseek(dst_fd, 0, os.SEEK_SET)
+
+
+def copy_verified(src: Path, dst: Path, st: dict, digest: str):
+    """Copy src over dst through a temp file; raises SyncError if the read-back hash differs."""
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(f".{dst.name}.sync.tmp")
+
+    try:
+        with src.open("rb") as fsrc, tmp.open("wb") as fdst:
+            copy_data(fsrc.fileno(), fdst.fileno(), st["size"])
+            fdst.flush()
+            os.fsync(fdst.fileno())
+
+        try:
+            shutil.copymode(src, tmp)
+        except OSError:
+            pass  # e.g. exFAT backup disks have no permission bits
+        os.utime(tmp, ns=(st["mtime_ns"], st["mtime_ns"]))
+
+        if hash_file(tmp) != digest:
+            raise SyncError(f"verification failed for {dst}")
+        os.replace(tmp, dst)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def sync_dir(rel_dir: str, files: dict[str, dict], synced: dict[str, dict], target: Path, delete: bool) -> tuple[dict, int]:
+    """
+    Bring one target folder up to date. Returns (its new manifest entry, bytes copied).
+    Files not in the manifest entry are hashed; only those whose hash differs are copied.
+    """
+    src_dir = archive_roots.path_of(rel_dir)
+    dst_dir = target_path(target, rel_dir)
+    dst_dir.mkdir(parents=True, exist_ok=True)
+
+    entry = {}
+    copied = 0
+
+    for name, st in sorted(files.items()):
+        old = synced.get(name)
+        if old and (old["size"], old["mtime_ns"]) == (st["size"], st["mtime_ns"]):
+            entry[name] = old
+            continue
+
+        src = src_dir / name
+        dst = dst_dir / name
+        digest = hash_file(src)
+
+        if old and old["size"] == st["size"] and old["hash"] == digest and dst.is_file():
+            os.utime(dst, ns=(st["mtime_ns"], st["mtime_ns"]))  # touched, not changed
+        elif not old and dst.is_file() and dst.stat().st_size == st["size"] and hash_file(dst) == digest:
+            os.utime(dst, ns=(st["mtime_ns"], st["mtime_ns"]))  # already there (e.g. an older full copy)
+        else:
+            copy_verified(src, dst, st, digest)
+            copied += st["size"]
+
+        after = src.stat()
+        if (after.st_size, after.st_mtime_ns) != (st["size"], st["mtime_ns"]):
+            raise SyncError(f"{src} changed during the copy")
+        entry[name] = {**st, "hash": digest}
+
+    for name in sorted(synced.keys() - files.keys()):
+        if delete:
+            (dst_dir / name).unlink(missing_ok=True)
+        else:
+            entry[name] = synced[name]
+
+    return entry, copied
+
+# ---------------------------
+# Main
+# ---------------------------
+
+def format_bytes(n: int) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if n < 1024:
+            return f"{n:.1f} {unit}" if unit != "B" else f"{n} B"
+        n /= 1024
+    return f"{n:.1f} TiB"
+
+
+def apply_moves(target: Path, manifest: dict, moves: list[tuple[str, str]]) -> list[str]:
+    """Rename moved folders on the target. Returns the new paths that could not be renamed."""
+    failed = []
+    for old, new in moves:
+        try:
+            target_path(target, new).parent.mkdir(parents=True, exist_ok=True)
+            os.rename(target_path(target, old), target_path(target, new))
+        except OSError as e:
+            print(f"[WARN] could not rename {old} -> {new} on the target ({e}), copying instead.")
+            failed.append(new)
+            continue
+
+        manifest["dirs"][new] = manifest["dirs"].pop(old)
+        try:
+            target_path(target, old).parent.rmdir()  # category folder left empty
+        except OSError:
+            pass
+        print(f"[OK] moved {old} -> {new}")
+    return failed
+
+
+def run_copies(target: Path, manifest: dict, source: dict, to_copy: list[str], args) -> tuple[int, int, int]:
+    """Returns (folders copied, bytes copied, failures)."""
+    done = failed = total_bytes = 0
+    last_checkpoint = time.monotonic()
+
+    def work(rel_dir: str):
+        started = time.monotonic()
+        with metrics.timed("sync", video_id=rel_dir.rsplit("/", 1)[1]) as event:
+            entry, copied = sync_dir(rel_dir, source[rel_dir], manifest["dirs"].get(rel_dir, {}), target, args.delete)
+            event["bytes"] = copied
+        return entry, copied, time.monotonic() - started
+
+    pool = ThreadPoolExecutor(max_workers=args.workers)
+    try:
+        futures = {pool.submit(work, rel_dir): rel_dir for rel_dir in to_copy}
+        for future in as_completed(futures):
+            rel_dir = futures[future]
+            try:
+                entry, copied, seconds = future.result()
+            except (OSError, SyncError) as e:
+                failed += 1
+                print(f"[WARN] {rel_dir}: {e}")
+                continue
+
+            manifest["dirs"][rel_dir] = entry
+            done += 1
+            total_bytes += copied
+            print(f"[OK] {rel_dir} ({format_bytes(copied)} in {seconds:.1f}s)")
+
+            if time.monotonic() - last_checkpoint >= CHECKPOINT_SECONDS:
+                save_manifest(target, manifest)
+                last_checkpoint = time.monotonic()
+    except KeyboardInterrupt:
+        print("\nInterrupted, finishing the folders in progress..")
+        pool.shutdown(wait=True, cancel_futures=True)
+        raise
+    finally:
+        pool.shutdown(wait=True)
+
+    return done, total_bytes, failed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Incrementally sync the archive's video folders to a second disk.")
+    parser.add_argument("target", type=Path, help="root of the copy (the yt-dlp/ folder on the other disk)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="parallel folder copies")
+    parser.add_argument("--delete", action="store_true", help="delete folders/files that are gone from the source")
+    parser.add_argument("--dry-run", action="store_true", help="only print what would be done")
+    args = parser.parse_args()
+
+    try:
+        roots = archive_roots.load_roots()
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        return 1
+
+    target = args.target.resolve()
+    for root in roots:
+        if target == root.path or root.path in target.parents:
+            print(f"[ERROR] The target must be outside the archive (it is inside root {root.name}).")
+            return 1
+        if not root.is_home and (REPO_ROOT / TARGET_ROOT_FORMAT.format(root.name)).exists():
+            print(f"[ERROR] A category is named {TARGET_ROOT_FORMAT.format(root.name)}, the target folder of root {root.name}.")
+            return 1
+    if not target.is_dir():
+        print(f"[ERROR] {target} is not a directory (mount the disk, or create the folder first).")
+        return 1
+
+    # One sync per target at a time
+    with locked(target / MANIFEST_NAME):
+        manifest = load_manifest(target)
+        source = scan_source()
+
+        # A root that is not mounted is not gone: its folders are neither moved nor deleted
+        offline = tuple(f"{root.name}:" for root in roots if not root.path.is_dir())
+        synced = {rel_dir: files for rel_dir, files in manifest["dirs"].items() if not rel_dir.startswith(offline)}
+        moves, to_copy, only_target = plan(source, synced)
+
+        pending = sum(st["size"] for rel_dir in to_copy for st in source[rel_dir].values())
+        print(
+            f"[info] {len(source)} folder(s) in the archive, {len(manifest['dirs'])} on the target: "
+            f"{len(moves)} moved, {len(to_copy)} new or changed (up to {format_bytes(pending)}), "
+            f"{len(only_target)} only on the target."
+        )
+
+        if args.dry_run:
+            for old, new in moves:
+                print(f"[dry-run] move {old} -> {new}")
+            for rel_dir in to_copy:
+                print(f"[dry-run] copy {rel_dir}")
+            for rel_dir in only_target:
+                print(f"[dry-run] {'delete' if args.delete else 'keep'} {rel_dir}")
+            return 0
+
+        to_copy = sorted(set(to_copy) | set(apply_moves(target, manifest, moves)))
+
+        try:
+            done, copied, failed = run_copies(target, manifest, source, to_copy, args)
+        finally:
+            save_manifest(target, manifest)
+
+        for rel_dir in only_target:
+            if args.delete:
+                shutil.rmtree(target_path(target, rel_dir), ignore_errors=True)
+                del manifest["dirs"][rel_dir]
+                print(f"[OK] deleted {rel_dir}")
+        if args.delete and only_target:
+            save_manifest(target, manifest)
+
+    print(f"[OK] {done} folder(s) synced, {format_bytes(copied)} copied, {len(moves)} move(s).")
+    if only_target and not args.delete:
+        print(f"[info] {len(only_target)} folder(s) only on the target; rerun with --delete to remove them.")
+    if failed:
+        print(f"[WARN] {failed} folder(s) failed; rerun to retry them.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
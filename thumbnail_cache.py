@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Downscaled thumbnail cache for GUI grids.
+
+For every thumbnail referenced in catalog.json, small JPEGs are generated
+at fixed widths by a pool of ffmpeg workers and stored content-addressed:
+
+    thumb_cache/<width>/<hash[:2]>/<hash>.jpg
+
+where <hash> is the BLAKE2 hash of the source image. index.json remembers
+each source's (size, mtime) and hash, so unchanged sources are never
+re-read, and identical images share one derivative.
+
+Each catalog record gets:
+    "thumbnail_small": <path of the SMALL_WIDTH derivative>
+    "thumbnail_sizes": {"<width>": <path>, ...}
+
+Usage:
+    python3 thumbnail_cache.py            # generate missing/stale, patch catalog
+    python3 thumbnail_cache.py --gc       # also delete orphaned derivatives
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from catalog_io import load_catalog, update_records, write_json_atomic
+
+# ---------------------------
+# Configuration
+# ---------------------------
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+CACHE_DIR = SCRIPT_DIR / "thumb_cache"
+INDEX_PATH = CACHE_DIR / "index.json"
+
+WIDTHS = (160, 320)
+SMALL_WIDTH = 320
+JPEG_QUALITY = 5  # ffmpeg -q:v, 2 (best) .. 31
+DEFAULT_WORKERS = os.cpu_count() or 2
+
+# ---------------------------
+# Index
+# ---------------------------
+
+_index_cache: tuple[int, dict] | None = None
+
+
+def load_index() -> dict:
+    """source path -> {"size", "mtime_ns", "hash", "files": {width: path}}"""
+    try:
+        with INDEX_PATH.open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def small_fields(thumbnail: str) -> dict:
+    """
+    Catalog fields for a thumbnail whose derivatives are cached and current.
+    Used by 5_generate_catalog.py; the index is re-read only when it changes.
+    """
+    global _index_cache
+
+    if not thumbnail:
+        return {}
+
+    try:
+        mtime = INDEX_PATH.stat().st_mtime_ns
+    except OSError:
+        return {}
+
+    if _index_cache is None or _index_cache[0] != mtime:
+        _index_cache = (mtime, load_index())
+
+    entry = _index_cache[1].get(thumbnail)
+    if not entry:
+        return {}
+
+    try:
+        st = Path(thumbnail).stat()
+    except OSError:
+        return {}
+    if (st.st_size, st.st_mtime_ns) != (entry["size"], entry["mtime_ns"]):
+        return {}
+
+    return catalog_fields(entry)
+
+
+def catalog_fields(entry: dict) -> dict:
+    files = entry.get("files", {})
+    return {
+        "thumbnail_small": files.get(str(SMALL_WIDTH)),
+        "thumbnail_sizes": files or None,
+    }
+
+# ---------------------------
+# Generation
+# ---------------------------
+
+def hash_file(path: Path) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def derivative_path(digest: str, width: int) -> Path:
+    return CACHE_DIR / str(width) / digest[:2] / f"{digest}.jpg"
+
+
+def render(source: Path, target: Path, width: int) -> bool:
+    """One ffmpeg process: scale down (never up) to `width`, written atomically."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{target.name}.tmp.jpg")
+
+    try:
+        result = subprocess.run(
+            [
+                "ffmpeg", "-nostdin", "-loglevel", "error", "-y",
+                "-i", str(source),
+                "-vf", f"scale='min({width},iw)':-2",
+                "-q:v", str(JPEG_QUALITY),
+                "-frames:v", "1",
+                str(tmp),
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+    except OSError as e:
+        print(f"[WARN] ffmpeg could not be started: {e}")
+        return False
+
+    if result.returncode != 0 or not tmp.exists():
+        tmp.unlink(missing_ok=True)
+        print(f"[WARN] ffmpeg failed for {source.name}: {result.stderr.strip()[:200]}")
+        return False
+
+    os.replace(tmp, target)
+    return True
+
+
+def process_source(thumbnail: str, entry: dict | None) -> dict | None:
+    """Bring one source's derivatives up to date; returns its new index entry."""
+    source = Path(thumbnail)
+    try:
+        st = source.stat()
+    except OSError:
+        return None
+
+    if (
+        entry
+        and (st.st_size, st.st_mtime_ns) == (entry["size"], entry["mtime_ns"])
+        and all(Path(p).exists() for p in entry["files"].values())
+        and set(entry["files"]) == {str(w) for w in WIDTHS}
+    ):
+        return entry
+
+    digest = hash_file(source)
+    files = {}
+
+    for width in WIDTHS:
+        target = derivative_path(digest, width)
+        if target.exists() or render(source, target, width):
+            files[str(width)] = target.as_posix()
+
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": digest, "files": files}
+
+
+def collect_garbage(index: dict) -> int:
+    """Delete cached files no index entry points at."""
+    referenced = {p for entry in index.values() for p in entry["files"].values()}
+    removed = 0
+
+    for width_dir in CACHE_DIR.iterdir():
+        if not width_dir.is_dir():
+            continue
+        for path in width_dir.glob("*/*"):
+            if path.as_posix() not in referenced:
+                path.unlink()
+                removed += 1
+
+    return removed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate downscaled thumbnails for the catalog.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="parallel ffmpeg processes")
+    parser.add_argument("--gc", action="store_true", help="delete derivatives no catalog thumbnail uses")
+    args = parser.parse_args()
+
+    catalog = load_catalog(SCRIPT_DIR)
+    if not catalog:
+        print("[ERROR] catalog.json not found, run 5_generate_catalog.py first.")
+        return 1
+
+    old_index = load_index()
+    sources = {}
+    for vid, record in catalog["videos"].items():
+        if record.get("thumbnail"):
+            sources.setdefault(record["thumbnail"], []).append(vid)
+
+    CACHE_DIR.mkdir(exist_ok=True)
+    index = {}
+
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = pool.map(lambda t: (t, process_source(t, old_index.get(t))), sources)
+        for thumbnail, entry in results:
+            if entry and entry["files"]:
+                index[thumbnail] = entry
+
+    write_json_atomic(INDEX_PATH, index, indent=None)
+
+    generated = sum(1 for t, e in index.items() if old_index.get(t) != e)
+    print(f"[OK] {len(index)} thumbnail(s) cached, {generated} new or refreshed.")
+
+    updates = {}
+    for thumbnail, vids in sources.items():
+        fields = catalog_fields(index[thumbnail]) if thumbnail in index else catalog_fields({})
+        for vid in vids:
+            updates[vid] = fields
+    changed = update_records(SCRIPT_DIR, updates)
+    print(f"[OK] {changed} catalog record(s) updated.")
+
+    if args.gc:
+        print(f"[OK] {collect_garbage(index)} orphaned derivative(s) removed.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
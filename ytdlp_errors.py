@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Classify yt-dlp failures from their stderr, and remember the permanent ones.
+
+Classes:
+    age-gated     needs cookies, retried once with the cookie file
+    bot-check     "Sign in to confirm you're not a bot", also retried with cookies
+    private       permanent
+    removed       permanent (unavailable, terminated account, copyright)
+    rate-limited  HTTP 429 / bot check, retry later
+    network       connection problems and 5xx, retry later
+    error         anything else
+
+Permanent failures go to permanent_failures.txt
+("<video_id>\\t<class>\\t<url>" per line). Step 1, pipeline.py and ingest.py
+skip those IDs, so dead videos cost no further requests. Delete a line to
+retry a video.
+
+Shell usage (for the Step 1 scripts):
+    python3 ytdlp_errors.py classify <stderr_file>
+    python3 ytdlp_errors.py is-permanent <class>   # exit status 0 if permanent
+    python3 ytdlp_errors.py needs-cookies <class>  # exit status 0 if retried with cookies
+    python3 ytdlp_errors.py record <video_id> <class> <url>
+    python3 ytdlp_errors.py ids           # one permanently failed ID per line
+"""
+
+import sys
+from pathlib import Path
+
+# ---------------------------
+# Configuration
+# ---------------------------
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+PERMANENT_FILE = SCRIPT_DIR / "permanent_failures.txt"
+COOKIE_FILE = SCRIPT_DIR / "cookies.firefox-private.txt"
+
+# Checked in order; the first class with a matching phrase wins. Transient
+# classes come before "removed": YouTube's session rate limit also starts
+# with "Video unavailable".
+PATTERNS = (
+    ("age-gated", ("sign in to confirm your age", "age-restricted", "inappropriate for some users")),
+    ("bot-check", ("confirm you're not a bot", "confirm you’re not a bot")),
+    ("rate-limited", (
+        "http error 429", "too many requests", "try again later", "rate-limited by youtube",
+        "rate limited by youtube",
+    )),
+    ("private", ("private video", "video is private")),
+    ("removed", (
+        "this video has been removed", "this video is no longer available",
+        "account associated with this video has been terminated", "due to a copyright claim",
+        "removed for violating", "this video does not exist",
+    )),
+    ("network", (
+        "urlopen error", "connection reset", "timed out", "temporary failure in name resolution",
+        "remote end closed connection", "http error 5", "incompleteread", "unable to download webpage",
+    )),
+)
+
+PERMANENT = {"private", "removed"}
+RETRY_WITH_COOKIES = {"age-gated", "bot-check"}
+
+# ---------------------------
+# Classification
+# ---------------------------
+
+def classify(stderr: str) -> str:
+    text = (stderr or "").lower()
+    for name, phrases in PATTERNS:
+        if any(phrase in text for phrase in phrases):
+            return name
+    return "error"
+
+
+def is_permanent(failure_class: str) -> bool:
+    return failure_class in PERMANENT
+
+
+def needs_cookies(failure_class: str) -> bool:
+    return failure_class in RETRY_WITH_COOKIES
+
+
+def cookies_available() -> bool:
+    return COOKIE_FILE.is_file()
+
+# ---------------------------
+# Permanent failure log
+# ---------------------------
+
+def load_permanent() -> dict[str, str]:
+    """video id -> failure class"""
+    failures = {}
+    try:
+        with PERMANENT_FILE.open("r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) >= 2 and parts[0]:
+                    failures[parts[0]] = parts[1]
+    except FileNotFoundError:
+        pass
+    return failures
+
+
+def record_permanent(video_id: str, failure_class: str, url: str):
+    with PERMANENT_FILE.open("a", encoding="utf-8") as f:
+        f.write(f"{video_id}\t{failure_class}\t{url}\n")
+
+
+def main() -> int:
+    args = sys.argv[1:]
+    if args[:1] == ["classify"] and len(args) == 2:
+        print(classify(Path(args[1]).read_text(encoding="utf-8", errors="replace")))
+    elif args[:1] == ["is-permanent"] and len(args) == 2:
+        return 0 if is_permanent(args[1]) else 1
+    elif args[:1] == ["needs-cookies"] and len(args) == 2:
+        return 0 if needs_cookies(args[1]) else 1
+    elif args[:1] == ["record"] and len(args) == 4:
+        record_permanent(args[1], args[2], args[3])
+    elif args == ["ids"]:
+        print("\n".join(load_permanent()))
+    else:
+        print("Usage: ytdlp_errors.py classify <stderr_file> | is-permanent <class> | "
+              "needs-cookies <class> | record <video_id> <class> <url> | ids")
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())